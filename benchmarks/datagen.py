@@ -0,0 +1,39 @@
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Iterator
+
+# rows generated and written at a time, so large tables never sit in memory whole
+GENERATE_CHUNK_ROWS = 1_000_000
+
+def synthetic_table(rows: int,columns: int = 4,cardinality: int = 10,seed: int = 0) -> Iterator[pd.DataFrame]:
+    """Chunks of a synthetic table: an `id` column, a string `category`
+    column with `cardinality` distinct values and `columns` numeric columns
+    c0, c1, ... alternating between integers and floats"""
+    rng = np.random.default_rng(seed)
+    labels = np.array([f"cat_{i}" for i in range(cardinality)])
+    for start in range(0,rows,GENERATE_CHUNK_ROWS):
+        n = min(GENERATE_CHUNK_ROWS,rows - start)
+        data = {"id": np.arange(start,start + n),"category": labels[rng.integers(0,cardinality,n)]}
+        for c in range(columns):
+            data[f"c{c}"] = rng.integers(0,1000,n) if c % 2 == 0 else np.round(rng.random(n) * 1000,3)
+        yield pd.DataFrame(data)
+
+def write_table(path: str,rows: int,columns: int = 4,cardinality: int = 10,seed: int = 0):
+    for i,chunk in enumerate(synthetic_table(rows,columns,cardinality,seed)):
+        chunk.to_csv(path,mode="w" if i == 0 else "a",header=i == 0,index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic CSV table for the executor benchmarks")
+    parser.add_argument("path",help="Output CSV file")
+    parser.add_argument("--rows",type=float,default=1e5,help="Number of rows, e.g. 1e6")
+    parser.add_argument("--columns",type=int,default=4,help="Number of numeric columns")
+    parser.add_argument("--cardinality",type=int,default=10,help="Distinct values of the category column")
+    parser.add_argument("--seed",type=int,default=0,help="Random seed")
+    args = parser.parse_args()
+
+    write_table(args.path,int(args.rows),args.columns,args.cardinality,args.seed)
+    print(f"wrote {int(args.rows)} rows to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""End-to-end executor throughput per statement kind. Run it from the
+repository root as a module, so `src` is importable:
+
+    python -m benchmarks.executor_bench --rows 1e3 1e5
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from typing import Dict, Optional
+from src.catalog import ColumnarCache, IndexStore, shared_catalog
+from src.codegen import Backend, Executor
+from benchmarks.datagen import write_table
+
+# one program per statement kind; the measured result is table `out`, or
+# the printed rows for the loop
+PROGRAMS = {
+    "load": 'load out from "{path}"\nprint out\n',
+    "filter": 'load t from "{path}"\nfilter out {{ where c0 > 500 and category != "cat_1" }}\nprint out\n',
+    "map": 'load t from "{path}"\nmap out on t {{ x = c0 * 2 + c1, y = (c1 - c0) / 2 }}\nprint out\n',
+    "aggregate": 'load t from "{path}"\naggregate out on t {{ total = sum(c0), mean = avg(c1), n = count(id) }}\nprint out\n',
+    "group": 'load t from "{path}"\naggregate out on t by category {{ total = sum(c0), n = count(id) }}\nprint out\n',
+    "order": 'load t from "{path}"\norder out on t by c1 desc\nprint out\n',
+    "for": 'load t from "{path}"\nfor row in t {{ print row.c0 + row.c1 }}\n',
+}
+
+# statements faster than this, in the baseline and now, are within timer and
+# scheduling noise; their ratio is shown but never reported as a regression
+MIN_COMPARED_SECONDS = 0.05
+
+# best-of runs needed before timings are compared against a baseline
+MIN_COMPARED_REPEAT = 3
+
+class HashingSink:
+    """Stands in for stdout: hashes what a program prints instead of keeping it"""
+    def __init__(self):
+        self.digest = hashlib.sha1()
+
+    def write(self,text: str) -> int:
+        self.digest.update(text.encode())
+        return len(text)
+
+    def flush(self):
+        pass
+
+def run_program(source: str) -> str:
+    """Compiles and runs a program end to end, returning a digest of its
+    output and of its `out` table"""
+    sink = HashingSink()
+    with contextlib.redirect_stdout(sink):
+        executor = Executor(Backend(source).run())
+        executor.run()
+    out = executor.tables.get("out")
+    if out is not None:
+        sink.digest.update(pd.util.hash_pandas_object(out).to_numpy().tobytes())
+    return sink.digest.hexdigest()
+
+def forget_tables():
+    shared_catalog.invalidate()
+    shared_catalog.columnar.clear()
+
+def measure(name: str,source: str,repeat: int) -> Dict[str,object]:
+    # load is timed as a first load, parsing the CSV and writing its sidecar;
+    # the others find the table in the catalog, as every later statement does
+    cold = name == "load"
+    forget_tables()
+    digest = run_program(source)
+
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            forget_tables()
+        start = time.perf_counter()
+        run_program(source)
+        best = min(best,time.perf_counter() - start)
+
+    # traced separately, tracemalloc slows allocation-heavy code down
+    if cold:
+        forget_tables()
+    tracemalloc.start()
+    try:
+        run_program(source)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best,"peak_bytes": peak,"digest": digest}
+
+def compare(result: Dict[str,object],baseline: Optional[Dict[str,object]],tolerance: float) -> str:
+    if baseline is None:
+        return "no baseline"
+    if result["digest"] != baseline["digest"]:
+        return "RESULT CHANGED"
+    ratio = result["seconds"] / baseline["seconds"]
+    status = f"{ratio:.2f}x"
+    if max(result["seconds"],baseline["seconds"]) < MIN_COMPARED_SECONDS:
+        status += " (too fast to compare)"
+    elif ratio > 1 + tolerance:
+        status += " SLOWER"
+    elif ratio < 1 - tolerance:
+        status += " faster"
+    return status
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end executor throughput per statement kind on synthetic tables")
+    parser.add_argument("--rows",type=float,nargs="+",default=[1e3,1e5],help="Table sizes to run, e.g. 1e3 1e5 1e7")
+    parser.add_argument("--columns",type=int,default=4,help="Numeric columns of the table (at least 2)")
+    parser.add_argument("--cardinality",type=int,default=10,help="Distinct values of the category column")
+    parser.add_argument("--statements",nargs="+",choices=list(PROGRAMS),default=list(PROGRAMS),help="Statement kinds to run")
+    parser.add_argument("--repeat",type=int,default=3,help="Runs per statement, the best one is reported")
+    parser.add_argument("--data-dir",default=None,help="Directory for the generated tables (default: a temporary directory)")
+    parser.add_argument("--baseline",default=None,help="JSON file of saved results to compare against")
+    parser.add_argument("--save-baseline",default=None,help="Write the results to this JSON file")
+    parser.add_argument("--tolerance",type=float,default=0.2,help="Relative slowdown reported as a regression")
+    args = parser.parse_args()
+    if args.columns < 2:
+        parser.error("--columns must be at least 2")
+    if args.baseline and args.repeat < MIN_COMPARED_REPEAT:
+        parser.error(f"--baseline needs --repeat of at least {MIN_COMPARED_REPEAT}, single runs are too noisy to compare")
+
+    config = {"columns": args.columns,"cardinality": args.cardinality}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["config"] != config:
+            raise Exception(f"Baseline was recorded with {baseline['config']}, not {config}")
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="dataflow-bench-")
+    os.makedirs(data_dir,exist_ok=True)
+    # on-disk caches go with the generated tables rather than the user's cache
+    shared_catalog.columnar = ColumnarCache(data_dir)
+    shared_catalog.indexes = IndexStore(data_dir)
+    results: Dict[str,Dict[str,Dict[str,object]]] = {}
+    failed = False
+
+    for rows in (int(r) for r in args.rows):
+        path = os.path.join(data_dir,f"table_{rows}_{args.columns}_{args.cardinality}.csv")
+        if not os.path.exists(path):
+            write_table(path,rows,args.columns,args.cardinality)
+
+        print(f"\n{rows} rows, {args.columns} numeric columns, {args.cardinality} categories")
+        print(f"{'statement':<10} {'seconds':>9} {'rows/s':>12} {'peak MB':>9}  baseline")
+        results[str(rows)] = {}
+        for name in args.statements:
+            result = measure(name,PROGRAMS[name].format(path=path),args.repeat)
+            results[str(rows)][name] = result
+
+            saved = baseline["results"].get(str(rows),{}).get(name) if baseline else None
+            status = compare(result,saved,args.tolerance)
+            failed = failed or status.endswith(("SLOWER","CHANGED"))
+            print(f"{name:<10} {result['seconds']:9.4f} {rows / result['seconds']:12.0f} "
+                  f"{result['peak_bytes'] / (1024 * 1024):9.1f}  {status}")
+
+    if args.data_dir is None:
+        shutil.rmtree(data_dir,ignore_errors=True)
+    if args.save_baseline:
+        with open(args.save_baseline,"w") as f:
+            json.dump({"config": config,"results": results},f,indent=2)
+        print(f"\nbaseline written to {args.save_baseline}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
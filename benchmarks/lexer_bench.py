@@ -0,0 +1,62 @@
+"""Lexer throughput, regex Lexer against CharLexer. Run it from the
+repository root as a module, so `src` is importable:
+
+    python -m benchmarks.lexer_bench --size-mb 2
+"""
+import argparse
+import random
+import time
+from src.lexer import CharLexer, Lexer
+
+def synthetic_program(size_bytes: int,seed: int = 0) -> str:
+    """Machine-generated looking DataFlow source of roughly size_bytes"""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    i = 0
+    while total < size_bytes:
+        stmt = (
+            f'load t{i} from "data/table_{i}.csv"\n'
+            f'filter f{i} {{ where salary >= {rng.randint(1000,99999)} and department != "Dept {i % 17}" }}\n'
+            f'map m{i} on f{i} {{ bonus_{i} = salary * {rng.random():.4f} + {rng.randint(1,500)}, half_{i} = (salary - 1) / 2 }}\n'
+            f'aggregate a{i} on m{i} {{ total = sum(bonus_{i}), mean = avg(half_{i}), n = count(salary) }}\n'
+            f'for row in m{i} {{ print row.bonus_{i} }}\n'
+            f'print a{i}\n'
+        )
+        parts.append(stmt)
+        total += len(stmt)
+        i += 1
+    return "".join(parts)
+
+def measure(lexer_cls,text: str,repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lexer_cls(text).tokenize()
+        best = min(best,time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Lexer throughput: regex Lexer vs character-at-a-time CharLexer")
+    parser.add_argument("--size-mb",type=float,default=2.0,help="Size of the generated program in MB")
+    parser.add_argument("--repeat",type=int,default=3,help="Runs per lexer, the best one is reported")
+    args = parser.parse_args()
+
+    text = synthetic_program(int(args.size_mb * 1024 * 1024))
+    mb = len(text.encode()) / (1024 * 1024)
+
+    expected = [repr(t) for t in CharLexer(text).tokenize()]
+    actual = [repr(t) for t in Lexer(text).tokenize()]
+    if expected != actual:
+        raise Exception("Lexer and CharLexer produced different token streams")
+    print(f"{len(actual)} tokens in {mb:.2f} MB, token streams identical")
+
+    results = {}
+    for name,lexer_cls in (("CharLexer",CharLexer),("Lexer",Lexer)):
+        seconds = measure(lexer_cls,text,args.repeat)
+        results[name] = seconds
+        print(f"{name:<10} {seconds:8.3f} s  {mb / seconds:8.2f} MB/s")
+    print(f"speedup    {results['CharLexer'] / results['Lexer']:8.1f}x")
+
+if __name__ == "__main__":
+    main()
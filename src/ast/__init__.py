@@ -1,7 +1,7 @@
 from .ast_nodes import (
     ASTNode, Statement, Expression,
     Program,
-    LoadStmt, FilterStmt, MapStmt, AggregateStmt,
+    LoadStmt, FilterStmt, MapStmt, AggregateStmt, JoinStmt, OrderStmt, IndexStmt,
     MapAssign,AggAssign,
     PrintStmt,ForStmt,
     Identifier,NumberLiteral,StringLiteral,
@@ -12,7 +12,7 @@ from .ast_nodes import (
 __all__ = [
     "ASTNode","Statement","Expression",
     "Program",
-    "LoadStmt","FilterStmt","MapStmt","AggregateStmt",
+    "LoadStmt","FilterStmt","MapStmt","AggregateStmt","JoinStmt","OrderStmt","IndexStmt",
     "MapAssign","AggAssign",
     "PrintStmt","ForStmt",
     "Identifier","NumberLiteral","StringLiteral",
@@ -45,7 +45,7 @@ class MapStmt(Statement):
         self.source = source
         self.assignments = assignments
 
-# <aggregate_stmt> ::= "aggregate" target "on" source { assignments (from AggAssign class) }
+# <aggregate_stmt> ::= "aggregate" target "on" source [ "by" column { "," column } ] { assignments (from AggAssign class) }
 class AggAssign(ASTNode):
     def __init__(self,name,func,expr):
         self.name = name
@@ -53,10 +53,35 @@ class AggAssign(ASTNode):
         self.expr = expr
 
 class AggregateStmt(Statement):
-    def __init__(self,target,source,assignments):
+    def __init__(self,target,source,assignments,group_by=None):
         self.target = target
         self.source = source
         self.assignments = assignments
+        self.group_by = group_by or []
+
+# <join_stmt> ::= "join" target "on" left "," right "by" key
+class JoinStmt(Statement):
+    def __init__(self,target,left,right,key):
+        self.target = target
+        self.left = left
+        self.right = right
+        self.key = key
+
+# <order_stmt> ::= "order" target "on" source "by" column [ "desc" ] [ "limit" k ]
+class OrderStmt(Statement):
+    def __init__(self,target,source,column,descending=False,limit=None):
+        self.target = target
+        self.source = source
+        self.column = column
+        self.descending = descending
+        self.limit = limit
+
+# <index_stmt> ::= "index" table "on" column
+class IndexStmt(Statement):
+    def __init__(self,table,column):
+        self.table = table
+        self.column = column
+        self.filename = None  # CSV file of the table, set by the semantic analyzer
 
 # <print_stmt> ::= "print" <expr_list>
 class PrintStmt(Statement):
@@ -0,0 +1,16 @@
+from .columnar import ColumnarCache, default_cache_dir
+from .catalog import CatalogEntry, TableCatalog, infer_schema, shared_catalog
+from .indexes import BitmapIndex, IndexStore, SortedIndex, build_index
+
+__all__ = [
+    "BitmapIndex",
+    "CatalogEntry",
+    "ColumnarCache",
+    "IndexStore",
+    "SortedIndex",
+    "TableCatalog",
+    "build_index",
+    "default_cache_dir",
+    "infer_schema",
+    "shared_catalog",
+]
@@ -0,0 +1,176 @@
+import os
+import threading
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple
+from .columnar import ColumnarCache
+from .indexes import ColumnIndex, IndexStore, build_index
+
+# rows read to infer a CSV schema
+SCHEMA_SAMPLE_ROWS = 10
+
+def infer_schema(df: pd.DataFrame) -> Dict[str,str]:
+    schema = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_integer_dtype(dtype):
+            schema[col] = "int"
+        elif pd.api.types.is_float_dtype(dtype):
+            schema[col] = "float"
+        else:
+            schema[col] = "string"
+    return schema
+
+class CatalogEntry:
+    def __init__(self,fingerprint: Tuple[int,int]):
+        self.fingerprint = fingerprint
+        self.schema: Optional[Dict[str,str]] = None
+        # loaded tables keyed by their column projection, None for every column
+        self.tables: Dict[Optional[Tuple[str,...]],pd.DataFrame] = {}
+        # secondary indexes by column
+        self.indexes: Dict[str,ColumnIndex] = {}
+
+class TableCatalog:
+    """Process-wide cache of CSV files keyed by absolute path, size and
+    modification time. It holds the inferred schema and, when keep_tables is
+    set (the REPL does), the loaded tables, so a file is parsed once per
+    session and again only after it changes on disk. A one-shot run leaves
+    it off, since the executor holds the tables it needs itself. With a ColumnarCache, loaded columns are
+    also written to a binary sidecar that later sessions memory-map instead
+    of parsing the CSV. Secondary indexes of a file live in its entry and,
+    with an IndexStore, on disk."""
+    def __init__(self,keep_tables: bool = False,columnar: Optional[ColumnarCache] = None,
+                 indexes: Optional[IndexStore] = None):
+        self.keep_tables = keep_tables
+        self.columnar = columnar
+        self.indexes = indexes
+        self.entries: Dict[str,CatalogEntry] = {}
+        # one lock per file, so concurrent loads of the same CSV parse it once
+        self.lock = threading.Lock()
+        self.path_locks: Dict[str,threading.Lock] = {}
+
+    def entry(self,path: str) -> CatalogEntry:
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        fingerprint = (stat.st_size,stat.st_mtime_ns)
+
+        entry = self.entries.get(key)
+        if entry is None or entry.fingerprint != fingerprint:
+            entry = CatalogEntry(fingerprint)
+            self.entries[key] = entry
+        return entry
+
+    def schema(self,path: str) -> Dict[str,str]:
+        try:
+            entry = self.entry(path)
+            if entry.schema is None:
+                entry.schema = infer_schema(pd.read_csv(path,nrows=SCHEMA_SAMPLE_ROWS))
+        except Exception as e:
+            raise Exception(f"Failed to load CSV '{path}: {e}")
+        return dict(entry.schema)
+
+    def get_table(self,path: str,columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        try:
+            entry = self.entry(path)
+        except OSError:
+            return None
+
+        key = tuple(columns) if columns is not None else None
+        if key in entry.tables:
+            return entry.tables[key]
+
+        # any cached table holding every requested column will do
+        for cached_key,df in entry.tables.items():
+            if key is not None and (cached_key is None or set(key) <= set(cached_key)):
+                return df[list(key)]
+
+        if self.columnar is not None:
+            df = self.columnar.read(path,entry.fingerprint,columns)
+            if df is not None:
+                self.put_table(path,columns,df)
+                return df
+        return None
+
+    def path_lock(self,path: str) -> threading.Lock:
+        with self.lock:
+            return self.path_locks.setdefault(os.path.abspath(path),threading.Lock())
+
+    def load(self,path: str,columns: Optional[List[str]] = None) -> pd.DataFrame:
+        with self.path_lock(path):
+            df = self.get_table(path,columns)
+            if df is not None:
+                return df
+
+            df = pd.read_csv(path,usecols=columns)
+            if self.columnar is not None:
+                self.columnar.write(path,self.entry(path).fingerprint,df,list(self.schema(path)))
+            self.put_table(path,columns,df)
+            return df
+
+    def scan(self,path: str,columns: Optional[List[str]],chunksize: int) -> Iterator[pd.DataFrame]:
+        """Parses path chunk by chunk without keeping the table. With a
+        ColumnarCache the chunks are also written to its sidecar, so later
+        loads of the file skip parsing it."""
+        writer = None
+        if self.columnar is not None:
+            writer = self.columnar.writer(path,self.entry(path).fingerprint,list(self.schema(path)))
+        try:
+            for chunk in pd.read_csv(path,usecols=columns,chunksize=chunksize):
+                if writer is not None:
+                    writer.add(chunk)
+                yield chunk
+            if writer is not None:
+                writer.close()
+        finally:
+            if writer is not None:
+                writer.abort()
+
+    def put_table(self,path: str,columns: Optional[List[str]],df: pd.DataFrame):
+        if not self.keep_tables:
+            return
+        try:
+            entry = self.entry(path)
+        except OSError:
+            return
+
+        if columns is None:
+            # the full table answers every projection
+            entry.tables.clear()
+        entry.tables[tuple(columns) if columns is not None else None] = df
+
+    def get_index(self,path: str,column: str) -> Optional[ColumnIndex]:
+        try:
+            entry = self.entry(path)
+        except OSError:
+            return None
+
+        index = entry.indexes.get(column)
+        if index is None and self.indexes is not None:
+            index = self.indexes.read(path,entry.fingerprint,column)
+            if index is not None:
+                entry.indexes[column] = index
+        return index
+
+    def create_index(self,path: str,column: str) -> Optional[ColumnIndex]:
+        """Index of a column of path, built from the column and persisted
+        unless one for the current file already exists. None when the
+        column cannot be indexed."""
+        index = self.get_index(path,column)
+        if index is not None:
+            return index
+
+        index = build_index(self.load(path,[column])[column])
+        if index is None:
+            return None
+        entry = self.entry(path)
+        entry.indexes[column] = index
+        if self.indexes is not None:
+            self.indexes.write(path,entry.fingerprint,column,index)
+        return index
+
+    def invalidate(self,path: Optional[str] = None):
+        if path is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(os.path.abspath(path),None)
+
+shared_catalog = TableCatalog(columnar=ColumnarCache(),indexes=IndexStore())
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Set, Tuple
+
+def default_cache_dir() -> str:
+    return os.environ.get("DATAFLOW_CACHE_DIR") or os.path.join(os.path.expanduser("~"),".cache","dataflow")
+
+class ColumnarCache:
+    """Binary sidecar copies of loaded CSV files. Every column is stored as
+    its own .npy file, numeric columns as-is and string columns as int32
+    codes into a dictionary of distinct values, and read back with memory
+    mapping so numeric columns are not copied at all. A sidecar belongs to
+    one (size, mtime) fingerprint of its CSV and is dropped when that
+    changes."""
+    def __init__(self,directory: Optional[str] = None):
+        self.directory = os.path.join(directory or default_cache_dir(),"columnar")
+
+    def _path(self,source: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(source).encode()).hexdigest()[:16]
+        return os.path.join(self.directory,digest)
+
+    def _meta(self,source: str,fingerprint: Tuple[int,int]) -> Optional[dict]:
+        folder = self._path(source)
+        try:
+            with open(os.path.join(folder,"meta.json")) as f:
+                meta = json.load(f)
+        except (OSError,ValueError):
+            return None
+
+        if meta.get("source") != os.path.abspath(source) or tuple(meta.get("fingerprint",())) != tuple(fingerprint):
+            # stale: the CSV changed since the sidecar was written
+            shutil.rmtree(folder,ignore_errors=True)
+            return None
+        return meta
+
+    def read(self,source: str,fingerprint: Tuple[int,int],columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        meta = self._meta(source,fingerprint)
+        if meta is None:
+            return None
+
+        names = columns if columns is not None else meta["schema"]
+        if any(name not in meta["columns"] for name in names):
+            return None
+
+        folder = self._path(source)
+        data = {}
+        try:
+            for name in names:
+                info = meta["columns"][name]
+                values = np.load(os.path.join(folder,info["file"]),mmap_mode="r")
+                if info["encoding"] == "dictionary":
+                    dictionary = np.load(os.path.join(folder,info["dictionary"]))
+                    column = pd.Categorical.from_codes(values,pd.Index(dictionary))
+                    data[name] = pd.Series(column).astype(info["dtype"])
+                else:
+                    data[name] = pd.Series(values,copy=False)
+        except (OSError,ValueError):
+            return None
+        return pd.DataFrame(data,copy=False)
+
+    def write(self,source: str,fingerprint: Tuple[int,int],df: pd.DataFrame,schema: List[str]):
+        """Adds the columns of df to the sidecar of source, creating it if needed"""
+        writer = self.writer(source,fingerprint,schema)
+        writer.add(df)
+        writer.close()
+
+    def writer(self,source: str,fingerprint: Tuple[int,int],schema: List[str]) -> "ColumnarWriter":
+        """A writer adding the columns of a table that arrives in chunks"""
+        return ColumnarWriter(self,source,fingerprint,schema)
+
+    def clear(self):
+        shutil.rmtree(self.directory,ignore_errors=True)
+
+def _is_plain(dtype) -> bool:
+    return isinstance(dtype,np.dtype) and dtype.kind in "biuf"
+
+def _values_path(path: str) -> str:
+    # the distinct values of a spooled string chunk, beside its codes
+    return path[:-len(".npy")] + ".values.npy"
+
+def _save(path: str,array: np.ndarray):
+    tmp = path + ".tmp.npy"
+    np.save(tmp,array)
+    os.replace(tmp,path)
+
+class ColumnarWriter:
+    """Writes the sidecar columns of a table from the chunks it is parsed
+    in, so the table never has to be in memory as a whole. Every chunk of a
+    column is spooled to its own file, string columns as codes into the
+    chunk's distinct values; close() joins the pieces of each column into
+    its .npy file, mapping the chunk codes into one sorted dictionary. A
+    column whose chunks do not share a numeric or string type is left out,
+    as a mixed-type column would be."""
+    def __init__(self,cache: ColumnarCache,source: str,fingerprint: Tuple[int,int],schema: List[str]):
+        self.cache = cache
+        self.source = source
+        self.fingerprint = fingerprint
+        self.schema = list(schema)
+        self.folder = cache._path(source)
+        self.spool: Optional[str] = None
+        self.failed = False
+        self.rows = 0
+        # column -> (piece file, dtype, holds only missing values) per chunk
+        self.pieces: Dict[str,List[Tuple[str,object,bool]]] = {}
+        # columns the sidecar already holds are not written again
+        meta = cache._meta(source,fingerprint)
+        self.skipped: Set[str] = set(meta["columns"]) if meta else set()
+
+    def add(self,chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        if self.failed:
+            return
+        try:
+            if self.spool is None:
+                os.makedirs(self.folder,exist_ok=True)
+                self.spool = tempfile.mkdtemp(prefix="spool-",dir=self.folder)
+            for name in chunk.columns:
+                if name in self.schema and name not in self.skipped:
+                    self._add_column(name,chunk[name])
+        except OSError:
+            # the cache is an optimization, an unwritable directory is not an error
+            self.abort()
+            self.failed = True
+
+    def _add_column(self,name: str,series: pd.Series):
+        pieces = self.pieces.setdefault(name,[])
+        path = os.path.join(self.spool,f"{self.schema.index(name)}.{len(pieces)}.npy")
+        if _is_plain(series.dtype):
+            values = series.to_numpy()
+            np.save(path,values)
+            pieces.append((path,values.dtype,values.dtype.kind == "f" and bool(np.isnan(values).all())))
+            return
+
+        codes,uniques = pd.factorize(series)
+        if not isinstance(series.dtype,pd.StringDtype) and not all(isinstance(v,str) for v in uniques):
+            self.skipped.add(name)
+            return
+        np.save(path,codes.astype(np.int32))
+        np.save(_values_path(path),np.asarray(uniques,dtype=str))
+        pieces.append((path,series.dtype,False))
+
+    def close(self):
+        if self.spool is None:
+            return
+        try:
+            meta = self.cache._meta(self.source,self.fingerprint) or {
+                "source": os.path.abspath(self.source),
+                "fingerprint": list(self.fingerprint),
+                "rows": self.rows,
+                "schema": self.schema,
+                "columns": {},
+            }
+            if meta["rows"] != self.rows:
+                return
+            for name,pieces in self.pieces.items():
+                if name in meta["columns"] or name in self.skipped:
+                    continue
+                info = self._join(name,pieces)
+                if info is not None:
+                    meta["columns"][name] = info
+
+            tmp = os.path.join(self.folder,"meta.json.tmp")
+            with open(tmp,"w") as f:
+                json.dump(meta,f)
+            os.replace(tmp,os.path.join(self.folder,"meta.json"))
+        except OSError:
+            pass
+        finally:
+            self.abort()
+
+    def _join(self,name: str,pieces: List[Tuple[str,object,bool]]) -> Optional[Dict[str,str]]:
+        position = self.schema.index(name)
+        info = {"file": f"{position}.npy"}
+        strings = [not _is_plain(dtype) for _,dtype,_ in pieces]
+        if any(strings):
+            # a chunk of only missing values parses as float, the whole column as strings
+            if not all(string or empty for string,(_,_,empty) in zip(strings,pieces)):
+                return None
+            dtype = np.dtype(np.int32)
+            string_dtype = next(d for (_,d,_),string in zip(pieces,strings) if string)
+            info.update(dtype=str(string_dtype),encoding="dictionary",dictionary=f"{position}.dict.npy")
+            dictionary = self._dictionary(position,[path for (path,_,_),string in zip(pieces,strings) if string])
+        else:
+            if len({d.kind == "b" for _,d,_ in pieces}) > 1:
+                return None
+            dtype = np.result_type(*(d for _,d,_ in pieces))
+            info.update(dtype=str(dtype),encoding="plain")
+
+        target = os.path.join(self.folder,info["file"])
+        if len(pieces) == 1 and not any(strings):
+            os.replace(pieces[0][0],target)
+        else:
+            tmp = target + ".tmp.npy"
+            column = np.lib.format.open_memmap(tmp,mode="w+",dtype=dtype,shape=(self.rows,))
+            start = 0
+            for (path,_,_),string in zip(pieces,strings):
+                values = np.load(path,mmap_mode="r")
+                if string:
+                    # the chunk's codes into its distinct values, mapped into the dictionary
+                    remap = np.searchsorted(dictionary,np.load(_values_path(path))).astype(np.int32)
+                    values = np.append(remap,-1)[values]
+                elif any(strings):
+                    # a chunk of only missing values
+                    values = np.full(len(values),-1,dtype=np.int32)
+                column[start:start + len(values)] = values
+                start += len(values)
+            column.flush()
+            del column
+            os.replace(tmp,target)
+
+        if any(strings):
+            _save(os.path.join(self.folder,info["dictionary"]),dictionary)
+        return info
+
+    def _dictionary(self,position: int,paths: List[str]) -> np.ndarray:
+        """Sorted distinct values of the string chunks spooled at paths. The
+        chunks' values are gathered in a memory-mapped spool file, so only
+        the sort works on a copy in memory."""
+        chunks = [np.load(_values_path(path),mmap_mode="r") for path in paths]
+        dtype = np.result_type(*(values.dtype for values in chunks))
+        gathered = np.lib.format.open_memmap(os.path.join(self.spool,f"{position}.values.npy"),mode="w+",dtype=dtype,
+                                             shape=(sum(len(values) for values in chunks),))
+        start = 0
+        for values in chunks:
+            gathered[start:start + len(values)] = values
+            start += len(values)
+        dictionary = np.unique(gathered)
+        del gathered
+        return dictionary
+
+    def abort(self):
+        if self.spool is not None:
+            shutil.rmtree(self.spool,ignore_errors=True)
+            self.spool = None
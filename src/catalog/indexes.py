@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple, Union
+from .columnar import default_cache_dir
+
+# columns with at most this many distinct values get a bitmap index, others a sorted index
+BITMAP_MAX_VALUES = 64
+
+def _compatible(values: np.ndarray,value) -> bool:
+    # a string column only answers string constants, a numeric column only numbers
+    if values.dtype.kind == "U":
+        return isinstance(value,str)
+    return isinstance(value,(int,float,np.number)) and not isinstance(value,(bool,np.bool_))
+
+def _range(sorted_values: np.ndarray,op: str,value) -> Tuple[int,int]:
+    """Slice of sorted_values satisfying `v op value`, for every op but !="""
+    if op == "==":
+        return int(np.searchsorted(sorted_values,value,side="left")),int(np.searchsorted(sorted_values,value,side="right"))
+    if op in ("<","<="):
+        return 0,int(np.searchsorted(sorted_values,value,side="left" if op == "<" else "right"))
+    return int(np.searchsorted(sorted_values,value,side="right" if op == ">" else "left")),len(sorted_values)
+
+class BitmapIndex:
+    """Index of a low-cardinality column: one packed bitmap of the rows
+    holding each distinct value, values in sorted order. A lookup ORs the
+    bitmaps of the matching values; missing values are in no bitmap."""
+    kind = "bitmap"
+
+    def __init__(self,values: np.ndarray,bitmaps: np.ndarray,rows: int):
+        self.values = values
+        self.bitmaps = bitmaps
+        self.rows = rows
+
+    @classmethod
+    def build(cls,codes: np.ndarray,uniques: np.ndarray,rows: int) -> "BitmapIndex":
+        order = np.argsort(uniques,kind="stable")
+        bitmaps = np.empty((len(uniques),(rows + 7) // 8),dtype=np.uint8)
+        for i,code in enumerate(order):
+            bitmaps[i] = np.packbits(codes == code)
+        return cls(uniques[order],bitmaps,rows)
+
+    def lookup(self,op: str,value) -> Optional[np.ndarray]:
+        if not _compatible(self.values,value):
+            return None
+        if op == "!=":
+            return ~self.lookup("==",value)
+        lo,hi = _range(self.values,op,value)
+        if lo >= hi:
+            return np.zeros((self.rows + 7) // 8,dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[lo:hi],axis=0)
+
+    def arrays(self) -> Dict[str,np.ndarray]:
+        return {"values": self.values,"bitmaps": self.bitmaps}
+
+class SortedIndex:
+    """Index of a high-cardinality column: its non-missing values in sorted
+    order with the row each came from. Equality and range lookups are two
+    binary searches, and the rows in between become a packed bitmap."""
+    kind = "sorted"
+
+    def __init__(self,values: np.ndarray,positions: np.ndarray,rows: int):
+        self.values = values
+        self.positions = positions
+        self.rows = rows
+
+    @classmethod
+    def build(cls,values: np.ndarray,positions: np.ndarray,rows: int) -> "SortedIndex":
+        order = np.argsort(values,kind="stable")
+        return cls(values[order],positions[order],rows)
+
+    def lookup(self,op: str,value) -> Optional[np.ndarray]:
+        if not _compatible(self.values,value):
+            return None
+        if op == "!=":
+            return ~self.lookup("==",value)
+        lo,hi = _range(self.values,op,value)
+        mask = np.zeros(self.rows,dtype=bool)
+        mask[self.positions[lo:hi]] = True
+        return np.packbits(mask)
+
+    def arrays(self) -> Dict[str,np.ndarray]:
+        return {"values": self.values,"positions": self.positions}
+
+ColumnIndex = Union[BitmapIndex,SortedIndex]
+
+def build_index(series: pd.Series) -> Optional[ColumnIndex]:
+    """Bitmap or sorted index of a numeric or string column, None for other
+    columns (mixed types, booleans)"""
+    rows = len(series)
+    codes,uniques = pd.factorize(series)
+    if isinstance(series.dtype,np.dtype) and series.dtype.kind in "iuf":
+        uniques = np.asarray(uniques)
+    elif all(isinstance(v,str) for v in uniques):
+        uniques = np.asarray(uniques,dtype=str)
+    else:
+        return None
+
+    if len(uniques) <= BITMAP_MAX_VALUES:
+        return BitmapIndex.build(codes,uniques,rows)
+    positions = np.flatnonzero(codes >= 0)
+    return SortedIndex.build(uniques[codes[positions]],positions,rows)
+
+INDEX_KINDS = {cls.kind: cls for cls in (BitmapIndex,SortedIndex)}
+
+class IndexStore:
+    """Secondary indexes persisted beside the columnar sidecars, one .npz
+    file per indexed column of a CSV. Like a sidecar, the indexes of a file
+    belong to one (size, mtime) fingerprint and are dropped when it changes."""
+    def __init__(self,directory: Optional[str] = None):
+        self.directory = os.path.join(directory or default_cache_dir(),"indexes")
+
+    def _path(self,source: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(source).encode()).hexdigest()[:16]
+        return os.path.join(self.directory,digest)
+
+    def _meta(self,source: str,fingerprint: Tuple[int,int]) -> Optional[dict]:
+        folder = self._path(source)
+        try:
+            with open(os.path.join(folder,"meta.json")) as f:
+                meta = json.load(f)
+        except (OSError,ValueError):
+            return None
+
+        if meta.get("source") != os.path.abspath(source) or tuple(meta.get("fingerprint",())) != tuple(fingerprint):
+            shutil.rmtree(folder,ignore_errors=True)
+            return None
+        return meta
+
+    def read(self,source: str,fingerprint: Tuple[int,int],column: str) -> Optional[ColumnIndex]:
+        meta = self._meta(source,fingerprint)
+        if meta is None or column not in meta["indexes"]:
+            return None
+
+        info = meta["indexes"][column]
+        try:
+            with np.load(os.path.join(self._path(source),info["file"])) as data:
+                arrays = {name: data[name] for name in data.files}
+            return INDEX_KINDS[info["kind"]](rows=meta["rows"],**arrays)
+        except (OSError,ValueError,KeyError,TypeError):
+            return None
+
+    def write(self,source: str,fingerprint: Tuple[int,int],column: str,index: ColumnIndex):
+        folder = self._path(source)
+        meta = self._meta(source,fingerprint) or {
+            "source": os.path.abspath(source),
+            "fingerprint": list(fingerprint),
+            "rows": index.rows,
+            "indexes": {},
+        }
+        if meta["rows"] != index.rows:
+            return
+
+        try:
+            os.makedirs(folder,exist_ok=True)
+            info = {"kind": index.kind,"file": f"{len(meta['indexes'])}.{index.kind}.npz"}
+            tmp = os.path.join(folder,info["file"] + ".tmp.npz")
+            np.savez(tmp,**index.arrays())
+            os.replace(tmp,os.path.join(folder,info["file"]))
+            meta["indexes"][column] = info
+
+            tmp = os.path.join(folder,"meta.json.tmp")
+            with open(tmp,"w") as f:
+                json.dump(meta,f)
+            os.replace(tmp,os.path.join(folder,"meta.json"))
+        except OSError:
+            # persisting is an optimization, an unwritable directory is not an error
+            pass
+
+    def clear(self):
+        shutil.rmtree(self.directory,ignore_errors=True)
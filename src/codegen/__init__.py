@@ -1,7 +1,19 @@
 from .backend import Backend
 from .executor import Executor
+from .external_sort import SORT_MEMORY_BYTES
+from .plan import Planner, PlanNode
+from .program_cache import ProgramCache
+from .scheduler import DEFAULT_WORKERS, DagScheduler
+from .session import Session
 
 __all__ = [
     "Backend",
-    "Executor"
+    "DagScheduler",
+    "DEFAULT_WORKERS",
+    "Executor",
+    "Planner",
+    "PlanNode",
+    "ProgramCache",
+    "Session",
+    "SORT_MEMORY_BYTES",
 ]
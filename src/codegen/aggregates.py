@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from src.icg.ir import *
+from .vectorized import expression_keys
+from .kernels import evaluate_columns
+
+AGGREGATE_FUNCS = ("sum","avg","count")
+
+# inputs with at least this many rows are grouped by pandas rather than row by row
+VECTORIZED_GROUP_ROWS = 4096
+
+class AggregateState:
+    """Running sum/count of one aggregate argument. Every sum/avg/count
+    over the same argument expression reads its result from one state."""
+    def __init__(self):
+        self.total = 0
+        self.non_null = 0
+        self.rows = 0
+        # whether any value came from a float column, even a missing one
+        self.floating = False
+
+    def update(self,values,rows: int):
+        if isinstance(values,pd.Series):
+            self.total += values.sum()
+            self.non_null += int(values.count())
+        elif isinstance(values,np.ndarray):
+            if values.dtype.kind == "f":
+                valid = ~np.isnan(values)
+                self.total += values.sum(where=valid)
+                self.non_null += int(np.count_nonzero(valid))
+            else:
+                self.total += values.sum()
+                self.non_null += len(values)
+        elif not pd.isna(values):
+            # constant argument, e.g. count(1)
+            self.total += values * rows
+            self.non_null += rows
+        self.rows += rows
+
+    def merge(self,other: "AggregateState"):
+        """Folds in the partial state of another block of rows. Merging the
+        states of consecutive blocks in order adds the same block totals, in
+        the same order, as updating one state block by block."""
+        self.total += other.total
+        self.non_null += other.non_null
+        self.rows += other.rows
+        self.floating = self.floating or other.floating
+
+    def result(self,func: str):
+        if func == "sum":
+            return self.total
+        if func == "avg":
+            return self.total / self.non_null if self.non_null else float("nan")
+        if func == "count":
+            return self.rows
+        raise Exception(f"Unknown aggregate function '{func}'")
+
+class Aggregator:
+    """Computes all aggregates of an Aggregate block. Argument expressions
+    are evaluated as columns once per distinct expression and reduced into
+    a shared AggregateState."""
+    def __init__(self,assigns: List[Assign],env: Optional[Dict[str,Any]] = None):
+        self.env = env
+        self.exprs = [a for a in assigns if a.op not in AGGREGATE_FUNCS]
+        self.aggs = [a for a in assigns if a.op in AGGREGATE_FUNCS]
+
+        keys = expression_keys(self.exprs)
+        self.arg_keys = [keys.get(a.arg1,a.arg1) if isinstance(a.arg1,str) else a.arg1 for a in self.aggs]
+        self.states: Dict[Any,AggregateState] = {}
+
+        # one argument name per distinct argument expression
+        self.arguments: Dict[Any,Any] = {}
+        for a,key in zip(self.aggs,self.arg_keys):
+            self.arguments.setdefault(key,a.arg1)
+        # only sum/avg need the argument values, count needs the row count
+        self.totals = {key for a,key in zip(self.aggs,self.arg_keys) if a.op in ("sum","avg")}
+
+    def update(self,df: pd.DataFrame):
+        names = [arg for key,arg in self.arguments.items() if isinstance(arg,str) and key in self.totals]
+        values = evaluate_columns(df,self.exprs,names,self.env)
+
+        for key,arg in self.arguments.items():
+            state = self.states.setdefault(key,AggregateState())
+            if key in self.totals:
+                state.update(values[arg] if isinstance(arg,str) else arg,len(df))
+            else:
+                state.rows += len(df)
+
+    def merge(self,states: Dict[Any,AggregateState]):
+        for key,state in states.items():
+            self.states.setdefault(key,AggregateState()).merge(state)
+
+    def result(self) -> Dict[str,Any]:
+        result = {}
+        for a,key in zip(self.aggs,self.arg_keys):
+            state = self.states.get(key) or AggregateState()
+            result[a.target] = state.result(a.op)
+        return result
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame([self.result()])
+
+def _floating(args: Dict[Any,Any]) -> set:
+    return {arg for arg,value in args.items() if isinstance(value,(pd.Series,np.ndarray)) and value.dtype.kind == "f"}
+
+def _group_key(values) -> tuple:
+    # NaN never equals itself, so missing keys are stored as None
+    return tuple(None if pd.isna(v) else v for v in values)
+
+class HashAggregator(Aggregator):
+    """Aggregates of a grouped Aggregate block. states maps each group key,
+    in order of first appearance, to the AggregateStates of its arguments,
+    so groups are computed in one pass over the input and partial results
+    of several inputs merge group by group."""
+    def __init__(self,assigns: List[Assign],group_by: List[str],env: Optional[Dict[str,Any]] = None):
+        super().__init__(assigns,env)
+        self.group_by = list(group_by)
+        self.states: Dict[tuple,Dict[Any,AggregateState]] = {}
+
+    def update(self,df: pd.DataFrame):
+        names = [arg for key,arg in self.arguments.items() if isinstance(arg,str) and key in self.totals]
+        values = evaluate_columns(df,self.exprs,names,self.env)
+        args = {key: values[arg] if isinstance(arg,str) else arg for key,arg in self.arguments.items() if key in self.totals}
+        self.reduce([df[col] for col in self.group_by],args,len(df))
+
+    def reduce(self,keys: List[pd.Series],args: Dict[Any,Any],rows: int):
+        """Folds rows into their groups, given the group key columns and the
+        value of every distinct sum/avg argument (a column or a constant)"""
+        if rows >= VECTORIZED_GROUP_ROWS:
+            self._reduce_grouped(keys,args,rows)
+        else:
+            self._reduce_rows(keys,args,rows)
+
+    def _group(self,key: tuple) -> Dict[Any,AggregateState]:
+        states = self.states.get(key)
+        if states is None:
+            states = {arg: AggregateState() for arg in self.arguments}
+            self.states[key] = states
+        return states
+
+    def _reduce_rows(self,keys: List[pd.Series],args: Dict[Any,Any],rows: int):
+        columns = {arg: (list(value) if isinstance(value,(pd.Series,np.ndarray)) else None)
+                   for arg,value in args.items() if arg in self.totals}
+        constants = {arg: value for arg,value in args.items() if arg in self.totals and columns[arg] is None}
+        floating = _floating(args)
+
+        for i,key in enumerate(zip(*[k.tolist() for k in keys])):
+            states = self._group(_group_key(key))
+            for arg,state in states.items():
+                state.rows += 1
+                if arg not in self.totals:
+                    continue
+                if arg in floating:
+                    state.floating = True
+                v = constants[arg] if columns[arg] is None else columns[arg][i]
+                if not pd.isna(v):
+                    state.total += v
+                    state.non_null += 1
+
+    def _reduce_grouped(self,keys: List[pd.Series],args: Dict[Any,Any],rows: int):
+        frame = pd.DataFrame({f"k{i}": np.asarray(k) for i,k in enumerate(keys)})
+        by = list(frame.columns)
+        value_names = {}
+        for j,arg in enumerate(self.arguments):
+            value = args.get(arg)
+            if arg in self.totals and isinstance(value,(pd.Series,np.ndarray)):
+                value_names[arg] = f"v{j}"
+                frame[f"v{j}"] = np.asarray(value)
+
+        floating = _floating(args)
+        grouped = frame.groupby(by,sort=False,dropna=False)
+        sizes = grouped.size()
+        sums = grouped[list(value_names.values())].sum() if value_names else None
+        counts = grouped[list(value_names.values())].count() if value_names else None
+
+        for pos,key in enumerate(sizes.index):
+            size = int(sizes.iloc[pos])
+            states = self._group(_group_key(key if isinstance(key,tuple) else (key,)))
+            for arg,state in states.items():
+                state.rows += size
+                if arg in floating:
+                    state.floating = True
+                if arg in value_names:
+                    state.total += sums[value_names[arg]].iloc[pos]
+                    state.non_null += int(counts[value_names[arg]].iloc[pos])
+                elif arg in self.totals and not pd.isna(args[arg]):
+                    # constant argument, e.g. sum(1)
+                    state.total += args[arg] * size
+                    state.non_null += size
+
+    def merge(self,states: Dict[tuple,Dict[Any,AggregateState]]):
+        for key,group in states.items():
+            target = self._group(key)
+            for arg,state in group.items():
+                target[arg].merge(state)
+
+    def frame(self) -> pd.DataFrame:
+        # a column is float as a whole if any block of it was, so a group
+        # that only met integer blocks still sums to a float, as in one pass
+        floating = {arg for states in self.states.values() for arg,state in states.items() if state.floating}
+        rows = []
+        for key,states in self.states.items():
+            row = dict(zip(self.group_by,key))
+            for a,arg in zip(self.aggs,self.arg_keys):
+                value = states[arg].result(a.op)
+                row[a.target] = float(value) if a.op == "sum" and arg in floating else value
+            rows.append(row)
+        return pd.DataFrame(rows,columns=self.group_by + [a.target for a in self.aggs])
+
+def make_aggregator(instr: Aggregate,assigns: List[Assign],env: Optional[Dict[str,Any]] = None) -> Aggregator:
+    if instr.group_by:
+        return HashAggregator(assigns,instr.group_by,env)
+    return Aggregator(assigns,env)
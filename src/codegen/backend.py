@@ -2,16 +2,24 @@ from src.lexer import Lexer
 from src.parser import Parser
 from src.semantic import SemanticAnalyzer
 from src.icg import IRGenerator,IRPretty
-from src.optimization import ConstantFolder,DeadCodeEliminator
+from src.optimization import ConstantFolder,DeadCodeEliminator,OperatorFuser,PredicatePushdown,ProjectionPushdown
 
 class Backend:
-    def __init__(self,source_code: str, verbose: bool = False):
+    """Compiles DataFlow source to optimized IR. In incremental mode the
+    analyzer and IR generator may carry state over from earlier blocks, and
+    the passes that assume they see the whole program (dead-table
+    elimination, predicate/projection pushdown and fusion) are skipped,
+    since a later block may still read any table."""
+    def __init__(self,source_code: str, verbose: bool = False,semantic_analyzer: SemanticAnalyzer = None,
+                 ir_generator: IRGenerator = None,incremental: bool = False):
         self.source_code = source_code
         self.verbose = verbose
+        self.incremental = incremental
 
         self.tokens = []
         self.ast = None
-        self.semantic_analyzer = SemanticAnalyzer()
+        self.semantic_analyzer = semantic_analyzer or SemanticAnalyzer()
+        self.ir_generator = ir_generator or IRGenerator()
         self.ir_instructions = []
 
     def run(self):
@@ -32,8 +40,7 @@ class Backend:
         if self.verbose:
             print("\nSemantic analysis passed.")
         
-        ir_gen = IRGenerator()
-        self.ir_instructions = ir_gen.generate(self.ast)
+        self.ir_instructions = self.ir_generator.generate(self.ast)
         if self.verbose:
             print("\nInitial IR: ")
             IRPretty(self.ir_instructions).pretty()
@@ -44,7 +51,7 @@ class Backend:
             print("\nAfter constant folding: ")
             IRPretty(self.ir_instructions).pretty()
 
-        dce = DeadCodeEliminator(self.ir_instructions)
+        dce = DeadCodeEliminator(self.ir_instructions,eliminate_tables=not self.incremental)
         self.ir_instructions = dce.eliminate()
         if self.verbose:
             print("\nAfter dead code elimination, Raw IR objects: ")
@@ -52,4 +59,25 @@ class Backend:
                 print(repr(instr))
             # IRPretty(self.ir_instructions).pretty()
 
+        if self.incremental:
+            return self.ir_instructions
+
+        predicates = PredicatePushdown(self.ir_instructions,self.semantic_analyzer.table_schemas)
+        self.ir_instructions = predicates.push()
+        if self.verbose:
+            print("\nAfter predicate pushdown: ")
+            IRPretty(self.ir_instructions).pretty()
+
+        projection = ProjectionPushdown(self.ir_instructions,self.semantic_analyzer.table_schemas)
+        self.ir_instructions = projection.push()
+        if self.verbose:
+            print("\nAfter projection pushdown: ")
+            IRPretty(self.ir_instructions).pretty()
+
+        fuser = OperatorFuser(self.ir_instructions)
+        self.ir_instructions = fuser.fuse()
+        if self.verbose:
+            print("\nAfter operator fusion: ")
+            IRPretty(self.ir_instructions).pretty()
+
         return self.ir_instructions
\ No newline at end of file
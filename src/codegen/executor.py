@@ -1,244 +1,520 @@
+import collections
+import itertools
+import multiprocessing
+import numpy as np
 import pandas as pd
-from typing import Any, Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from src.icg.ir import *
+from src.catalog import shared_catalog
+from .vectorized import VectorizeError, to_mask
+from .kernels import evaluate_columns
+from .external_sort import SORT_MEMORY_BYTES, SortedRuns
+from .index_scan import index_rows
+from .join import hash_join
+from .ordering import order_frame
+from .aggregates import AGGREGATE_FUNCS, AggregateState, make_aggregator
+from .partitioned import PartitionPlanner, PartitionResult, csv_partitions, merge_partitions, partition_bounds, run_partition, stage_instructions
+from .plan import Planner, PlanNode
+from .row_program import RowProgram
+from .scheduler import DEFAULT_WORKERS, DagScheduler
+from .streaming import PIPELINE_BLOCK_ROWS, PipelineRunner, StreamPlanner, external_reads
+
+# rows parsed at a time when a pushed-down predicate filters a table during loading
+LOAD_CHUNK_ROWS = 65536
 
 class Executor:
-    def __init__(self,instructions: List[IRInstruction],verbose: bool = False):
+    def __init__(self,instructions: List[IRInstruction],verbose: bool = False,vectorize: bool = True,
+                 chunksize: Optional[int] = None,lazy: bool = False,workers: int = DEFAULT_WORKERS,
+                 processes: int = 1,sort_memory: int = SORT_MEMORY_BYTES,temp_dir: Optional[str] = None):
         self.instructions = instructions
         self.verbose = verbose
+        self.vectorize = vectorize
+        self.chunksize = chunksize
+        self.lazy = lazy
+        # more than one worker runs independent table nodes concurrently
+        self.workers = workers
+        # more than one process splits loaded tables into row partitions
+        self.processes = processes
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        # a streamed order buffers this many bytes before spilling a sorted run to temp_dir
+        self.sort_memory = sort_memory
+        self.temp_dir = temp_dir
 
         self.tables: Dict[str, pd.DataFrame] = {}
+        # lazy mode: table name -> plan node that will produce it on first use
+        self.pending: Dict[str,PlanNode] = {}
+        # tables loaded without a predicate -> their CSV file and its fingerprint at load time
+        self.csv_tables: Dict[str,Tuple[str,Tuple[int,int]]] = {}
         self.env: Dict[str,Any] = {}
         self.loop_stack: List[Dict[str,Any]] = []
 
-    def _is_block_assign(self,instr:IRInstruction) -> bool:
-        if not isinstance(instr,Assign):
-            return False
-        
-        idx = self.instructions.index(instr)
-        if idx == 0:
-            return False
-        
-        prev = self.instructions[idx - 1]
-        return isinstance(prev,(Filter,Map,Aggregate))
-    
-    def _is_inside_for_body(self, instr: IRInstruction) -> bool:
-        idx = self.instructions.index(instr)
-        depth = 0
-        for j in range(idx - 1, -1, -1):
-            prev = self.instructions[j]
-            if isinstance(prev, ForEnd):
-                depth += 1
-            elif isinstance(prev, ForBegin):
-                if depth == 0:
-                    return True
-                else:
-                    depth -= 1
-        return False
+        self.handlers = {
+            LoadTable: self.exec_load_table,
+            Filter: self.exec_filter,
+            Map: self.exec_map,
+            Aggregate: self.exec_aggregate,
+            Join: self.exec_join,
+            Order: self.exec_order,
+            CreateIndex: self.exec_create_index,
+            ForBegin: self.exec_for,
+            Pipeline: self.exec_pipeline,
+            Print: self.exec_print,
+            Assign: self.exec_assign,
+        }
+        self.plan = self.lower(instructions)
+
+    def lower(self,instructions: List[IRInstruction]) -> List[PlanNode]:
+        plan = Planner(instructions).lower(self.handlers)
+        if self.processes > 1 and self.chunksize:
+            plan = StreamPlanner(plan,stream_orders=False).rewrite(self.exec_partitioned)
+        elif self.processes > 1:
+            plan = PartitionPlanner(plan,pipeline_aggregates=self.vectorize).rewrite(self.exec_partitioned)
+        elif self.chunksize:
+            plan = StreamPlanner(plan).rewrite(self.exec_stream)
+        return plan
+
+    def execute(self,instructions: List[IRInstruction]):
+        """Runs further instructions against the tables and environment of
+        earlier runs, as an interactive session does block by block"""
+        self.instructions = instructions
+        self.plan = self.lower(instructions)
+        self.run()
 
     def run(self):
-        skip_for_body = False
-
-        for instr in self.instructions:
-            if isinstance(instr, Assign) and self._is_block_assign(instr):
-                continue
-
-            if isinstance(instr, ForBegin):
-                skip_for_body = True
-                if self.verbose:
-                    print(f"[EXEC] {instr}")
-                self.exec_for_begin(instr)
-                continue
-
-            if isinstance(instr, ForEnd):
-                skip_for_body = False
-                continue
-
-            if skip_for_body:
-                continue
-
+        try:
+            # an index only reads its CSV, so it is built before any load can use it
+            plan = []
+            for node in self.plan:
+                if isinstance(node.instr,CreateIndex):
+                    self.run_node(node)
+                else:
+                    plan.append(node)
+
+            if not self.lazy and self.workers > 1:
+                DagScheduler(plan,self.workers).run(self.run_node)
+                return
+
+            for node in plan:
+                writes = node.writes() if self.lazy else []
+                if writes:
+                    for name in writes:
+                        self.pending[name] = node
+                    continue
+                self.run_node(node)
+        finally:
+            if self.process_pool is not None:
+                self.process_pool.shutdown()
+                self.process_pool = None
+
+    def run_node(self,node: PlanNode):
+        if self.verbose:
+            print(f"[EXEC] {node.instr}")
+        node.run()
+
+    def has_table(self,name: str) -> bool:
+        return name in self.tables or name in self.pending
+
+    def get_table(self,name: str) -> Optional[pd.DataFrame]:
+        table = self.lookup(name)
+        if isinstance(table,SortedRuns):
+            return table.frame()
+        return table
+
+    def lookup(self,name: str):
+        """Like get_table, but a sort spilled to disk comes back as its
+        SortedRuns, for consumers that can take it block by block"""
+        if name in self.pending:
+            node = self.pending[name]
+            for produced in node.writes():
+                self.pending.pop(produced,None)
             if self.verbose:
-                print(f"[EXEC] {instr}")
-            self.execute_instruction(instr)
+                print(f"[EXEC] {node.instr} (on demand)")
+            node.run()
+        return self.tables.get(name)
 
+    def run_plan(self,nodes: List[PlanNode]):
+        for node in nodes:
+            node.run()
 
-    '''def run(self):
-        for instr in self.instructions:
-            if isinstance(instr,Assign) and self._is_block_assign(instr):
-                continue
-
-            if self._is_inside_for_body(instr) and not isinstance(instr,ForBegin):
-                continue
-
+    def exec_load_table(self,instr: LoadTable):
+        # taken before parsing, so a change during the load leaves the table stale
+        fingerprint = shared_catalog.entry(instr.source).fingerprint
+        self.tables[instr.target] = self.load_frame(instr)
+        if instr.predicate_temp is None:
+            # every row of the CSV, so filters over the table can use its indexes
+            self.csv_tables[instr.target] = (instr.source,fingerprint)
+
+    def loaded_csv(self,name: str) -> Optional[str]:
+        """The CSV file table `name` holds every row of, if the file has not
+        changed since the load; only then do its indexes describe the table"""
+        if name not in self.csv_tables:
+            return None
+        source,fingerprint = self.csv_tables[name]
+        try:
+            current = shared_catalog.entry(source).fingerprint
+        except OSError:
+            return None
+        if current != fingerprint:
             if self.verbose:
-                print(f"[EXEC] {instr}")
-            self.execute_instruction(instr)'''
-
-    def execute_instruction(self,instr:IRInstruction):
-        if isinstance(instr,LoadTable):
-            self.exec_load_table(instr)
-        elif isinstance(instr,Filter):
-            self.exec_filter(instr)
-        elif isinstance(instr,Map):
-            self.exec_map(instr)
-        elif isinstance(instr,Aggregate):
-            self.exec_aggregate(instr)
-        elif isinstance(instr,ForBegin):
-            self.exec_for_begin(instr)
-        elif isinstance(instr,Print):
-            self.exec_print(instr)
-        elif isinstance(instr,Assign):
-            self.exec_assign(instr)
-        elif isinstance(instr,(ForEnd,Label,Return,FunctionFragment)):
-            return
+                print(f"[EXEC] '{source}' changed since '{name}' was loaded, its indexes are not used")
+            return None
+        return source
+
+    def load_frame(self,instr: LoadTable) -> pd.DataFrame:
+        cached = shared_catalog.get_table(instr.source,instr.columns)
+        if cached is not None and self.verbose:
+            print(f"[EXEC] '{instr.source}' served from the table catalog")
+
+        if cached is not None or instr.predicate_temp is None:
+            df = cached if cached is not None else shared_catalog.load(instr.source,instr.columns)
+            if instr.predicate_temp is not None:
+                df = self.index_filter(instr.source,instr.predicate,instr.predicate_temp)(df)
+            return df
+
+        # filter each parsed chunk so rejected rows are never accumulated; the
+        # columnar cache is written from the same chunks, so later runs filter
+        # the memory-mapped columns instead
+        load_filter = self.index_filter(instr.source,instr.predicate,instr.predicate_temp)
+        parts = [load_filter(chunk)
+                 for chunk in shared_catalog.scan(instr.source,instr.columns,self.chunksize or LOAD_CHUNK_ROWS)]
+        if not parts:
+            parts = [pd.read_csv(instr.source,usecols=instr.columns,nrows=0)]
+        return pd.concat(parts)
+
+    def index_filter(self,source: str,assigns: List[Assign],predicate_temp) -> Callable[[pd.DataFrame],pd.DataFrame]:
+        """A predicate over the CSV source as a filter of frames whose index
+        labels are their row numbers in the file. Rows the source's indexes
+        select are picked from their bitmap, and the predicate only runs
+        over them when the indexes answer it in part."""
+        def scan(frame: pd.DataFrame) -> pd.DataFrame:
+            return self.filter_frame(frame,assigns,predicate_temp)
+
+        columns = set(shared_catalog.schema(source))
+        hit = index_rows(assigns,predicate_temp,columns,lambda column: shared_catalog.get_index(source,column),self.env)
+        if hit is None:
+            return scan
+
+        bits,exact = hit
+        selected = np.unpackbits(bits).view(bool)
+        if self.verbose:
+            print(f"[EXEC] '{source}' filtered through its indexes ({'exact' if exact else 'candidate rows'})")
+
+        def lookup(frame: pd.DataFrame) -> pd.DataFrame:
+            rows = frame.index
+            if isinstance(rows,pd.RangeIndex) and rows.step == 1:
+                frame = frame[selected[rows.start:rows.stop]]
+            else:
+                frame = frame[selected[rows.to_numpy()]]
+            return frame if exact else scan(frame)
+        return lookup
+
+    def load_chunks(self,instr: LoadTable) -> Iterator[pd.DataFrame]:
+        """The unfiltered CSV of a load in frames of `chunksize` rows, sliced
+        from the catalog's copy if it has one and parsed otherwise; a file
+        without rows gives one empty frame"""
+        cached = shared_catalog.get_table(instr.source,instr.columns)
+        if cached is not None:
+            reader = (cached.iloc[start:start + self.chunksize] for start in range(0,len(cached),self.chunksize))
         else:
-            raise Exception(f"Unknown IR instruction {instr}")
-
-    def _collect_assigns(self,start_instr):
-        idx = self.instructions.index(start_instr)
-        assigns = []
-        j = idx + 1
-        while j < len(self.instructions):
-            instr = self.instructions[j]
-            if not isinstance(instr,Assign):
-                break
-            assigns.append(instr)
-            j += 1
+            reader = shared_catalog.scan(instr.source,instr.columns,self.chunksize)
+
+        empty = True
+        for chunk in reader:
+            empty = False
+            yield chunk
+        if empty:
+            yield cached.iloc[:0] if cached is not None else pd.read_csv(instr.source,usecols=instr.columns,nrows=0)
+
+    def exec_stream(self,instr: LoadTable,stages: List[PlanNode],keep: List[str]):
+        runner = PipelineRunner(self,instr.target,stages,keep)
+        load_filter = None
+        if instr.predicate_temp is not None:
+            load_filter = self.index_filter(instr.source,instr.predicate,instr.predicate_temp)
+        chunks = 0
+        for chunk in self.load_chunks(instr):
+            if load_filter is not None:
+                chunk = load_filter(chunk)
+            runner.feed(chunk)
+            chunks += 1
+        if self.verbose:
+            print(f"[EXEC] streamed '{instr.source}' in {chunks} chunk(s) of {self.chunksize} rows")
+        self.tables.update(runner.finish())
+
+    def exec_partitioned(self,instr: LoadTable,stages: List[PlanNode],keep: List[str]):
+        # split into the blocks a serial run feeds: raw CSV chunks filtered one
+        # by one when streaming, otherwise blocks of the loaded (filtered) table,
+        # which the workers parse from their own byte range of an unfiltered file
+        tables = {name: self.get_table(name) for name in external_reads(instr.target,stages)}
+        args = [instr.target,stage_instructions(stages),keep,dict(self.env),tables,self.vectorize]
+        if self.chunksize:
+            # every chunk is a partition, handed out as the file is read
+            block_rows = self.chunksize
+            args += [block_rows,instr.predicate,instr.predicate_temp]
+            partitions = self.load_chunks(instr)
+        elif instr.predicate_temp is None and shared_catalog.get_table(instr.source,instr.columns) is None:
+            block_rows = PIPELINE_BLOCK_ROWS
+            args += [block_rows]
+            partitions = iter(csv_partitions(instr.source,instr.columns,block_rows,self.processes))
+        else:
+            # a filtered load is cut after filtering, where the serial blocks start
+            df = self.load_frame(instr)
+            block_rows = PIPELINE_BLOCK_ROWS
+            args += [block_rows]
+            partitions = (df.iloc[start:stop] for start,stop in partition_bounds(len(df),block_rows,self.processes))
+        results = self.run_partitions(partitions,args)
+
+        if self.verbose:
+            print(f"[EXEC] ran '{instr.source}' in {len(results)} partition(s) of {block_rows}-row blocks")
+        self.tables.update(merge_partitions(instr.target,stages,keep,results,self.env))
+
+    def run_partitions(self,partitions: Iterator[Any],args: List[Any]) -> List[PartitionResult]:
+        """run_partition over every partition, in order. A lone partition runs
+        inline; otherwise they go to the process pool, at most two per process
+        at a time, so partitions not yet needed are not read ahead."""
+        first = next(partitions)
+        second = next(partitions,None)
+        if second is None:
+            return [run_partition(first,*args)]
+
+        if self.process_pool is None:
+            # spawn, since forking a process that runs scheduler threads is unsafe
+            self.process_pool = ProcessPoolExecutor(self.processes,mp_context=multiprocessing.get_context("spawn"))
+        results = []
+        futures = collections.deque()
+        for partition in itertools.chain([first,second],partitions):
+            futures.append(self.process_pool.submit(run_partition,partition,*args))
+            if len(futures) >= 2 * self.processes:
+                results.append(futures.popleft().result())
+        results.extend(future.result() for future in futures)
+        return results
+
+    def exec_pipeline(self,instr: Pipeline,stages: List[PlanNode]):
+        input_df = self.get_table(instr.input)
+        if input_df is None:
+            raise Exception(f"Pipeline: unknown input table '{instr.input}'")
 
-        return assigns
+        if not self.vectorize:
+            # unfused: run every stage over whole tables
+            self.run_plan(stages)
+            return
 
-    def exec_load_table(self,instr: LoadTable):
-        df = pd.read_csv(instr.source)
-        self.tables[instr.target] = df
+        keep = [] if isinstance(stages[-1].instr,Aggregate) else [instr.output]
+        runner = PipelineRunner(self,instr.input,stages,keep)
+        for start in range(0,max(len(input_df),1),PIPELINE_BLOCK_ROWS):
+            runner.feed(input_df.iloc[start:start + PIPELINE_BLOCK_ROWS])
+        self.tables.update(runner.finish())
 
-    def exec_filter(self,instr: Filter):
-        input_df = self.tables.get(instr.input)
+    def exec_filter(self,instr: Filter,assigns: List[Assign]):
+        input_df = self.get_table(instr.input)
         if input_df is None:
             raise Exception(f"Filter: unknown input table '{instr.input}'")
-        
-        assigns = self._collect_assigns(instr)
-        predicate_temp = instr.predicate_temp
-
-        output_rows = []
-
-        for _,row in input_df.iterrows():
-            saved_env = dict(self.env)
-
-            self.env["row"] = row
-            for col in input_df.columns:
-                self.env[col] = self._resolve_value(row[col])
+        source = self.loaded_csv(instr.input)
+        if source is not None:
+            self.tables[instr.output] = self.index_filter(source,assigns,instr.predicate_temp)(input_df)
+            return
+        self.tables[instr.output] = self.filter_frame(input_df,assigns,instr.predicate_temp)
 
-            for a in assigns:
-                self.exec_assign(a)
+    def filter_frame(self,input_df: pd.DataFrame,assigns: List[Assign],predicate_temp) -> pd.DataFrame:
+        if self.vectorize:
+            try:
+                values = evaluate_columns(input_df,assigns,[predicate_temp],self.env)
+                return input_df[to_mask(values[predicate_temp],len(input_df))]
+            except VectorizeError as e:
+                if self.verbose:
+                    print(f"[EXEC] row-at-a-time filter fallback: {e}")
 
-            if bool(self.env.get(predicate_temp,False)):
-                output_rows.append(row)
+        program = RowProgram(input_df.columns,self.env)
+        steps = [program.compile(a) for a in assigns]
+        predicate = program.operand(predicate_temp)
+        regs = program.registers()
 
-            self.env = saved_env
+        mask = np.empty(len(input_df),dtype=bool)
+        for i,row in enumerate(input_df.itertuples(index=False,name=None)):
+            for step in steps:
+                step(row,regs)
+            mask[i] = bool(predicate(row,regs))
 
-        self.tables[instr.output] = (
-            pd.DataFrame(output_rows) if output_rows else input_df.iloc[0:0].copy()
-        )
+        return input_df[mask]
 
-    def exec_map(self,instr: Map):
-        input_df = self.tables.get(instr.input)
+    def exec_map(self,instr: Map,assigns: List[Assign]):
+        input_df = self.get_table(instr.input)
         if input_df is None:
             raise Exception(f"Map: unknown input table '{instr.input}'")
-        
-        assigns = self._collect_assigns(instr)
-
-        new_rows = []
+        self.tables[instr.output] = self.map_frame(input_df,instr,assigns)
 
-        for _,row in input_df.iterrows():
-            saved_env = dict(self.env)
-
-            self.env["row"] = row
-            for col in input_df.columns:
-                self.env[col] = self._resolve_value(row[col])
-
-            new_row = dict(row)
-
-            for a in assigns:
-                self.exec_assign(a)
-
-            for name,value in self.env.items():
-                if not self._is_temp(name) and name not in input_df.columns:
-                    new_row[name] = value
-
-            new_rows.append(new_row)
-            self.env = saved_env
-
-        self.tables[instr.output] = pd.DataFrame(new_rows)
-
-    def exec_aggregate(self,instr: Aggregate):
-        input_df = self.tables.get(instr.input)
+    def map_frame(self,input_df: pd.DataFrame,instr: Map,assigns: List[Assign]) -> pd.DataFrame:
+        if self.vectorize:
+            try:
+                values = evaluate_columns(input_df,assigns,instr.columns,self.env)
+                # shallow copy: existing columns are shared, only new ones are added
+                output_df = input_df.copy(deep=False)
+                for name in instr.columns:
+                    output_df[name] = values[name]
+                if not instr.keep_labels:
+                    output_df.index = pd.RangeIndex(len(output_df))
+                return output_df
+            except VectorizeError as e:
+                if self.verbose:
+                    print(f"[EXEC] row-at-a-time map fallback: {e}")
+
+        program = RowProgram(input_df.columns,self.env)
+        steps = [program.compile(a) for a in assigns]
+        outputs = [program.operand(name) for name in instr.columns]
+        regs = program.registers()
+
+        new_columns = [[] for _ in instr.columns]
+        for row in input_df.itertuples(index=False,name=None):
+            for step in steps:
+                step(row,regs)
+            for values,get in zip(new_columns,outputs):
+                values.append(get(row,regs))
+
+        output_df = input_df.copy(deep=False)
+        for name,values in zip(instr.columns,new_columns):
+            output_df[name] = values
+        if not instr.keep_labels:
+            output_df.index = pd.RangeIndex(len(output_df))
+        return output_df
+
+    def exec_aggregate(self,instr: Aggregate,assigns: List[Assign]):
+        input_df = self.get_table(instr.input)
         if input_df is None:
             raise Exception(f"Aggregate: unknown input table '{instr.input}'")
-        assigns = self._collect_assigns(instr)
+
+        if self.vectorize:
+            try:
+                # block by block, as a fused pipeline reduces, so the totals
+                # do not depend on whether the aggregate was fused or partitioned
+                aggregator = make_aggregator(instr,assigns,self.env)
+                for start in range(0,max(len(input_df),1),PIPELINE_BLOCK_ROWS):
+                    aggregator.update(input_df.iloc[start:start + PIPELINE_BLOCK_ROWS])
+                self.tables[instr.output] = aggregator.frame()
+                return
+            except VectorizeError as e:
+                if self.verbose:
+                    print(f"[EXEC] row-at-a-time aggregate fallback: {e}")
         
-        result = {}
+        # row-at-a-time: evaluate the argument expressions per row, then reduce
+        exprs = [a for a in assigns if a.op not in AGGREGATE_FUNCS]
+        aggs = [a for a in assigns if a.op in AGGREGATE_FUNCS]
+
+        program = RowProgram(input_df.columns,self.env)
+        steps = [program.compile(a) for a in exprs]
+        arguments = [program.operand(a.arg1) for a in aggs]
+        regs = program.registers()
+
+        columns = [[] for _ in aggs]
+        for row in input_df.itertuples(index=False,name=None):
+            for step in steps:
+                step(row,regs)
+            for values,get in zip(columns,arguments):
+                values.append(get(row,regs))
+
+        if instr.group_by:
+            aggregator = make_aggregator(instr,assigns,self.env)
+            args = {key: pd.Series(values) for key,values in zip(aggregator.arg_keys,columns)}
+            aggregator.reduce([input_df[col] for col in instr.group_by],args,len(input_df))
+            self.tables[instr.output] = aggregator.frame()
+            return
 
-        for a in assigns:
-            func = a.op
-            arg = a.arg1
-
-            if isinstance(arg,str) and arg in input_df.columns:
-                series = input_df[arg]
-                if func == "sum":
-                    result[a.target] = series.sum()
-                elif func == "avg":
-                    result[a.target] = series.mean()
-                elif func == "count":
-                    result[a.target] = len(series)
+        result = {}
+        for a,values in zip(aggs,columns):
+            state = AggregateState()
+            if a.op == "count":
+                state.rows = len(values)
             else:
-                val = self._resolve_value(arg)
-                if func == "count":
-                    result[a.target] = len(input_df)
-                elif func in ("sum","avg"):
-                    result[a.target] = float(val)
-        
+                state.update(pd.Series(values),len(values))
+            result[a.target] = state.result(a.op)
+
         self.tables[instr.output] = pd.DataFrame([result])
 
-    def exec_for_begin(self,instr:ForBegin):
-        table = self.tables.get(instr.table)
+    def exec_join(self,instr: Join):
+        left = self.get_table(instr.left)
+        if left is None:
+            raise Exception(f"Join: unknown input table '{instr.left}'")
+        right = self.get_table(instr.right)
+        if right is None:
+            raise Exception(f"Join: unknown input table '{instr.right}'")
+        self.tables[instr.output] = hash_join(left,right,instr.key,instr.right)
+
+    def exec_order(self,instr: Order):
+        input_df = self.get_table(instr.input)
+        if input_df is None:
+            raise Exception(f"Order: unknown input table '{instr.input}'")
+        self.tables[instr.output] = order_frame(input_df,instr.column,instr.descending,instr.limit)
+
+    def exec_create_index(self,instr: CreateIndex):
+        if shared_catalog.create_index(instr.source,instr.column) is None:
+            raise Exception(f"Index: column '{instr.column}' of '{instr.source}' holds neither numbers nor strings")
+
+    def exec_for(self,instr: ForBegin,body: List[PlanNode]):
+        table = self.lookup(instr.table)
         if table is None:
             raise Exception(f"For: unknown input table '{instr.table}'")
+        frames = table.frames() if isinstance(table,SortedRuns) else [table]
 
-        idx = self.instructions.index(instr)
-        body = []
-        depth = 0
-
-        for j in range(idx + 1,len(self.instructions)):
-            i2 = self.instructions[j]
-            if isinstance(i2, ForBegin):
-                depth += 1
-            elif isinstance(i2,ForEnd):
-                if depth == 0:
-                    break
-                else:
-                    depth -= 1
-            body.append(i2)
+        if all(isinstance(node.instr,(Assign,Print)) for node in body):
+            self._exec_for_compiled(instr,table.columns,frames,body)
+            return
 
-        for _,row in table.iterrows():
-            saved_env = dict(self.env)
-            self.env[instr.iter_var] = row
-            self.env["row"] = row
+        # body with nested blocks: bind the row in the environment, which is
+        # saved once for the whole loop rather than copied per row
+        saved_env = dict(self.env)
+        for frame in frames:
+            for _,row in frame.iterrows():
+                self.env[instr.iter_var] = row
+                self.env["row"] = row
+                self.run_plan(body)
+        self.env = saved_env
+
+    def _exec_for_compiled(self,instr: ForBegin,columns: pd.Index,frames,body: List[PlanNode]):
+        program = RowProgram(columns,self.env,(instr.iter_var,"row"),indexed=True)
+        steps = []
+        for node in body:
+            if isinstance(node.instr,Assign):
+                steps.append(program.compile(node.instr))
+            else:
+                steps.append(self._print_step(program,node.instr))
+        regs = program.registers()
 
-            for bi in body:
-                if not isinstance(bi,ForEnd):
-                    self.execute_instruction(bi)
-            
-            self.env = saved_env
+        for frame in frames:
+            for row in frame.itertuples(index=True,name=None):
+                for step in steps:
+                    step(row,regs)
+
+    def _print_step(self,program: RowProgram,instr: Print):
+        val = instr.value
+        if isinstance(val,str) and self.has_table(val):
+            table = self.lookup(val)
+            return lambda row,regs: self.print_table(table)
+
+        get = program.operand(val)
+        return lambda row,regs: print(get(row,regs))
 
     def exec_print(self,instr:Print):
         val = instr.value
 
-        if isinstance(val, str) and val in self.tables:
-            print(self.tables[val])
+        if isinstance(val, str) and self.has_table(val):
+            self.print_table(self.lookup(val))
             return
 
         print(self._resolve_value(val))
 
+    def print_table(self,table):
+        if not isinstance(table,SortedRuns):
+            print(table)
+            return
+        # printed as pandas prints a frame that long, which only formats its
+        # first and last rows, so only those are kept while the runs merge
+        max_rows = pd.get_option("display.max_rows")
+        if not max_rows or len(table) <= 2 * max_rows:
+            print(table.frame())
+            return
+        head,tail = table.ends(max_rows)
+        text = repr(pd.concat([head,tail]))
+        print(text[:text.rfind("\n") + 1] + f"[{len(table)} rows x {len(table.columns)} columns]")
+
     def exec_assign(self,instr:Assign):
         op = instr.op
         a1 = instr.arg1
@@ -279,7 +555,7 @@ class Executor:
                 if "." in v:
                     return float(v)
                 return int(v)
-            except:
+            except ValueError:
                 return v
 
         return v
@@ -298,6 +574,8 @@ class Executor:
         if op == "<": return l < r
         if op == ">=": return l >= r
         if op == "<=": return l <= r
+        if op == "and": return bool(l) and bool(r)
+        if op == "or": return bool(l) or bool(r)
         raise Exception(f"Unknown operator '{op}'")
     
     def _call_function(self,fn,args):
@@ -305,6 +583,3 @@ class Executor:
         if fn == "avg": return sum(args) / len(args) if args else 0
         if fn == "count": return len(args)
         raise Exception(f"Unknown function '{fn}'")
-    
-    def _is_temp(self,name):
-        return isinstance(name,str) and name.startswith("t")
\ No newline at end of file
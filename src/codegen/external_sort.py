@@ -0,0 +1,152 @@
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Iterator, List, Optional, Tuple
+from .ordering import order_frame, sort_positions
+
+# bytes of input a streamed sort buffers before it writes a sorted run to disk
+SORT_MEMORY_BYTES = 256 * 1024 * 1024
+
+# rows per block in a run file; the merge holds one block of every run in memory
+SORT_BLOCK_ROWS = 16384
+
+def _read_blocks(path: str) -> Iterator[pd.DataFrame]:
+    with open(path,"rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+def _prefix_rows(values: pd.Series,bound,descending: bool,inclusive: bool) -> int:
+    """Rows at the start of a sorted run that sort before `bound`, or are
+    equal to it if inclusive. Missing values sit at the end of a run."""
+    valid = len(values)
+    if pd.isna(values.iloc[-1]):
+        valid -= int(values.isna().sum())
+    if pd.isna(bound):
+        return len(values) if inclusive else valid
+
+    keys = values.iloc[:valid].to_numpy()
+    if descending:
+        return valid - int(np.searchsorted(keys[::-1],bound,side="left" if inclusive else "right"))
+    return int(np.searchsorted(keys,bound,side="right" if inclusive else "left"))
+
+class SortedRuns:
+    """A sorted table spilled to disk as runs, each a stably sorted slice of
+    the input in input order. frames() k-way merges them block by block, so
+    the table is never held in memory as a whole."""
+    def __init__(self,column: str,descending: bool = False,temp_dir: Optional[str] = None):
+        self.column = column
+        self.descending = descending
+        # removed with its runs once the table is no longer referenced
+        self.directory = tempfile.TemporaryDirectory(prefix="dataflow-sort-",dir=temp_dir)
+        self.paths: List[str] = []
+        self.columns: Optional[pd.Index] = None
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def write(self,run: pd.DataFrame):
+        path = os.path.join(self.directory.name,f"run{len(self.paths)}.pkl")
+        with open(path,"wb") as f:
+            for start in range(0,max(len(run),1),SORT_BLOCK_ROWS):
+                pickle.dump(run.iloc[start:start + SORT_BLOCK_ROWS],f,protocol=pickle.HIGHEST_PROTOCOL)
+        self.paths.append(path)
+        if self.columns is None:
+            self.columns = run.columns
+        self.rows += len(run)
+
+    def frames(self) -> Iterator[pd.DataFrame]:
+        readers = [_read_blocks(path) for path in self.paths]
+        heads = {}
+
+        def refill(r: int):
+            for block in readers[r]:
+                if len(block):
+                    heads[r] = block
+                    return
+            heads.pop(r,None)
+
+        for r in range(len(readers)):
+            refill(r)
+
+        while heads:
+            # the run whose block ends first bounds what can be emitted: rows of
+            # later blocks all sort after its last row. Ties go to the earlier
+            # run, which holds the earlier input rows.
+            runs = sorted(heads)
+            lasts = pd.Series([heads[r][self.column].iloc[-1] for r in runs])
+            first = sort_positions(lasts,self.descending)[0]
+            limit,bound = runs[first],lasts.iloc[first]
+
+            parts = []
+            for r in runs:
+                count = _prefix_rows(heads[r][self.column],bound,self.descending,r <= limit)
+                if count:
+                    parts.append(heads[r].iloc[:count])
+                    heads[r] = heads[r].iloc[count:]
+                if not len(heads[r]):
+                    refill(r)
+
+            # the parts are in run order, so a stable sort keeps equal keys in input order
+            merged = pd.concat(parts)
+            yield merged.iloc[sort_positions(merged[self.column],self.descending)]
+
+    def frame(self) -> pd.DataFrame:
+        frames = list(self.frames())
+        return pd.concat(frames) if frames else pd.DataFrame(columns=self.columns)
+
+    def ends(self,rows: int) -> Tuple[pd.DataFrame,pd.DataFrame]:
+        """The first and the last `rows` rows, merged without keeping the rest"""
+        head = tail = pd.DataFrame(columns=self.columns)
+        for frame in self.frames():
+            if len(head) < rows:
+                head = pd.concat([head,frame.iloc[:rows - len(head)]]) if len(head) else frame.iloc[:rows]
+            tail = pd.concat([tail,frame]).iloc[-rows:] if len(tail) else frame.iloc[-rows:]
+        return head,tail
+
+class ExternalSorter:
+    """Sorts a table that arrives frame by frame. Frames are buffered until
+    they exceed the memory budget, then sorted and written out as a run;
+    the result is an in-memory frame if nothing was spilled and SortedRuns
+    otherwise. With a limit only the best `limit` rows are ever kept."""
+    def __init__(self,column: str,descending: bool = False,limit: Optional[int] = None,
+                 memory_bytes: int = SORT_MEMORY_BYTES,temp_dir: Optional[str] = None):
+        self.column = column
+        self.descending = descending
+        self.limit = limit
+        self.memory_bytes = memory_bytes
+        self.temp_dir = temp_dir
+
+        self.buffer: List[pd.DataFrame] = []
+        self.buffered = 0
+        self.runs: Optional[SortedRuns] = None
+
+    def add(self,frame: pd.DataFrame):
+        if self.limit is not None:
+            # earlier rows come first, so ties still go to the earliest input rows
+            self.buffer = [order_frame(pd.concat(self.buffer + [frame]),self.column,self.descending,self.limit)]
+            return
+
+        self.buffer.append(frame)
+        self.buffered += int(frame.memory_usage(deep=True).sum())
+        if self.buffered > self.memory_bytes:
+            self._spill()
+
+    def _spill(self):
+        if self.runs is None:
+            self.runs = SortedRuns(self.column,self.descending,self.temp_dir)
+        self.runs.write(order_frame(pd.concat(self.buffer),self.column,self.descending))
+        self.buffer = []
+        self.buffered = 0
+
+    def result(self):
+        if self.runs is None:
+            return order_frame(pd.concat(self.buffer),self.column,self.descending,self.limit)
+        if self.buffer:
+            self._spill()
+        return self.runs
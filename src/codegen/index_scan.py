@@ -0,0 +1,62 @@
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from src.icg.ir import *
+from .vectorized import literal_value
+
+FLIPPED = {"==": "==","!=": "!=","<": ">","<=": ">=",">": "<",">=": "<="}
+
+# rows picked by the indexes as a packed bitmap, and whether the bitmap is
+# the predicate's exact answer rather than a superset still to be filtered
+IndexHit = Tuple[np.ndarray,bool]
+
+def index_rows(assigns: List[Assign],predicate_temp,columns: Set[str],index_for: Callable[[str],Any],
+               env: Optional[Dict[str,Any]] = None) -> Optional[IndexHit]:
+    """Answers a load predicate from the secondary indexes of its CSV.
+    Comparisons of an indexed column with a constant become bitmaps, `and`
+    intersects them and `or` unites them. A conjunct no index answers only
+    makes the result inexact, so the rows it selects are filtered again;
+    None when the indexes select nothing useful."""
+    env = env if env is not None else {}
+    temps = {a.target for a in assigns}
+    hits: Dict[str,IndexHit] = {}
+
+    def constant(v):
+        if isinstance(v,str):
+            if v in temps or v in columns:
+                return None
+            v = env[v] if v in env else literal_value(v)
+        return v if isinstance(v,(int,float,str)) else None
+
+    def compare(a: Assign) -> Optional[IndexHit]:
+        op,column,value = a.op,a.arg1,constant(a.arg2)
+        if not (isinstance(column,str) and column in columns):
+            op,column,value = FLIPPED[a.op],a.arg2,constant(a.arg1)
+        if value is None or not (isinstance(column,str) and column in columns):
+            return None
+        index = index_for(column)
+        bits = index.lookup(op,value) if index is not None else None
+        return (bits,True) if bits is not None else None
+
+    def hit(v) -> Optional[IndexHit]:
+        return hits.get(v) if isinstance(v,str) else None
+
+    for a in assigns:
+        if a.op in FLIPPED and a.arg2 is not None:
+            result = compare(a)
+        elif a.op == "and":
+            left,right = hit(a.arg1),hit(a.arg2)
+            if left is not None and right is not None:
+                result = (left[0] & right[0],left[1] and right[1])
+            elif left is not None or right is not None:
+                result = (left or right)[0],False
+            else:
+                result = None
+        elif a.op == "or":
+            left,right = hit(a.arg1),hit(a.arg2)
+            result = (left[0] | right[0],left[1] and right[1]) if left is not None and right is not None else None
+        else:
+            result = None
+        if result is not None:
+            hits[a.target] = result
+
+    return hit(predicate_temp)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# when both inputs have more rows than this, a sort-merge join replaces the hash join
+HASH_JOIN_MAX_ROWS = 1_000_000
+
+def _expand(positions: np.ndarray,starts: np.ndarray,counts: np.ndarray,order: np.ndarray) -> Tuple[np.ndarray,np.ndarray]:
+    # positions[i] matches counts[i] rows found at order[starts[i]:starts[i] + counts[i]]
+    total = int(counts.sum())
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts,counts)
+    return np.repeat(positions,counts),order[np.repeat(starts,counts) + within]
+
+class HashTable:
+    """Hash table over the join keys of the build side. Rows sharing a key
+    sit next to each other in `order`, in their original order. Missing
+    keys are left out, so they never match."""
+    def __init__(self,keys):
+        codes,uniques = pd.factorize(keys)
+        self.index = pd.Index(uniques)
+        self.counts = np.bincount(codes[codes >= 0],minlength=len(uniques))
+        self.starts = np.cumsum(self.counts) - self.counts
+        self.order = np.argsort(codes,kind="stable")[int(np.count_nonzero(codes < 0)):]
+
+    def probe(self,keys) -> Tuple[np.ndarray,np.ndarray]:
+        """Positions of the matching (probe row, build row) pairs, in probe
+        row order and build row order within one probe row"""
+        codes = self.index.get_indexer(keys)
+        hits = np.flatnonzero(codes >= 0)
+        codes = codes[hits]
+        return _expand(hits,self.starts[codes],self.counts[codes],self.order)
+
+def sort_merge_pairs(left_keys,right_keys) -> Tuple[np.ndarray,np.ndarray]:
+    """Matches left rows against the sorted right keys by binary search,
+    with no hash table on either side; pairs come out in left row order"""
+    left_keys = np.asarray(left_keys)
+    right_keys = np.asarray(right_keys)
+
+    right_pos = np.flatnonzero(~pd.isna(right_keys))
+    right_order = right_pos[np.argsort(right_keys[right_pos],kind="stable")]
+    right_sorted = right_keys[right_order]
+
+    left_pos = np.flatnonzero(~pd.isna(left_keys))
+    lo = np.searchsorted(right_sorted,left_keys[left_pos],side="left")
+    hi = np.searchsorted(right_sorted,left_keys[left_pos],side="right")
+    return _expand(left_pos,lo,hi - lo,right_order)
+
+def join_pairs(left: pd.DataFrame,right: pd.DataFrame,key: str) -> Tuple[np.ndarray,np.ndarray]:
+    """Row positions of every matching (left, right) pair, in left row order
+    and right row order within one left row, whichever strategy runs"""
+    if len(left) > HASH_JOIN_MAX_ROWS and len(right) > HASH_JOIN_MAX_ROWS:
+        return sort_merge_pairs(left[key],right[key])
+
+    if len(right) <= len(left):
+        return HashTable(right[key]).probe(left[key])
+
+    # build on the smaller left side, then restore left row order
+    right_idx,left_idx = HashTable(left[key]).probe(right[key])
+    order = np.lexsort((right_idx,left_idx))
+    return left_idx[order],right_idx[order]
+
+def joined_frame(left: pd.DataFrame,right: pd.DataFrame,key: str,right_name: str,
+                 left_idx: np.ndarray,right_idx: np.ndarray) -> pd.DataFrame:
+    # the key is kept once; right columns the left already has get a suffix
+    right = right.drop(columns=[key])
+    right = right.rename(columns={col: f"{col}_{right_name}" for col in right.columns if col in left.columns})
+    return pd.concat([left.take(left_idx).reset_index(drop=True),right.take(right_idx).reset_index(drop=True)],axis=1)
+
+def hash_join(left: pd.DataFrame,right: pd.DataFrame,key: str,right_name: str) -> pd.DataFrame:
+    left_idx,right_idx = join_pairs(left,right,key)
+    return joined_frame(left,right,key,right_name,left_idx,right_idx)
+
+class JoinProbe:
+    """Streaming side of a join: the right table is hashed once and every
+    chunk of the left table probes it"""
+    def __init__(self,right: pd.DataFrame,key: str,right_name: str):
+        self.right = right
+        self.key = key
+        self.right_name = right_name
+        self.table = HashTable(right[key])
+
+    def probe(self,chunk: pd.DataFrame) -> pd.DataFrame:
+        left_idx,right_idx = self.table.probe(chunk[self.key])
+        return joined_frame(chunk,self.right,self.key,self.right_name,left_idx,right_idx)
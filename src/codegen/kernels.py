@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from src.icg.ir import *
+from .vectorized import BINARY_OPS, ColumnEvaluator, VectorizeError, expression_keys, literal_value
+
+# target working set of one row block (inputs + scratch registers + outputs)
+L2_BYTES = 1 << 20
+MIN_BLOCK_ROWS = 1024
+
+ARITH_OPS = ("+","-","*","/")
+
+def _scalar_dtype(v) -> np.dtype:
+    if isinstance(v,(bool,np.bool_)):
+        return np.dtype(bool)
+    if isinstance(v,(int,np.integer)):
+        return np.dtype(np.int64)
+    if isinstance(v,(float,np.floating)):
+        return np.dtype(np.float64)
+    raise VectorizeError(f"constant {v!r} is not numeric")
+
+def _result_dtype(op,left: np.dtype,right: Optional[np.dtype]) -> np.dtype:
+    if op in ARITH_OPS:
+        if op == "/":
+            return np.dtype(np.float64)
+        if left.kind in "biu" and right.kind in "biu":
+            return np.dtype(np.int64)
+        return np.result_type(left,right,np.float64)
+    return np.dtype(bool)
+
+class ExpressionKernel:
+    """Compiles the Assign DAG of a Map/Filter block into a register program
+    and runs it over L2-sized row blocks. Temps live in block-sized scratch
+    registers that are recycled once their last reader has run, so peak
+    memory is the output columns plus a few blocks, not one column per temp.
+
+    Only numeric/bool columns and constants are supported; anything else
+    raises VectorizeError so the caller can use ColumnEvaluator instead."""
+    def __init__(self,assigns: List[Assign],outputs: List[str],dtypes: Dict[str,np.dtype]):
+        self.outputs = list(dict.fromkeys(outputs))
+        self.dtypes = dtypes
+
+        self.inputs: List[str] = []
+        self.output_dtypes: Dict[str,np.dtype] = {}
+        self.register_dtypes: List[np.dtype] = []
+        self.program: List[tuple] = []
+        self.locations: Dict[str,tuple] = {}
+
+        self._compile(assigns)
+
+    def _compile(self,assigns):
+        keys = expression_keys(assigns)
+        first_with_key: Dict[Any,str] = {}
+        aliases: Dict[str,str] = {}
+
+        live = []
+        for a in assigns:
+            key = keys[a.target]
+            if key in first_with_key and a.target not in self.outputs:
+                aliases[a.target] = first_with_key[key]
+                continue
+            first_with_key.setdefault(key,a.target)
+            live.append(a)
+
+        def canonical(v):
+            while isinstance(v,str) and v in aliases:
+                v = aliases[v]
+            return v
+
+        last_use: Dict[str,int] = {}
+        for i,a in enumerate(live):
+            for v in (a.arg1,a.arg2):
+                v = canonical(v)
+                if isinstance(v,str):
+                    last_use[v] = i
+
+        free: Dict[np.dtype,List[int]] = {}
+
+        for i,a in enumerate(live):
+            op = a.op
+            if isinstance(op,str) and op.startswith("call "):
+                raise VectorizeError(f"function call '{op[len('call '):]}' inside a column expression")
+
+            if op == ".":
+                if a.arg1 != "row" or a.arg2 not in self.dtypes:
+                    raise VectorizeError(f"cannot resolve '{a.arg1}.{a.arg2}' as a column")
+                srcs = [self._operand(a.arg2)]
+                fn = None
+            elif a.arg2 is not None:
+                if op not in BINARY_OPS:
+                    raise VectorizeError(f"operator '{op}' has no column kernel")
+                srcs = [self._operand(canonical(a.arg1)),self._operand(canonical(a.arg2))]
+                fn = BINARY_OPS[op]
+            elif op == "-":
+                srcs = [self._operand(canonical(a.arg1))]
+                if srcs[0][2].kind == "b":
+                    raise VectorizeError("unary '-' on a bool column")
+                fn = np.negative
+            else:
+                srcs = [self._operand(canonical(a.arg1))]
+                fn = None
+
+            if fn is None:
+                dtype = srcs[0][2]
+            elif len(srcs) == 2:
+                dtype = _result_dtype(op,srcs[0][2],srcs[1][2])
+            else:
+                dtype = srcs[0][2]
+
+            # release registers whose last reader is this instruction first,
+            # ufuncs may write in place over one of their own inputs
+            for v in {canonical(a.arg1),canonical(a.arg2)}:
+                loc = self.locations.get(v) if isinstance(v,str) else None
+                if loc and loc[0] == "reg" and last_use.get(v) == i and v not in self.outputs:
+                    free.setdefault(self.register_dtypes[loc[1]],[]).append(loc[1])
+
+            if a.target in self.outputs:
+                self.output_dtypes[a.target] = dtype
+                dest = ("out",a.target,dtype)
+            else:
+                pool = free.get(dtype)
+                if pool:
+                    reg = pool.pop()
+                else:
+                    reg = len(self.register_dtypes)
+                    self.register_dtypes.append(dtype)
+                dest = ("reg",reg,dtype)
+                if a.target not in last_use:
+                    free.setdefault(dtype,[]).append(reg)
+
+            self.locations[a.target] = dest
+            self.program.append((fn,srcs,dest))
+
+        for name,target in aliases.items():
+            self.locations[name] = self.locations[canonical(target)]
+
+        for name in self.outputs:
+            if name not in self.output_dtypes:
+                # output that is a bare column or constant, e.g. a folded predicate
+                src = self._operand(canonical(name))
+                self.output_dtypes[name] = src[2]
+                self.program.append((None,[src],("out",name,src[2])))
+
+    def _operand(self,v) -> tuple:
+        if isinstance(v,str):
+            if v in self.locations:
+                return self.locations[v]
+            if v in self.dtypes:
+                dtype = self.dtypes[v]
+                if not isinstance(dtype,np.dtype) or dtype.kind not in "biuf":
+                    raise VectorizeError(f"column '{v}' is not numeric")
+                if v not in self.inputs:
+                    self.inputs.append(v)
+                return ("col",v,dtype)
+            v = literal_value(v)
+        return ("const",v,_scalar_dtype(v))
+
+    def block_rows(self) -> int:
+        width = len(self.inputs) + len(self.register_dtypes) + len(self.outputs)
+        return max(MIN_BLOCK_ROWS,L2_BYTES // (8 * max(width,1)))
+
+    def evaluate(self,df: pd.DataFrame) -> Dict[str,np.ndarray]:
+        n = len(df)
+        block = min(self.block_rows(),max(n,1))
+
+        inputs = {name: df[name].to_numpy() for name in self.inputs}
+        outputs = {name: np.empty(n,dtype=dtype) for name,dtype in self.output_dtypes.items()}
+        registers = [np.empty(block,dtype=dtype) for dtype in self.register_dtypes]
+
+        for start in range(0,n,block):
+            stop = min(start + block,n)
+            size = stop - start
+
+            def view(loc):
+                kind,ref,_ = loc
+                if kind == "col":
+                    return inputs[ref][start:stop]
+                if kind == "out":
+                    return outputs[ref][start:stop]
+                if kind == "reg":
+                    return registers[ref][:size]
+                return ref
+
+            for fn,srcs,dest in self.program:
+                out = view(dest)
+                if fn is None:
+                    out[...] = view(srcs[0])
+                else:
+                    fn(*[view(s) for s in srcs],out=out)
+
+        return outputs
+
+def evaluate_columns(df: pd.DataFrame,assigns: List[Assign],outputs: List[str],env: Optional[Dict[str,Any]] = None) -> Dict[str,Any]:
+    """Evaluates the named outputs of a block over whole columns, through a
+    fused ExpressionKernel when all operands are numeric and through the
+    ColumnEvaluator otherwise (strings, row fields from an enclosing loop)."""
+    try:
+        kernel = ExpressionKernel(assigns,outputs,dict(df.dtypes))
+        return kernel.evaluate(df)
+    except VectorizeError:
+        evaluator = ColumnEvaluator(df,env)
+        evaluator.run(assigns)
+        return {name: evaluator.resolve(name) for name in outputs}
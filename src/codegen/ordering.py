@@ -0,0 +1,49 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+def sort_positions(values: pd.Series,descending: bool = False) -> np.ndarray:
+    """Row positions in sorted order: a stable vectorized sort, so equal
+    values keep their input order, with missing values last"""
+    return np.asarray(values.reset_index(drop=True).sort_values(ascending=not descending,kind="stable",na_position="last").index)
+
+def top_k_positions(values: pd.Series,k: int,descending: bool = False) -> np.ndarray:
+    """The first k positions of sort_positions without sorting every row:
+    argpartition selects them in O(n) for numeric columns, a k-sized heap
+    in O(n log k) otherwise; only the k winners are sorted"""
+    n = len(values)
+    if k >= n:
+        return sort_positions(values,descending)
+
+    valid = ~np.asarray(values.isna())
+    valid_pos = np.flatnonzero(valid)
+    if len(valid_pos) <= k:
+        # every non-missing row makes it, topped up with missing ones in input order
+        ranked = valid_pos[sort_positions(values.iloc[valid_pos],descending)]
+        return np.concatenate([ranked,np.flatnonzero(~valid)[:k - len(valid_pos)]])
+
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        keys = np.asarray(values.iloc[valid_pos],dtype=float if values.dtype.kind == "f" else None)
+        if descending:
+            keys = -keys
+        # everything below the k-th key wins; ties at the k-th key go by position
+        kth = np.partition(keys,k - 1)[k - 1]
+        below = np.flatnonzero(keys < kth)
+        ties = np.flatnonzero(keys == kth)[:k - len(below)]
+        chosen = np.concatenate([below,ties])
+        chosen = chosen[np.lexsort((chosen,keys[chosen]))]
+        return valid_pos[chosen]
+
+    items = zip(values.iloc[valid_pos].tolist(),valid_pos.tolist())
+    if descending:
+        best = heapq.nlargest(k,items,key=lambda item: (item[0],-item[1]))
+    else:
+        best = heapq.nsmallest(k,items)
+    return np.array([pos for _,pos in best],dtype=np.int64)
+
+def order_frame(df: pd.DataFrame,column: str,descending: bool = False,limit=None) -> pd.DataFrame:
+    if limit is None:
+        positions = sort_positions(df[column],descending)
+    else:
+        positions = top_k_positions(df[column],limit,descending)
+    return df.iloc[positions]
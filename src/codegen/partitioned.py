@@ -0,0 +1,209 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from src.icg.ir import *
+from .aggregates import make_aggregator
+from .plan import Planner, PlanNode
+from .streaming import PipelineRunner, StreamPlanner
+
+# what one partition sends back: kept frames, rows produced per map, and the
+# aggregate states of every block keyed by stage index
+PartitionResult = Tuple[Dict[str,pd.DataFrame],Dict[str,int],List[Dict[int,Dict[Any,Any]]]]
+
+# bytes of a CSV file scanned at a time for row boundaries
+SCAN_BYTES = 1 << 22
+
+class PartitionPlanner(StreamPlanner):
+    """Picks the load -> filter -> map -> aggregate chains to run over row
+    partitions. A serial run without chunking reduces an aggregate in blocks
+    of the table it reads, so only aggregates (alone or ending a fused
+    Pipeline) fed directly by a load see the blocks a partition feeds and
+    are partitioned, keeping float sums bit-identical. The others run on the
+    merged tables."""
+    def __init__(self,plan: List[PlanNode],pipeline_aggregates: bool = True):
+        super().__init__(plan,stream_orders=False)
+        self.pipeline_aggregates = pipeline_aggregates
+        self.loads = {node.instr.target for node in plan if isinstance(node.instr,LoadTable)}
+
+    def _streamable(self,node: PlanNode) -> bool:
+        instr = node.instr
+        if isinstance(instr,(Aggregate,Pipeline)) and self.pipeline_aggregates and instr.input in self.loads:
+            stages = node.body if isinstance(instr,Pipeline) else [node]
+            return all(StreamPlanner._streamable(self,stage) for stage in stages)
+        if isinstance(instr,Aggregate):
+            return False
+        return super()._streamable(node)
+
+def partition_bounds(rows: int,block_rows: int,partitions: int) -> List[Tuple[int,int]]:
+    """Splits rows into at most `partitions` contiguous ranges made of whole
+    blocks, so every partition sees the blocks a serial run would"""
+    blocks = max((rows + block_rows - 1) // block_rows,1)
+    partitions = max(min(partitions,blocks),1)
+    bounds = []
+    first = 0
+    for p in range(partitions):
+        last = first + blocks // partitions + (1 if p < blocks % partitions else 0)
+        bounds.append((first * block_rows,min(last * block_rows,rows) if p < partitions - 1 else rows))
+        first = last
+    return bounds
+
+class CsvRange:
+    """The rows of a CSV file between byte offsets start and stop, the first
+    of them data row first_row. A worker parses them itself instead of being
+    sent the frame."""
+    def __init__(self,path: str,columns: Optional[List[str]],header_end: int,start: int,stop: int,first_row: int):
+        self.path = path
+        self.columns = columns
+        self.header_end = header_end
+        self.start = start
+        self.stop = stop
+        self.first_row = first_row
+
+    def read(self) -> pd.DataFrame:
+        with open(self.path,"rb") as f:
+            header = f.read(self.header_end)
+            f.seek(self.start)
+            body = f.read(self.stop - self.start)
+        df = pd.read_csv(io.BytesIO(header + body),usecols=self.columns)
+        # the row numbers a load of the whole file gives them
+        df.index = pd.RangeIndex(self.first_row,self.first_row + len(df))
+        return df
+
+def csv_row_offsets(path: str,block_rows: int) -> Tuple[int,List[int],int]:
+    """Scans a CSV file for row boundaries: returns the byte offset where
+    the header ends, the offset of every block_rows-th data row and the
+    number of data rows. A newline inside a quoted field does not end a
+    row, and blank lines are skipped, as pandas does."""
+    header_end = None
+    offsets: List[int] = []
+    rows = 0
+    quoted = False
+    line_start = 0
+    last_byte = 0
+    pos = 0
+    with open(path,"rb") as f:
+        while True:
+            data = f.read(SCAN_BYTES)
+            if not data:
+                break
+            buf = np.frombuffer(data,dtype=np.uint8)
+            ends = np.flatnonzero(buf == ord("\n"))
+            quotes = np.flatnonzero(buf == ord('"'))
+            if len(quotes) or quoted:
+                # a newline ends a row only after an even number of quote characters
+                outside = (np.searchsorted(quotes,ends) + quoted) % 2 == 0
+                ends = ends[outside]
+                quoted = bool((len(quotes) + quoted) % 2)
+
+            begins = np.concatenate(([line_start - pos],ends[:-1] + 1))
+            before = np.where(ends > 0,buf[np.maximum(ends - 1,0)],last_byte)
+            blank = (ends == begins) | ((ends - begins == 1) & (before == ord("\r")))
+            begins = begins[~blank] + pos
+            if header_end is None and len(begins):
+                header_end = int(ends[~blank][0]) + pos + 1
+                begins = begins[1:]
+            first = rows
+            rows += len(begins)
+            offsets.extend(int(begins[i]) for i in range(-first % block_rows,len(begins),block_rows))
+
+            if len(ends):
+                line_start = int(ends[-1]) + pos + 1
+            last_byte = int(buf[-1])
+            pos += len(data)
+
+        # a last row without a trailing newline
+        f.seek(line_start)
+        if f.read().strip():
+            if header_end is None:
+                header_end = pos
+            else:
+                if rows % block_rows == 0:
+                    offsets.append(line_start)
+                rows += 1
+    return (header_end if header_end is not None else pos),offsets,rows
+
+def csv_partitions(path: str,columns: Optional[List[str]],block_rows: int,partitions: int) -> List[CsvRange]:
+    """The row ranges of partition_bounds as byte ranges of the file"""
+    header_end,offsets,rows = csv_row_offsets(path,block_rows)
+    size = os.path.getsize(path)
+    def offset(row: int) -> int:
+        return offsets[row // block_rows] if row < rows else size
+    return [CsvRange(path,columns,header_end,offset(start),offset(stop),start)
+            for start,stop in partition_bounds(rows,block_rows,partitions)]
+
+def stage_instructions(stages: List[PlanNode]) -> List[IRInstruction]:
+    instructions = []
+    for node in stages:
+        instructions.append(node.instr)
+        instructions.extend(node.body)
+    return instructions
+
+def run_partition(partition,source: str,instructions: List[IRInstruction],keep: List[str],
+                  env: Dict[str,Any],tables: Dict[str,pd.DataFrame],vectorize: bool,block_rows: int,
+                  predicate: Optional[List[Assign]] = None,predicate_temp=None) -> PartitionResult:
+    """Runs the filter/map/aggregate/join chain fed by table `source` over
+    one partition (a frame, or a CsvRange the worker parses), in a worker
+    process or inline, filtering each block by a pushed-down load predicate
+    if given. `tables` holds the other tables
+    the chain reads (join build sides). Aggregate states are snapshotted
+    after every block rather than reduced, so the parent can merge them in
+    order."""
+    from .executor import Executor
+
+    frame = partition.read() if isinstance(partition,CsvRange) else partition
+    executor = Executor([],vectorize=vectorize,workers=1)
+    executor.env.update(env)
+    executor.tables.update(tables)
+    stages = Planner(instructions).lower(executor.handlers)
+    runner = PipelineRunner(executor,source,stages,keep)
+
+    partials = []
+    for start in range(0,max(len(frame),1),block_rows):
+        block = frame.iloc[start:start + block_rows]
+        if predicate_temp is not None:
+            block = executor.filter_frame(block,predicate,predicate_temp)
+        runner.feed(block)
+        partials.append({i: aggregator.states for i,aggregator in runner.aggregators.items()})
+        for aggregator in runner.aggregators.values():
+            aggregator.states = {}
+
+    tables = {name: pd.concat(parts) for name,parts in runner.parts.items()}
+    return tables,dict(runner.offsets),partials
+
+def merge_partitions(source: str,stages: List[PlanNode],keep: List[str],results: List[PartitionResult],
+                     env: Optional[Dict[str,Any]] = None) -> Dict[str,pd.DataFrame]:
+    """Combines partition results into the tables a serial run produces"""
+    # maps and joins renumber their rows from 0 in every partition; tables
+    # whose index comes from one are shifted by its rows in earlier partitions
+    index_owner: Dict[str,Optional[str]] = {source: None}
+    for node in stages:
+        instr = node.instr
+        if isinstance(instr,Join) or (isinstance(instr,Map) and not instr.keep_labels):
+            index_owner[instr.output] = instr.output
+        elif isinstance(instr,(Filter,Map)):
+            index_owner[instr.output] = index_owner.get(instr.input)
+
+    tables = {}
+    for name in keep:
+        owner = index_owner.get(name)
+        shift = 0
+        parts = []
+        for frames,offsets,_ in results:
+            frame = frames[name]
+            if owner is not None:
+                frame.index = frame.index + shift
+                shift += offsets[owner]
+            parts.append(frame)
+        tables[name] = pd.concat(parts)
+
+    for i,node in enumerate(stages):
+        if not isinstance(node.instr,Aggregate):
+            continue
+        aggregator = make_aggregator(node.instr,node.body,env)
+        for _,_,partials in results:
+            for states in partials:
+                aggregator.merge(states[i])
+        tables[node.instr.output] = aggregator.frame()
+    return tables
@@ -0,0 +1,98 @@
+from typing import Any, Callable, Dict, List, Optional
+from src.icg.ir import *
+
+class PlanNode:
+    """One step of a lowered program. Filter/Map/Aggregate nodes own the
+    Assigns of their block and For nodes own the plan of their body, so the
+    executor never has to search the flat IR list."""
+    def __init__(self,instr: IRInstruction,body: Optional[List[Any]] = None):
+        self.instr = instr
+        self.owns_body = body is not None
+        self.body = body if body is not None else []
+        self.handler: Optional[Callable] = None
+
+    def run(self):
+        if self.owns_body:
+            return self.handler(self.instr,self.body)
+        return self.handler(self.instr)
+
+    def reads(self) -> List[str]:
+        """Names of the tables this node (including a For body) reads"""
+        instr = self.instr
+        if isinstance(instr,(Filter,Map,Aggregate,Pipeline,Order)):
+            return [instr.input]
+        if isinstance(instr,ForBegin):
+            reads = [instr.table]
+            for child in self.body:
+                reads.extend(child.reads())
+            return reads
+        if isinstance(instr,Join):
+            return [instr.left,instr.right]
+        if isinstance(instr,Print) and isinstance(instr.value,str):
+            return [instr.value]
+        return []
+
+    def writes(self) -> List[str]:
+        """Names of the tables this node stores in Executor.tables"""
+        instr = self.instr
+        if isinstance(instr,LoadTable):
+            return [instr.target]
+        if isinstance(instr,(Filter,Map,Aggregate,Pipeline,Join,Order)):
+            return [instr.output]
+        return []
+
+    def __repr__(self):
+        return f"PlanNode({self.instr!r}, body_len={len(self.body)})"
+
+# instructions that only carry structure and have nothing to execute
+NO_OP_INSTRUCTIONS = (Label,Return,FunctionFragment)
+
+class Planner:
+    """Lowers the flat IR list into a block-structured plan in one linear
+    pass and resolves every node's handler up front."""
+    def __init__(self,instructions: List[IRInstruction]):
+        self.instructions = instructions
+
+    def lower(self,handlers: Dict[type,Callable]) -> List[PlanNode]:
+        instructions = self.instructions
+        root: List[PlanNode] = []
+        stack = [root]
+
+        i = 0
+        while i < len(instructions):
+            instr = instructions[i]
+
+            if isinstance(instr,(Filter,Map,Aggregate)):
+                j = i + 1
+                while j < len(instructions) and isinstance(instructions[j],Assign):
+                    j += 1
+                stack[-1].append(self._node(instr,handlers,instructions[i + 1:j]))
+                i = j
+                continue
+
+            if isinstance(instr,Pipeline):
+                stages = Planner(instr.stages).lower(handlers)
+                stack[-1].append(self._node(instr,handlers,stages))
+            elif isinstance(instr,ForBegin):
+                node = self._node(instr,handlers,[])
+                stack[-1].append(node)
+                stack.append(node.body)
+            elif isinstance(instr,ForEnd):
+                if len(stack) == 1:
+                    raise Exception("Unbalanced ForEnd in IR")
+                stack.pop()
+            elif not isinstance(instr,NO_OP_INSTRUCTIONS):
+                stack[-1].append(self._node(instr,handlers))
+            i += 1
+
+        if len(stack) != 1:
+            raise Exception("Unterminated ForBegin in IR")
+        return root
+
+    def _node(self,instr,handlers,body=None) -> PlanNode:
+        handler = handlers.get(type(instr))
+        if handler is None:
+            raise Exception(f"Unknown IR instruction {instr}")
+        node = PlanNode(instr,body)
+        node.handler = handler
+        return node
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import pickle
+from typing import Dict, List, Optional
+from src.icg.ir import IRInstruction
+from src.catalog import default_cache_dir, shared_catalog
+
+_compiler_digest: Optional[str] = None
+
+def compiler_digest() -> str:
+    """Hash of the compiler's own sources, so cached programs never outlive a code change"""
+    global _compiler_digest
+    if _compiler_digest is None:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        h = hashlib.sha256()
+        for folder,dirs,files in sorted(os.walk(root)):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    with open(os.path.join(folder,name),"rb") as f:
+                        h.update(name.encode())
+                        h.update(f.read())
+        _compiler_digest = h.hexdigest()
+    return _compiler_digest
+
+class ProgramCache:
+    """On-disk cache of optimized IR, keyed by a hash of the source text.
+    An entry also records the schema of every CSV the program loads and is
+    only used while all of them still match, since type checking and
+    projection pushdown depend on them."""
+    def __init__(self,directory: Optional[str] = None):
+        self.directory = os.path.join(directory or default_cache_dir(),"programs")
+
+    def _path(self,source_code: str) -> str:
+        h = hashlib.sha256(compiler_digest().encode())
+        h.update(source_code.encode())
+        return os.path.join(self.directory,h.hexdigest() + ".pickle")
+
+    def get(self,source_code: str) -> Optional[List[IRInstruction]]:
+        try:
+            with open(self._path(source_code),"rb") as f:
+                entry = pickle.load(f)
+            for filename,schema in entry["sources"].items():
+                if shared_catalog.schema(filename) != schema:
+                    return None
+        except Exception:
+            # missing, unreadable or stale entries are all misses
+            return None
+        return entry["ir"]
+
+    def put(self,source_code: str,instructions: List[IRInstruction],sources: Dict[str,Dict[str,str]]):
+        path = self._path(source_code)
+        try:
+            os.makedirs(self.directory,exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp,"wb") as f:
+                pickle.dump({"sources": sources,"ir": instructions},f,protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp,path)
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            os.remove(os.path.join(self.directory,name))
@@ -0,0 +1,117 @@
+import operator
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from src.icg.ir import *
+from .vectorized import literal_value
+
+PY_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "and": lambda l,r: bool(l) and bool(r),
+    "or": lambda l,r: bool(l) or bool(r),
+}
+
+PY_FUNCS = {
+    "sum": sum,
+    "avg": lambda args: sum(args) / len(args) if args else 0,
+    "count": len,
+}
+
+class RowProgram:
+    """Assigns compiled for row-at-a-time execution over row tuples.
+
+    Every operand is classified once: an earlier Assign target becomes a
+    fixed slot in a preallocated register list, a column name becomes a
+    position in the row tuple, and anything else is resolved against the
+    environment (or as a literal) at compile time. Running a row therefore
+    needs no dict lookups, no numeric parsing and no environment copy.
+
+    With indexed=True, rows are itertuples(index=True) tuples whose first
+    item is the index label."""
+    def __init__(self,columns: Sequence[str],env: Optional[Dict[str,Any]] = None,row_names: Sequence[str] = ("row",),indexed: bool = False):
+        self.columns = list(columns)
+        self.indexed = indexed
+        start = 1 if indexed else 0
+        self.positions = {name: i + start for i,name in enumerate(self.columns)}
+        self.env = env if env is not None else {}
+        self.row_names = set(row_names)
+        self.slots: Dict[str,int] = {}
+
+    def registers(self) -> List[Any]:
+        return [None] * len(self.slots)
+
+    def operand(self,v) -> Callable:
+        if isinstance(v,str):
+            if v in self.slots:
+                slot = self.slots[v]
+                return lambda row,regs: regs[slot]
+            if v in self.positions:
+                pos = self.positions[v]
+                return lambda row,regs: row[pos]
+            if v in self.row_names:
+                columns = self.columns
+                if self.indexed:
+                    return lambda row,regs: pd.Series(row[1:],index=columns,name=row[0])
+                return lambda row,regs: pd.Series(row,index=columns)
+            if v in self.env:
+                value = self.env[v]
+                return lambda row,regs: value
+        value = literal_value(v)
+        return lambda row,regs: value
+
+    def field(self,base,name) -> Callable:
+        if base in self.row_names and name in self.positions:
+            pos = self.positions[name]
+            return lambda row,regs: row[pos]
+        if isinstance(base,str) and base in self.env:
+            value = literal_value(self.env[base][name])
+            return lambda row,regs: value
+        raise Exception(f"Cannot access field '{name}' of '{base}'")
+
+    def compile(self,instr: Assign) -> Callable:
+        op = instr.op
+        a1 = instr.arg1
+        a2 = instr.arg2
+
+        if isinstance(op,str) and op.startswith("call "):
+            fn_name = op[len("call "):]
+            fn = PY_FUNCS.get(fn_name)
+            if fn is None:
+                raise Exception(f"Unknown function '{fn_name}'")
+            getters = [self.operand(x) for x in (a1 if isinstance(a1,list) else [a1])]
+            slot = self._slot(instr.target)
+            def step(row,regs):
+                regs[slot] = fn([g(row,regs) for g in getters])
+            return step
+
+        if op == ".":
+            get = self.field(a1,a2)
+        elif a2 is not None:
+            fn = PY_OPS.get(op)
+            if fn is None:
+                raise Exception(f"Unknown operator '{op}'")
+            left,right = self.operand(a1),self.operand(a2)
+            get = lambda row,regs: fn(left(row,regs),right(row,regs))
+        elif op == "-":
+            value = self.operand(a1)
+            get = lambda row,regs: -value(row,regs)
+        else:
+            get = self.operand(a1)
+
+        slot = self._slot(instr.target)
+        def step(row,regs):
+            regs[slot] = get(row,regs)
+        return step
+
+    def _slot(self,name) -> int:
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Set
+from .plan import PlanNode
+
+# worker threads used for independent table nodes when none are requested
+DEFAULT_WORKERS = min(4,os.cpu_count() or 1)
+
+class DagScheduler:
+    """Runs a plan as a dependency DAG. Nodes that produce tables (loads,
+    filters, maps, aggregates, pipelines) run on a thread pool as soon as
+    the tables they read exist, since pandas and NumPy release the GIL in
+    most heavy kernels. Prints, for loops and top-level Assigns share the
+    environment and write output, so they run on the calling thread in
+    program order, each waiting only for the tables it reads."""
+    def __init__(self,plan: List[PlanNode],workers: int = DEFAULT_WORKERS):
+        self.plan = plan
+        self.workers = workers
+        self.deps = self._dependencies()
+
+    def _dependencies(self) -> List[Set[int]]:
+        producer: Dict[str,int] = {}
+        deps = []
+        for idx,node in enumerate(self.plan):
+            # tables produced before this plan (an earlier session block) need no edge
+            deps.append({producer[name] for name in node.reads() + node.writes() if name in producer})
+            for name in node.writes():
+                producer[name] = idx
+        return deps
+
+    def run(self,run_node: Callable[[PlanNode],None]):
+        waiting = [idx for idx,node in enumerate(self.plan) if node.writes()]
+        running: Dict[Future,int] = {}
+        done: Set[int] = set()
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            def submit_ready():
+                for idx in list(waiting):
+                    if self.deps[idx] <= done:
+                        waiting.remove(idx)
+                        running[pool.submit(run_node,self.plan[idx])] = idx
+
+            def wait_for(indices: Set[int]):
+                submit_ready()
+                while not indices <= done:
+                    finished,_ = wait(running,return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        future.result()
+                        done.add(running.pop(future))
+                    submit_ready()
+
+            for idx,node in enumerate(self.plan):
+                if node.writes():
+                    continue
+                wait_for(self.deps[idx])
+                run_node(node)
+                done.add(idx)
+
+            wait_for({idx for idx,node in enumerate(self.plan) if node.writes()})
+        finally:
+            pool.shutdown(wait=True,cancel_futures=True)
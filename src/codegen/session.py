@@ -0,0 +1,37 @@
+import copy
+from typing import List, Optional
+from src.catalog import shared_catalog
+from src.icg import IRGenerator
+from src.icg.ir import IRInstruction
+from src.semantic import SemanticAnalyzer
+from .backend import Backend
+from .executor import Executor
+
+class Session:
+    """An interactive session: the symbol tables, IR counters and computed
+    tables survive between blocks, so each block only compiles and runs its
+    own statements and can use every table defined before it."""
+    def __init__(self,verbose: bool = False,vectorize: bool = True,chunksize: Optional[int] = None):
+        self.verbose = verbose
+        self.semantic_analyzer = SemanticAnalyzer()
+        self.ir_generator = IRGenerator()
+        self.executor = Executor([],verbose=verbose,vectorize=vectorize,chunksize=chunksize)
+        # later blocks may load the same files again, keep them parsed
+        shared_catalog.keep_tables = True
+
+    def compile(self,source: str) -> List[IRInstruction]:
+        # a block that fails to compile must leave no definitions behind
+        snapshot = copy.deepcopy(self.semantic_analyzer)
+        try:
+            backend = Backend(source,verbose=self.verbose,semantic_analyzer=self.semantic_analyzer,
+                              ir_generator=self.ir_generator,incremental=True)
+            return backend.run()
+        except Exception:
+            self.semantic_analyzer = snapshot
+            raise
+
+    def run(self,source: str):
+        self.executor.execute(self.compile(source))
+
+    def tables(self) -> List[str]:
+        return sorted(self.executor.tables)
@@ -0,0 +1,204 @@
+import pandas as pd
+from typing import Callable, Dict, List, Set
+from src.catalog import shared_catalog
+from src.icg.ir import *
+from .aggregates import AGGREGATE_FUNCS, Aggregator, make_aggregator
+from .external_sort import ExternalSorter
+from .join import JoinProbe
+from .plan import PlanNode
+from .vectorized import can_vectorize
+
+# rows per block when a fused Pipeline runs over an in-memory table
+PIPELINE_BLOCK_ROWS = 65536
+
+class PipelineRunner:
+    """Pushes frames of a source table through a chain of Filter/Map/Aggregate
+    plan nodes. Aggregates keep running state between frames and Orders feed
+    an ExternalSorter; the only frames retained are those of the tables
+    listed in `keep`."""
+    def __init__(self,executor,source: str,stages: List[PlanNode],keep: List[str]):
+        self.executor = executor
+        self.source = source
+        self.stages = stages
+        self.keep = list(keep)
+
+        self.aggregators: Dict[int,Aggregator] = {}
+        self.probes: Dict[int,JoinProbe] = {}
+        self.sorters: Dict[int,ExternalSorter] = {}
+        for i,node in enumerate(stages):
+            if isinstance(node.instr,Aggregate):
+                self.aggregators[i] = make_aggregator(node.instr,node.body,executor.env)
+            elif isinstance(node.instr,Join):
+                self.probes[i] = JoinProbe(executor.get_table(node.instr.right),node.instr.key,node.instr.right)
+            elif isinstance(node.instr,Order):
+                self.sorters[i] = ExternalSorter(node.instr.column,node.instr.descending,node.instr.limit,
+                                                 executor.sort_memory,executor.temp_dir)
+
+        # maps and joins renumber their rows; offsets keep the numbering continuous across frames
+        self.offsets = {node.instr.output: 0 for node in stages if isinstance(node.instr,(Map,Join))}
+        self.renumbered = {node.instr.output for node in stages
+                           if isinstance(node.instr,Join) or (isinstance(node.instr,Map) and not node.instr.keep_labels)}
+        self.parts: Dict[str,List[pd.DataFrame]] = {name: [] for name in self.keep}
+
+    def feed(self,frame: pd.DataFrame):
+        frames = {self.source: frame}
+
+        for i,node in enumerate(self.stages):
+            instr = node.instr
+            input_df = frames[instr.left if isinstance(instr,Join) else instr.input]
+            if isinstance(instr,Filter):
+                frames[instr.output] = self.executor.filter_frame(input_df,node.body,instr.predicate_temp)
+            elif isinstance(instr,(Map,Join)):
+                if isinstance(instr,Map):
+                    output_df = self.executor.map_frame(input_df,instr,node.body)
+                else:
+                    output_df = self.probes[i].probe(input_df)
+                offset = self.offsets[instr.output]
+                if instr.output in self.renumbered:
+                    output_df.index = pd.RangeIndex(offset,offset + len(output_df))
+                self.offsets[instr.output] = offset + len(output_df)
+                frames[instr.output] = output_df
+            elif isinstance(instr,Order):
+                self.sorters[i].add(input_df)
+            else:
+                self.aggregators[i].update(input_df)
+
+        for name,parts in self.parts.items():
+            parts.append(frames[name])
+
+    def finish(self) -> Dict[str,pd.DataFrame]:
+        tables = {}
+        for name,parts in self.parts.items():
+            tables[name] = pd.concat(parts)
+
+        for i,aggregator in self.aggregators.items():
+            tables[self.stages[i].instr.output] = aggregator.frame()
+        for i,sorter in self.sorters.items():
+            tables[self.stages[i].instr.output] = sorter.result()
+        return tables
+
+def external_reads(source: str,stages: List[PlanNode]) -> List[str]:
+    """Tables the stages read that the stream does not produce itself, the
+    build sides of streamed joins"""
+    internal = {source} | {name for stage in stages for name in stage.writes()}
+    reads = []
+    for stage in stages:
+        reads.extend(name for name in stage.reads() if name not in internal and name not in reads)
+    return reads
+
+class StreamNode(PlanNode):
+    """A LoadTable that streams its CSV through the pipeline stages fed by it"""
+    def __init__(self,instr: LoadTable,stages: List[PlanNode]):
+        super().__init__(instr,stages)
+        self.keep: List[str] = []
+
+    def run(self):
+        return self.handler(self.instr,self.body,self.keep)
+
+    def reads(self) -> List[str]:
+        return external_reads(self.instr.target,self.body)
+
+    def writes(self) -> List[str]:
+        results = [stage.instr.output for stage in self.body if isinstance(stage.instr,(Aggregate,Order))]
+        return self.keep + results
+
+class StreamPlanner:
+    """Rewrites a plan so that every load -> filter -> map -> aggregate chain
+    rooted at a top-level LoadTable runs chunk by chunk. Tables inside a
+    chain are only materialized when something outside the chain (a print,
+    a for loop, a non-streamable block) reads them. An order at the end of a
+    chain sorts the stream externally instead of the loaded table."""
+    def __init__(self,plan: List[PlanNode],stream_aggregates: bool = True,stream_orders: bool = True):
+        self.plan = plan
+        self.stream_aggregates = stream_aggregates
+        self.stream_orders = stream_orders
+
+    def _streamable(self,node: PlanNode) -> bool:
+        if isinstance(node.instr,Pipeline):
+            return all(self._streamable(stage) for stage in node.body)
+        if isinstance(node.instr,Aggregate):
+            exprs = [a for a in node.body if a.op not in AGGREGATE_FUNCS]
+            return self.stream_aggregates and can_vectorize(exprs)
+        if isinstance(node.instr,Order):
+            return self.stream_orders
+        return isinstance(node.instr,(Filter,Map))
+
+    def _byte_bound(self,instr: IRInstruction,bounds: Dict[str,int]) -> int:
+        """Upper bound on the CSV bytes the output of instr comes from, taken
+        from the catalog's file sizes, to compare the sides of a join before
+        either exists"""
+        if isinstance(instr,LoadTable):
+            try:
+                return shared_catalog.entry(instr.source).fingerprint[0]
+            except OSError:
+                return 0
+        if isinstance(instr,Join):
+            return bounds.get(instr.left,0) + bounds.get(instr.right,0)
+        if isinstance(instr,Aggregate) and not instr.group_by:
+            return 0
+        return bounds.get(instr.input,0)
+
+    def rewrite(self,handler: Callable) -> List[PlanNode]:
+        owner: Dict[str,StreamNode] = {}
+        streams: Dict[int,StreamNode] = {}
+        stage_ids: Set[int] = set()
+        stage_stream: Dict[int,StreamNode] = {}
+        # tables written before each stream starts, which a streamed join may build on
+        written: Set[str] = set()
+        ready: Dict[int,Set[str]] = {}
+        bounds: Dict[str,int] = {}
+
+        for node in self.plan:
+            instr = node.instr
+            if isinstance(instr,LoadTable):
+                stream = StreamNode(instr,[])
+                stream.handler = handler
+                streams[id(node)] = stream
+                owner[instr.target] = stream
+                ready[id(stream)] = set(written)
+            elif (isinstance(instr,Join) and instr.left in owner and instr.right in ready[id(owner[instr.left])]
+                  and bounds[instr.right] <= bounds[instr.left]):
+                # the left side is streamed and probes the already built right
+                # side, which must be the smaller one; otherwise the join runs
+                # on the whole left table and builds on it
+                stream = owner[instr.left]
+                stage_ids.add(id(node))
+                stage_stream[id(node)] = stream
+                stream.body.append(node)
+                owner[instr.output] = stream
+            elif isinstance(instr,(Filter,Map,Aggregate,Pipeline,Order)) and instr.input in owner and self._streamable(node):
+                stream = owner[instr.input]
+                stage_ids.add(id(node))
+                stage_stream[id(node)] = stream
+                # a fused pipeline contributes its stages to the stream
+                for stage in (node.body if isinstance(instr,Pipeline) else [node]):
+                    stream.body.append(stage)
+                    if not isinstance(stage.instr,(Aggregate,Order)):
+                        owner[stage.instr.output] = stream
+            written.update(node.writes())
+            for name in node.writes():
+                bounds[name] = self._byte_bound(instr,bounds)
+
+        # tables read by anything that is not a stage of their own stream
+        demanded: Set[str] = set()
+        for node in self.plan:
+            if id(node) in stage_ids:
+                stream = stage_stream[id(node)]
+                demanded.update(name for name in node.reads() if owner.get(name) is not stream)
+                continue
+            demanded.update(node.reads())
+
+        for name,stream in owner.items():
+            if name in demanded:
+                stream.keep.append(name)
+
+        rewritten = []
+        for node in self.plan:
+            if id(node) in stage_ids:
+                continue
+            stream = streams.get(id(node))
+            if stream is not None and stream.body:
+                rewritten.append(stream)
+            else:
+                rewritten.append(node)
+        return rewritten
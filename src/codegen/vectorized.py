@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from src.icg.ir import *
+
+class VectorizeError(Exception):
+    """Raised when an Assign chain cannot be evaluated column-at-a-time"""
+    pass
+
+BINARY_OPS = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.true_divide,
+    "==": np.equal,
+    "!=": np.not_equal,
+    ">": np.greater,
+    "<": np.less,
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    "and": np.logical_and,
+    "or": np.logical_or,
+}
+
+def literal_value(v):
+    # same conversion Executor._resolve_value applies to unbound names
+    if isinstance(v,str):
+        try:
+            if "." in v:
+                return float(v)
+            return int(v)
+        except ValueError:
+            return v
+    return v
+
+def apply_column_op(op,left,right):
+    if op in ("==","!=") and (isinstance(left,str) or isinstance(right,str)):
+        # numpy ufuncs do not compare object/str columns against a python str
+        return left == right if op == "==" else left != right
+    fn = BINARY_OPS.get(op)
+    if fn is None:
+        raise VectorizeError(f"operator '{op}' has no column kernel")
+    return fn(left,right)
+
+def expression_keys(assigns: List[Assign]) -> Dict[str,Any]:
+    """Maps every Assign target to a structural key of the expression it
+    computes, so equal expressions written twice get the same key. Keys are
+    interned, a temp's key refers to its operands' keys by number, so they
+    stay flat and cheap to hash however deep the expression is."""
+    keys: Dict[str,Any] = {}
+    interned: Dict[tuple,tuple] = {}
+
+    def key(v):
+        if isinstance(v,list):
+            return ("args",) + tuple(key(x) for x in v)
+        if isinstance(v,str):
+            return keys.get(v,v)
+        return v
+
+    for a in assigns:
+        structure = (a.op,key(a.arg1),key(a.arg2))
+        keys[a.target] = interned.setdefault(structure,("expr",len(interned)))
+    return keys
+
+def can_vectorize(assigns: List[Assign]) -> bool:
+    """Static check that ColumnEvaluator can run every Assign of a block"""
+    for a in assigns:
+        if a.op == ".":
+            if a.arg1 != "row":
+                return False
+        elif a.arg2 is not None:
+            if a.op not in BINARY_OPS:
+                return False
+        elif isinstance(a.op,str) and a.op.startswith("call "):
+            return False
+    return True
+
+def to_mask(value,length: int) -> np.ndarray:
+    if isinstance(value,pd.Series):
+        return value.fillna(False).to_numpy(dtype=bool)
+    if isinstance(value,np.ndarray):
+        return value.astype(bool)
+    return np.full(length,bool(value))
+
+class ColumnEvaluator:
+    """Evaluates the Assign chain of a Filter/Map/Aggregate block over whole
+    DataFrame columns instead of one row at a time."""
+    def __init__(self,df: pd.DataFrame,env: Optional[Dict[str,Any]] = None):
+        self.df = df
+        self.env = env if env is not None else {}
+        self.values: Dict[str,Any] = {}
+
+    def run(self,assigns: List[Assign]) -> Dict[str,Any]:
+        keys = expression_keys(assigns)
+        computed: Dict[Any,str] = {}
+
+        for a in assigns:
+            key = keys[a.target]
+            if key in computed:
+                # common subexpression, reuse the column computed earlier
+                self.values[a.target] = self.values[computed[key]]
+                continue
+            self.values[a.target] = self.eval_assign(a)
+            computed[key] = a.target
+        return self.values
+
+    def resolve(self,v):
+        if isinstance(v,str):
+            if v in self.values:
+                return self.values[v]
+            if v in self.df.columns:
+                return self.df[v]
+            if v in self.env:
+                return self.env[v]
+        return literal_value(v)
+
+    def eval_assign(self,instr: Assign):
+        op = instr.op
+
+        if isinstance(op,str) and op.startswith("call "):
+            raise VectorizeError(f"function call '{op[len('call '):]}' inside a column expression")
+
+        if op == ".":
+            return self._field(instr.arg1,instr.arg2)
+
+        if instr.arg2 is not None:
+            return apply_column_op(op,self.resolve(instr.arg1),self.resolve(instr.arg2))
+
+        if op == "-":
+            return -self.resolve(instr.arg1)
+
+        return self.resolve(instr.arg1)
+
+    def _field(self,base,field):
+        if base == "row" and field in self.df.columns:
+            return self.df[field]
+        if isinstance(base,str) and base in self.env:
+            return literal_value(self.env[base][field])
+        raise VectorizeError(f"cannot resolve '{base}.{field}' as a column")
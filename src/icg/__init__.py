@@ -1,6 +1,7 @@
 from .ir import (
     IRInstruction, LoadTable, Filter, Map, Aggregate,
-    ForBegin, ForEnd, Print, Assign, Label, Return, FunctionFragment
+    ForBegin, ForEnd, Print, Assign, Label, Return, FunctionFragment,
+    Pipeline
 )
 from .ir_generator import IRGenerator
 from .ir_pretty import IRPretty
@@ -8,5 +9,6 @@ from .ir_pretty import IRPretty
 __all__ = [
     "IRInstruction", "LoadTable", "Filter", "Map", "Aggregate",
     "ForBegin", "ForEnd", "Print", "Assign", "Label", "Return", "FunctionFragment",
+    "Pipeline",
     "IRGenerator", "IRPretty"
 ]
@@ -1,16 +1,20 @@
-from typing import Any, Optional, Sequence, Dict
+from typing import Any, Dict, List, Optional, Sequence
 
 class IRInstruction:
     """Base class for all IR instructions"""
     pass
 
 class LoadTable(IRInstruction):
-    def __init__(self,target: str,filename: str):
+    def __init__(self,target: str,filename: str,columns: Optional[Sequence[str]] = None):
         self.target = target
         self.source = filename
+        self.columns = list(columns) if columns is not None else None  # None reads every column
+        # row filter applied while the CSV is parsed: an Assign chain and its result temp
+        self.predicate: List["Assign"] = []
+        self.predicate_temp: Optional[str] = None
 
     def __repr__(self):
-        return f"LoadTable(target = {self.target!r}, filename = {self.source!r})"
+        return f"LoadTable(target = {self.target!r}, filename = {self.source!r}, columns = {self.columns!r}, predicate_temp = {self.predicate_temp!r})"
     
 class Filter(IRInstruction):
     def __init__(self,input_table: str, predicate_label: str, output_table: str,predicate_temp: str):
@@ -23,29 +27,70 @@ class Filter(IRInstruction):
         return f"Filter(input={self.input!r}, pred={self.predicate_label!r}, output={self.output!r}, pred_temp={self.predicate_temp!r})"
     
 class Map(IRInstruction):
-    def __init__(self,input_table: str,map_label: str,output_table: str):
+    def __init__(self,input_table: str,map_label: str,output_table: str,columns: Optional[Sequence[str]] = None):
         self.input = input_table
         self.map_label = map_label
         self.output = output_table
+        self.columns = list(columns) if columns else []  # new columns, in assignment order
+        # set by predicate pushdown when a filter below moved into the load:
+        # rows keep the load's labels, which a full load numbers 0, 1, ...
+        self.keep_labels = False
 
     def __repr__(self):
-        return f"Map(input={self.input!r}, map_fn={self.map_label!r}, output={self.output!r})"
+        return f"Map(input={self.input!r}, map_fn={self.map_label!r}, output={self.output!r}, columns={self.columns!r})"
     
 class Aggregate(IRInstruction):
-    def __init__(self,input_table: str,agg_label: str,output_table: str):
+    def __init__(self,input_table: str,agg_label: str,output_table: str,group_by: Optional[Sequence[str]] = None):
         self.input = input_table
         self.agg_label = agg_label
         self.output = output_table
+        # columns whose distinct values each get one output row; empty for one global row
+        self.group_by = list(group_by) if group_by else []
 
     def __repr__(self):
+        if self.group_by:
+            return f"Aggregate(input={self.input!r}, agg_fn={self.agg_label!r}, output={self.output!r}, group_by={self.group_by!r})"
         return f"Aggregate(input={self.input!r}, agg_fn={self.agg_label!r}, output={self.output!r})"
     
+class Join(IRInstruction):
+    """Inner equi-join of two tables on one key column"""
+    def __init__(self,left_table: str,right_table: str,output_table: str,key: str):
+        self.left = left_table
+        self.right = right_table
+        self.output = output_table
+        self.key = key
+
+    def __repr__(self):
+        return f"Join(left={self.left!r}, right={self.right!r}, output={self.output!r}, key={self.key!r})"
+
+class Order(IRInstruction):
+    """Rows of a table sorted by one column; with a limit only the first k"""
+    def __init__(self,input_table: str,output_table: str,column: str,descending: bool = False,limit: Optional[int] = None):
+        self.input = input_table
+        self.output = output_table
+        self.column = column
+        self.descending = descending
+        self.limit = limit
+
+    def __repr__(self):
+        return f"Order(input={self.input!r}, output={self.output!r}, column={self.column!r}, descending={self.descending!r}, limit={self.limit!r})"
+
+class CreateIndex(IRInstruction):
+    """Secondary index on one column of a CSV file, used by loads of the
+    file whose predicate compares that column with a constant"""
+    def __init__(self,source: str,column: str):
+        self.source = source
+        self.column = column
+
+    def __repr__(self):
+        return f"CreateIndex(source={self.source!r}, column={self.column!r})"
+
 class ForBegin(IRInstruction):
     def __init__(self,table: str,iter_var: str):
         self.table = table
         self.iter_var = iter_var
 
-    def __repr(self):
+    def __repr__(self):
         return f"ForBegin(table={self.table!r}, iter_var={self.iter_var!r})"
     
 class ForEnd(IRInstruction):
@@ -93,10 +138,23 @@ class FunctionFragment(IRInstruction):
 
     def __repr__(self):
         return f"FunctionalFragment(name={self.name!r}, body_len={len(self.body)})"
+
+class Pipeline(IRInstruction):
+    """Fused chain of Filter/Map/Aggregate blocks. stages holds the blocks
+    in flat form (each block instruction followed by its Assigns); only the
+    last stage's output table is materialized."""
+    def __init__(self,input_table: str,output_table: str,stages: Optional[Sequence[IRInstruction]] = None):
+        self.input = input_table
+        self.output = output_table
+        self.stages = list(stages) if stages else []
+
+    def __repr__(self):
+        return f"Pipeline(input={self.input!r}, output={self.output!r}, stages_len={len(self.stages)})"
     
 __all__= [
     "IRInstruction",
-    "LoadTable","Filter","Map","Aggregate",
+    "LoadTable","Filter","Map","Aggregate","Join","Order","CreateIndex",
     "ForBegin","ForEnd","Print",
     "Assign","Label","Return","FunctionFragment",
+    "Pipeline",
 ]
\ No newline at end of file
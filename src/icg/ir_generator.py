@@ -17,10 +17,15 @@ class IRGenerator:
         return f"L{self.label_counter}"
     
     def generate(self,node: ASTNode) -> List[IRInstruction]:
+        # counters keep running across calls, so temps and labels stay unique
+        # when one generator compiles a session block by block
+        self.instructions = []
         self.gen_node(node)
         return self.instructions
     
     def gen_node(self,node: ASTNode) -> Any:
+        if isinstance(node,(BinaryExpr,UnaryExpr,DotAccess,FunctionCall)):
+            return self.gen_expression(node)
         method_name = f'gen_{type(node).__name__}'
         visitor = getattr(self, method_name, self.generic_gen)
         return visitor(node)
@@ -44,7 +49,8 @@ class IRGenerator:
 
     def gen_MapStmt(self,node: MapStmt):
         map_label = self.new_label()
-        self.instructions.append(Map(node.source,map_label,node.target))
+        columns = [assign.name for assign in node.assignments]
+        self.instructions.append(Map(node.source,map_label,node.target,columns))
         for assign in node.assignments:
             self.gen_node(assign)
 
@@ -54,7 +60,7 @@ class IRGenerator:
 
     def gen_AggregateStmt(self,node: AggregateStmt):
         agg_label = self.new_label()
-        self.instructions.append(Aggregate(node.source,agg_label,node.target))
+        self.instructions.append(Aggregate(node.source,agg_label,node.target,node.group_by))
         for assign in node.assignments:
             self.gen_node(assign)
 
@@ -62,6 +68,15 @@ class IRGenerator:
         value = self.gen_node(node.expr)
         self.instructions.append(Assign(node.name,node.func,value))
 
+    def gen_JoinStmt(self,node: JoinStmt):
+        self.instructions.append(Join(node.left,node.right,node.target,node.key))
+
+    def gen_OrderStmt(self,node: OrderStmt):
+        self.instructions.append(Order(node.source,node.target,node.column,node.descending,node.limit))
+
+    def gen_IndexStmt(self,node: IndexStmt):
+        self.instructions.append(CreateIndex(node.filename,node.column))
+
     def gen_PrintStmt(self,node: PrintStmt):
         for expr in node.expressions:
             value = self.gen_node(expr)
@@ -82,27 +97,46 @@ class IRGenerator:
     def gen_StringLiteral(self,node: StringLiteral):
         return node.value
     
-    def gen_DotAccess(self,node: DotAccess):
-        base = self.gen_node(node.obj)
-        temp = self.new_temp()
-        self.instructions.append(Assign(temp,".",base,node.field))
-        return temp
-    
-    def gen_FunctionCall(self,node: FunctionCall):
-        args = [self.gen_node(arg) for arg in node.args]
-        temp = self.new_temp()
-        self.instructions.append(Assign(temp,f"call {node.name}",args))
-        return temp
-    
-    def gen_BinaryExpr(self,node: BinaryExpr):
-        left = self.gen_node(node.left)
-        right = self.gen_node(node.right)
-        temp = self.new_temp()
-        self.instructions.append(Assign(temp,node.op,left,right))
-        return temp
-    
-    def gen_UnaryExpr(self,node: UnaryExpr):
-        operand = self.gen_node(node.operand)
-        temp = self.new_temp()
-        self.instructions.append(Assign(temp,node.op,operand))
-        return temp
\ No newline at end of file
+    def gen_expression(self,root: Expression) -> Any:
+        """Emits three-address code for an expression tree with an explicit
+        stack, in the same post-order (and temp numbering) as a recursive walk"""
+        values = []
+        stack = [(root,False)]
+
+        while stack:
+            node,expanded = stack.pop()
+
+            if isinstance(node,BinaryExpr):
+                if not expanded:
+                    stack.extend([(node,True),(node.right,False),(node.left,False)])
+                    continue
+                right = values.pop()
+                left = values.pop()
+                temp = self.new_temp()
+                self.instructions.append(Assign(temp,node.op,left,right))
+            elif isinstance(node,UnaryExpr):
+                if not expanded:
+                    stack.extend([(node,True),(node.operand,False)])
+                    continue
+                temp = self.new_temp()
+                self.instructions.append(Assign(temp,node.op,values.pop()))
+            elif isinstance(node,DotAccess):
+                if not expanded:
+                    stack.extend([(node,True),(node.obj,False)])
+                    continue
+                temp = self.new_temp()
+                self.instructions.append(Assign(temp,".",values.pop(),node.field))
+            elif isinstance(node,FunctionCall):
+                if not expanded:
+                    stack.append((node,True))
+                    stack.extend((arg,False) for arg in reversed(node.args))
+                    continue
+                args = values[len(values) - len(node.args):]
+                del values[len(values) - len(node.args):]
+                temp = self.new_temp()
+                self.instructions.append(Assign(temp,f"call {node.name}",args))
+            else:
+                temp = self.gen_node(node)
+            values.append(temp)
+
+        return values.pop()
\ No newline at end of file
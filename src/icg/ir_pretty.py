@@ -10,13 +10,31 @@ class IRPretty:
 
     def format(self,instr):
         if isinstance(instr,LoadTable):
-            return f"LOAD {instr.target} from {instr.source}"
+            line = f"LOAD {instr.target} from {instr.source}"
+            if instr.columns is not None:
+                line += f" [COLUMNS {', '.join(instr.columns)}]"
+            if instr.predicate_temp is not None:
+                line += f" [WHERE {instr.predicate_temp}]"
+                return "\n".join([line] + ["    " + self.format(a) for a in instr.predicate])
+            return line
         elif isinstance(instr,Filter):
             return f"FILTER {instr.input} -> {instr.output} [LABEL {instr.predicate_label}]"
         elif isinstance(instr,Map):
             return f"MAP {instr.input} -> {instr.output} [LABEL {instr.map_label}]"
         elif isinstance(instr,Aggregate):
-            return f"AGGREGATE {instr.input} -> {instr.output} [LABEL {instr.agg_label}]"
+            line = f"AGGREGATE {instr.input} -> {instr.output} [LABEL {instr.agg_label}]"
+            if instr.group_by:
+                line += f" [BY {', '.join(instr.group_by)}]"
+            return line
+        elif isinstance(instr,Join):
+            return f"JOIN {instr.left}, {instr.right} -> {instr.output} [BY {instr.key}]"
+        elif isinstance(instr,Order):
+            line = f"ORDER {instr.input} -> {instr.output} [BY {instr.column}{' DESC' if instr.descending else ''}]"
+            if instr.limit is not None:
+                line += f" [LIMIT {instr.limit}]"
+            return line
+        elif isinstance(instr,CreateIndex):
+            return f"INDEX {instr.source} [ON {instr.column}]"
         elif isinstance(instr,Assign):
             if instr.arg2 is not None:
                 return f"{instr.target} = {instr.arg1} {instr.op} {instr.arg2}"
@@ -31,5 +49,9 @@ class IRPretty:
             return f"FOR {instr.iter_var} IN {instr.table}"
         elif isinstance(instr,ForEnd):
             return "END FOR"
+        elif isinstance(instr,Pipeline):
+            lines = [f"PIPELINE {instr.input} -> {instr.output}"]
+            lines.extend("    " + self.format(stage) for stage in instr.stages)
+            return "\n".join(lines)
         else:
             return f"UNKNOWN INSTRUCTION {instr}"
\ No newline at end of file
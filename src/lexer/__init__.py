@@ -1,18 +1,26 @@
 from .tokens import (
     KEYWORDS,
+    SOFT_KEYWORDS,
     SINGLE_CHARS,
     OPERATORS,
+    OffsetToken,
     Token
 )
 
 from .lexer import (
+    CharLexer,
+    LineIndex,
     Lexer
 )
 
 __all__ = [
     "KEYWORDS",
+    "SOFT_KEYWORDS",
     "SINGLE_CHARS",
     "OPERATORS",
+    "OffsetToken",
     "Token",
+    "CharLexer",
+    "LineIndex",
     "Lexer"
 ]
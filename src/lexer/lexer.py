@@ -1,6 +1,9 @@
-from .tokens import KEYWORDS, SINGLE_CHARS, OPERATORS, Token
+import re
+from bisect import bisect_right
+from .tokens import KEYWORDS, SINGLE_CHARS, OPERATORS, OffsetToken, Token
 
-class Lexer:
+class CharLexer:
+    """Reference lexer that walks the text one character at a time"""
     def __init__(self,text:str):
         self.text = text
         self.pos = 0
@@ -134,4 +137,99 @@ class Lexer:
                 lexeme = self.text[start:self.pos]
                 self.advance()
                 return lexeme
-            self.advance()
\ No newline at end of file
+            self.advance()
+
+KEYWORD_TYPES = {kw: kw.upper() for kw in KEYWORDS}
+PUNCT_TYPES = {**SINGLE_CHARS,**OPERATORS}
+
+# leading whitespace is skipped as part of every match; one alternative per
+# token class, with operators longest first so '>=' wins over '>' and '='
+TOKEN_RE = re.compile(r"\s*(?:" + "|".join([
+    r"(?P<NUMBER>\d+(?:\.\d+)?)",
+    r"(?P<NAME>\w+)",
+    r'"(?P<STRING>[^"]*)"',
+    "(?P<PUNCT>" + "|".join(re.escape(op) for op in sorted(PUNCT_TYPES,key=lambda x: -len(x))) + ")",
+    r"(?P<END>\Z)",
+    r"(?P<ERROR>.)",
+]) + ")",re.DOTALL)
+
+class LineIndex:
+    """Maps text offsets to 1-based (line, column), building the table of
+    line starts only when a position is first asked for"""
+    def __init__(self,text: str):
+        self.text = text
+        self.starts = None
+
+    def position(self,offset: int):
+        if self.starts is None:
+            self.starts = [0] + [m.end() for m in re.finditer("\n",self.text)]
+        line = bisect_right(self.starts,offset)
+        return line,offset - self.starts[line - 1] + 1
+
+class Lexer:
+    """Single-pass lexer driven by one precompiled regex. Produces the same
+    token stream as CharLexer; tokens carry their offset and compute line
+    and column on demand."""
+    def __init__(self,text:str):
+        self.text = text
+        self.lines = LineIndex(text)
+
+    def tokenize(self):
+        text = self.text
+        lines = self.lines
+        tokens = []
+        append = tokens.append
+        pos = 0
+
+        while pos is not None:
+            resume = None
+            for m in TOKEN_RE.finditer(text,pos):
+                kind = m.lastgroup
+                if kind == "NAME":
+                    lex = m.group(kind)
+                    if not (lex[0].isalpha() or lex[0] == "_"):
+                        # \w also matches digits and numerals that are not decimal
+                        resume = m.start(kind)
+                        break
+                    append(OffsetToken(KEYWORD_TYPES.get(lex,"IDENTIFIER"),lex,m.start(kind),lines))
+                elif kind == "PUNCT":
+                    op = m.group(kind)
+                    append(OffsetToken(PUNCT_TYPES[op],op,m.start(kind),lines))
+                elif kind == "NUMBER":
+                    end = m.end()
+                    nxt = text[end:end + 1]
+                    if nxt and (nxt.isdigit() or (nxt == "." and text[end + 1:end + 2].isdigit())):
+                        # continues with a digit that is not decimal, e.g. a superscript
+                        resume = m.start(kind)
+                        break
+                    append(OffsetToken("NUMBER",m.group(kind),m.start(kind),lines))
+                elif kind == "STRING":
+                    append(OffsetToken("STRING_LITERAL",m.group(kind),m.start(kind) - 1,lines))
+                elif kind == "END":
+                    break
+                else:
+                    c = m.group(kind)
+                    if c == '"':
+                        line,col = lines.position(len(text))
+                        raise Exception(f"Unterminated string at line {line} column {col}")
+                    line,col = lines.position(m.start(kind))
+                    raise Exception(f"Unexpected character '{c}' at line {line}, column {col}")
+
+            pos = None
+            if resume is not None:
+                token,pos = self._char_token(resume)
+                append(token)
+
+        append(OffsetToken("EOF","",len(text),lines))
+        return tokens
+
+    def _char_token(self,pos: int):
+        # rare characters the regex classes do not model exactly: defer to CharLexer
+        lexer = CharLexer(self.text)
+        lexer.pos = pos
+        lexer.line,lexer.column = self.lines.position(pos)
+        c = lexer.current()
+        if c.isdigit():
+            line,col = lexer.line,lexer.column
+            return Token("NUMBER",lexer.consume_number(),line,col),lexer.pos
+        raise Exception(f"Unexpected character '{c}' at line {lexer.line}, column {lexer.column}")
@@ -12,7 +12,25 @@ KEYWORDS = {
     "for",
     "in",
     "and",
-    "or"
+    "or",
+    "by",
+    "join",
+    "order",
+    "desc",
+    "limit",
+    "index"
+}
+
+# keywords that only mean something inside their own statements; the parser
+# also takes them wherever a name is expected, so tables and CSV columns
+# called e.g. "order" or "index" can still be referenced
+SOFT_KEYWORDS = {
+    "by",
+    "join",
+    "order",
+    "desc",
+    "limit",
+    "index"
 }
 
 SINGLE_CHARS = {
@@ -39,6 +57,8 @@ OPERATORS = {
 }
 
 class Token:
+    __slots__ = ("type","value","line","column")
+
     def __init__(self,type,value,line,column):
         self.type = type
         self.value = value
@@ -47,3 +67,22 @@ class Token:
 
     def __repr__(self):
         return f"Token({self.type},{self.value},{self.line},{self.column})"
+
+class OffsetToken(Token):
+    """Token that stores its text offset and works out line and column
+    from a shared LineIndex when they are read"""
+    __slots__ = ("offset","lines")
+
+    def __init__(self,type,value,offset,lines):
+        self.type = type
+        self.value = value
+        self.offset = offset
+        self.lines = lines
+
+    @property
+    def line(self):
+        return self.lines.position(self.offset)[0]
+
+    @property
+    def column(self):
+        return self.lines.position(self.offset)[1]
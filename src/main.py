@@ -1,8 +1,10 @@
 import argparse
 import sys
-from src.codegen import Backend,Executor
+from src.codegen import DEFAULT_WORKERS,SORT_MEMORY_BYTES,Backend,Executor,ProgramCache,Session
+from src.catalog import shared_catalog
 
-def run_file(path,verbose=False):
+def run_file(path,verbose=False,chunksize=None,lazy=False,cache=True,workers=DEFAULT_WORKERS,processes=1,
+             sort_memory=SORT_MEMORY_BYTES,temp_dir=None):
     try:
         with open(path,"r") as f:
             source = f.read()
@@ -10,16 +12,26 @@ def run_file(path,verbose=False):
         print(f"Error: File '{path}' not found.")
         return
     
-    backend = Backend(source,verbose=verbose)
-    ir = backend.run()
+    program_cache = ProgramCache() if cache else None
+    ir = program_cache.get(source) if program_cache else None
+    if ir is None:
+        backend = Backend(source,verbose=verbose)
+        ir = backend.run()
+        if program_cache:
+            program_cache.put(source,ir,backend.semantic_analyzer.sources)
+    elif verbose:
+        print("Compiled program loaded from cache.")
 
-    executor = Executor(ir,verbose=verbose)
+    executor = Executor(ir,verbose=verbose,chunksize=chunksize,lazy=lazy,workers=workers,processes=processes,
+                        sort_memory=sort_memory,temp_dir=temp_dir)
     executor.run()
 
 def repl(verbose=False):
     print("DataFlow Interactive Mode")
     print("Type code and press Enter. Type ':quit' to exit.\n")
 
+    # tables and definitions persist from one block to the next
+    session = Session(verbose=verbose)
     buffer = []
 
     while True:
@@ -32,11 +44,10 @@ def repl(verbose=False):
             source = "\n".join(buffer)
             buffer.clear()
 
-            backend = Backend(source,verbose=verbose)
-            ir = backend.run()
-
-            executor = Executor(ir,verbose=verbose)
-            executor.run()
+            try:
+                session.run(source)
+            except Exception as e:
+                print(f"Error: {e}")
             print()
         else:
             buffer.append(line)
@@ -46,13 +57,23 @@ def main():
     parser.add_argument("file",nargs="?",help="Input source file (.dsl)")
     parser.add_argument("-v","--verbose",action="store_true",help="Show compiler internals")
     parser.add_argument("-i","--interactive",action="store_true",help="Start interactive REPL")
+    parser.add_argument("--chunksize",type=int,default=None,help="Stream CSV loads in chunks of this many rows")
+    parser.add_argument("--lazy",action="store_true",help="Only compute tables that a print or for loop needs")
+    parser.add_argument("--workers",type=int,default=DEFAULT_WORKERS,help="Threads for independent statements, 1 runs them in order")
+    parser.add_argument("--processes",type=int,default=1,help="Processes that run filter/map/aggregate chains over row partitions")
+    parser.add_argument("--sort-memory",type=int,default=SORT_MEMORY_BYTES // (1024 * 1024),help="Megabytes a streamed order buffers before spilling sorted runs to disk")
+    parser.add_argument("--temp-dir",default=None,help="Directory for spilled sort runs (default: the system temp directory)")
+    parser.add_argument("--no-cache",action="store_true",help="Do not read or write the on-disk table and program caches")
 
     args = parser.parse_args()
+    if args.no_cache:
+        shared_catalog.columnar = None
 
     if args.interactive:
         repl(verbose=args.verbose)
     elif args.file:
-        run_file(args.file,verbose=args.verbose)
+        run_file(args.file,verbose=args.verbose,chunksize=args.chunksize,lazy=args.lazy,cache=not args.no_cache,workers=args.workers,processes=args.processes,
+                 sort_memory=args.sort_memory * 1024 * 1024,temp_dir=args.temp_dir)
     else:
         print("No input file provided. Use -i for interactive mode.")
         parser.print_help()
@@ -1,7 +1,13 @@
 from .const_fold import ConstantFolder
 from .dead_code import DeadCodeEliminator
+from .fusion import OperatorFuser
+from .predicate_pushdown import PredicatePushdown
+from .projection import ProjectionPushdown
 
 __all__ = [
     "ConstantFolder",
     "DeadCodeEliminator",
+    "OperatorFuser",
+    "PredicatePushdown",
+    "ProjectionPushdown",
 ]
@@ -11,7 +11,11 @@ class ConstantFolder:
     
     def _fold_instr(self, instr):
         if isinstance(instr,Assign):
-            instr.arg1, instr.arg2 = self._fold_expr(instr.op,instr.arg1,instr.arg2)
+            arg1, arg2 = self._fold_expr(instr.op,instr.arg1,instr.arg2)
+            if (arg1, arg2) != (instr.arg1, instr.arg2):
+                # folded to a constant, the op must not be re-applied at runtime
+                instr.op = "="
+            instr.arg1, instr.arg2 = arg1, arg2
         elif isinstance(instr,FunctionFragment):
             instr.body = ConstantFolder(instr.body).fold()
 
@@ -30,19 +30,26 @@ def _collect_names_from_value(val: Any) -> Set[str]:
 
 
 class DeadCodeEliminator:
-    def __init__(self,instructions: List[IRInstruction]):
+    def __init__(self,instructions: List[IRInstruction],eliminate_tables: bool = True):
         self.insructions = list(instructions)
+        self.eliminate_tables = eliminate_tables
+        self.block_assigns = self._block_assigns()
+
+    def _block_assigns(self) -> Set[int]:
+        # an Assign belongs to a block when the run of Assigns it sits in
+        # directly follows a Filter/Map/Aggregate
+        block: Set[int] = set()
+        in_block = False
+        for idx,instr in enumerate(self.insructions):
+            if isinstance(instr,Assign):
+                if in_block:
+                    block.add(idx)
+            else:
+                in_block = isinstance(instr,(Filter,Map,Aggregate))
+        return block
     
     def _is_block_assign(self, idx: int) -> bool:
-        if idx == 0:
-            return False
-
-        prev = self.insructions[idx - 1]
-
-        if isinstance(prev, Assign) and self._is_block_assign(idx - 1):
-            return True
-
-        return isinstance(prev, (Filter, Map, Aggregate))
+        return idx in self.block_assigns
 
     """def _is_block_assign(self, idx: int) -> bool:
         if idx == 0:
@@ -50,11 +57,55 @@ class DeadCodeEliminator:
         prev = self.insructions[idx - 1]
         return isinstance(prev, (Filter, Map, Aggregate))"""
 
+    def _dead_tables(self) -> Set[int]:
+        """Indices of LoadTable/Filter/Map/Aggregate instructions (and their
+        block Assigns) whose table is never read by a print, a for loop or a
+        live downstream block."""
+        live: Set[str] = set()
+        dead: Set[int] = set()
+
+        # consumers always come after producers, so walk backwards
+        for idx in range(len(self.insructions) - 1,-1,-1):
+            instr = self.insructions[idx]
+
+            if isinstance(instr,Print) and isinstance(instr.value,str):
+                live.add(instr.value)
+            elif isinstance(instr,ForBegin):
+                live.add(instr.table)
+            elif isinstance(instr,(Filter,Map,Aggregate)):
+                if instr.output in live:
+                    live.add(instr.input)
+                    continue
+                dead.add(idx)
+                j = idx + 1
+                while j < len(self.insructions) and isinstance(self.insructions[j],Assign):
+                    dead.add(j)
+                    j += 1
+            elif isinstance(instr,Order):
+                if instr.output in live:
+                    live.add(instr.input)
+                else:
+                    dead.add(idx)
+            elif isinstance(instr,Join):
+                if instr.output in live:
+                    live.update((instr.left,instr.right))
+                else:
+                    dead.add(idx)
+            elif isinstance(instr,LoadTable):
+                if instr.target not in live:
+                    dead.add(idx)
+
+        return dead
+
     def eliminate(self) -> List[IRInstruction]:
         used = self._find_used()
+        dead_tables = self._dead_tables() if self.eliminate_tables else set()
         new_instructions = []
 
         for idx,instr in enumerate(self.insructions):
+            if idx in dead_tables:
+                continue
+
             if isinstance(instr,Assign) and self._is_block_assign(idx):
                 new_instructions.append(instr)
                 continue
@@ -0,0 +1,91 @@
+from typing import Dict, List, Set, Tuple
+from src.icg.ir import *
+
+BLOCK_INSTRUCTIONS = (Filter,Map,Aggregate)
+
+def _has_call(assigns: List[IRInstruction]) -> bool:
+    return any(isinstance(a.op,str) and a.op.startswith("call ") for a in assigns)
+
+def table_consumers(instructions: List[IRInstruction]) -> Dict[str,int]:
+    """Number of instructions that read each table"""
+    counts: Dict[str,int] = {}
+    for instr in instructions:
+        if isinstance(instr,(Filter,Map,Aggregate,Pipeline,Order)):
+            name = instr.input
+        elif isinstance(instr,ForBegin):
+            name = instr.table
+        elif isinstance(instr,Print) and isinstance(instr.value,str):
+            name = instr.value
+        elif isinstance(instr,Join):
+            counts[instr.left] = counts.get(instr.left,0) + 1
+            name = instr.right
+        else:
+            continue
+        counts[name] = counts.get(name,0) + 1
+    return counts
+
+class OperatorFuser:
+    """Fuses chains of top-level Filter/Map/Aggregate blocks whose intermediate
+    tables are read by exactly one following block into a single Pipeline
+    instruction, so the chain runs in one pass and the intermediate tables
+    are never materialized."""
+    def __init__(self,instructions: List[IRInstruction]):
+        self.instructions = list(instructions)
+
+    def _split_units(self) -> List[Tuple[List[IRInstruction],int]]:
+        # a unit is a block instruction with its Assigns, or a single instruction,
+        # paired with its for-loop nesting depth
+        units = []
+        depth = 0
+        i = 0
+        while i < len(self.instructions):
+            instr = self.instructions[i]
+            if isinstance(instr,BLOCK_INSTRUCTIONS):
+                j = i + 1
+                while j < len(self.instructions) and isinstance(self.instructions[j],Assign):
+                    j += 1
+                units.append((self.instructions[i:j],depth))
+                i = j
+                continue
+
+            if isinstance(instr,ForEnd):
+                depth -= 1
+            units.append(([instr],depth))
+            if isinstance(instr,ForBegin):
+                depth += 1
+            i += 1
+        return units
+
+    def fuse(self) -> List[IRInstruction]:
+        units = self._split_units()
+        consumers = table_consumers(self.instructions)
+
+        chains: Dict[int,List[IRInstruction]] = {}
+        producers: Dict[str,int] = {}
+        absorbed: Set[int] = set()
+
+        for idx,(body,depth) in enumerate(units):
+            head = body[0]
+            if depth != 0 or not isinstance(head,BLOCK_INSTRUCTIONS):
+                continue
+
+            src = producers.get(head.input)
+            fusable = not (isinstance(head,Aggregate) and _has_call(body[1:]))
+            if src is not None and fusable and consumers.get(head.input) == 1:
+                stages = chains.pop(src) if src in chains else list(units[src][0])
+                chains[idx] = stages + body
+                absorbed.add(src)
+
+            if not isinstance(head,Aggregate):
+                producers[head.output] = idx
+
+        fused = []
+        for idx,(body,_) in enumerate(units):
+            if idx in absorbed:
+                continue
+            if idx in chains:
+                stages = chains[idx]
+                fused.append(Pipeline(stages[0].input,body[0].output,stages))
+            else:
+                fused.extend(body)
+        return fused
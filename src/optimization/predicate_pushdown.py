@@ -0,0 +1,188 @@
+from typing import Dict, List, Optional, Set, Tuple
+from src.icg.ir import *
+from .fusion import table_consumers
+
+class PredicatePushdown:
+    """Moves the conjuncts of top-level filter predicates that only read
+    columns of the loaded CSV into the LoadTable, so rejected rows are
+    dropped chunk by chunk while the file is parsed. A conjunct travels up
+    through filters and maps as long as every table on the way is read by
+    that chain alone, and a filter with nothing left is removed; conjuncts
+    that read a mapped column stay in the filter.
+
+    A map renumbers its rows, so it is only passed when it reads the whole
+    loaded table, whose labels are already 0, 1, ...; the map then keeps
+    the labels of the filtered load instead of renumbering them."""
+    def __init__(self,instructions: List[IRInstruction],schemas: Dict[str,Dict[str,str]]):
+        self.instructions = list(instructions)
+        self.schemas = schemas
+        self.counter = 0
+
+    def _fresh(self) -> str:
+        # '$' cannot start an identifier, so the name never shadows a column
+        self.counter += 1
+        return f"$and{self.counter}"
+
+    def _block(self,idx: int) -> List[IRInstruction]:
+        j = idx + 1
+        while j < len(self.instructions) and isinstance(self.instructions[j],Assign):
+            j += 1
+        return self.instructions[idx + 1:j]
+
+    def _conjuncts(self,root,defs: Dict[str,Assign]) -> List:
+        conjuncts = []
+        stack = [root]
+        while stack:
+            v = stack.pop()
+            a = defs.get(v) if isinstance(v,str) else None
+            if a is not None and a.op == "and":
+                stack.append(a.arg2)
+                stack.append(a.arg1)
+            else:
+                conjuncts.append(v)
+        return conjuncts
+
+    def _closure(self,root,defs: Dict[str,Assign]) -> Set[str]:
+        targets: Set[str] = set()
+        stack = [root]
+        while stack:
+            v = stack.pop()
+            if not isinstance(v,str) or v in targets or v not in defs:
+                continue
+            targets.add(v)
+            a = defs[v]
+            args = a.arg1 if isinstance(a.arg1,list) else [a.arg1]
+            stack.extend(args + [a.arg2])
+        return targets
+
+    def _refs(self,root,closure: Set[str],defs: Dict[str,Assign]) -> Set[str]:
+        refs = {root} - closure if isinstance(root,str) else set()
+        for target in closure:
+            a = defs[target]
+            args = a.arg1 if isinstance(a.arg1,list) else [a.arg1]
+            refs.update(v for v in args + [a.arg2] if isinstance(v,str) and v not in closure)
+        return refs
+
+    def _combine(self,assigns: List[Assign],roots: List) -> Tuple[List[Assign],object]:
+        root = roots[0]
+        for other in roots[1:]:
+            target = self._fresh()
+            assigns.append(Assign(target,"and",root,other))
+            root = target
+        return assigns,root
+
+    def _source(self,table: str,producers: Dict[str,int],consumers: Dict[str,int],
+                whole: Set[int]) -> Tuple[Optional[int],List[int]]:
+        # walk up single-consumer filters, and maps of a whole load, to the
+        # LoadTable feeding them
+        maps = []
+        while consumers.get(table) == 1 and table in producers:
+            instr = self.instructions[producers[table]]
+            if isinstance(instr,LoadTable):
+                return producers[table],maps
+            if isinstance(instr,Map) and producers[table] in whole:
+                maps.append(producers[table])
+            elif not isinstance(instr,Filter):
+                return None,[]
+            table = instr.input
+        return None,[]
+
+    def push(self) -> List[IRInstruction]:
+        consumers = table_consumers(self.instructions)
+        producers: Dict[str,int] = {}
+        # filter index -> its rewritten block, None when the filter is dropped
+        rewritten: Dict[int,Optional[List[Assign]]] = {}
+        # maps reading every row of a load, in file order, and those of them
+        # a filter below was pushed through, whose output is no longer whole
+        whole: Set[int] = set()
+        narrowed: Set[int] = set()
+        depth = 0
+
+        for idx,instr in enumerate(self.instructions):
+            if isinstance(instr,ForBegin):
+                depth += 1
+            elif isinstance(instr,ForEnd):
+                depth -= 1
+            if depth != 0:
+                continue
+
+            if isinstance(instr,LoadTable):
+                producers[instr.target] = idx
+            elif isinstance(instr,Map):
+                src = producers.get(instr.input)
+                if src is not None and ((src in whole and src not in narrowed)
+                                        or (isinstance(self.instructions[src],LoadTable) and not self.instructions[src].predicate)):
+                    whole.add(idx)
+                producers[instr.output] = idx
+            elif isinstance(instr,Filter):
+                producers[instr.output] = idx
+                load_idx,maps = self._source(instr.input,producers,consumers,whole)
+                if load_idx is None or not self._push_filter(idx,load_idx,maps,rewritten):
+                    continue
+                for m in maps:
+                    self.instructions[m].keep_labels = True
+                narrowed.update(maps)
+                if rewritten[idx] is None:
+                    # the filter is gone, its input's producer now writes its output
+                    src = producers.pop(instr.input)
+                    producer = self.instructions[src]
+                    if isinstance(producer,LoadTable):
+                        producer.target = instr.output
+                    else:
+                        producer.output = instr.output
+                    producers[instr.output] = src
+
+        pushed = []
+        idx = 0
+        while idx < len(self.instructions):
+            instr = self.instructions[idx]
+            if idx not in rewritten:
+                pushed.append(instr)
+                idx += 1
+                continue
+            block = rewritten[idx]
+            if block is not None:
+                pushed.append(instr)
+                pushed.extend(block)
+            idx += 1 + len(self._block(idx))
+        return pushed
+
+    def _push_filter(self,idx: int,load_idx: int,maps: List[int],rewritten: Dict[int,Optional[List[Assign]]]) -> bool:
+        instr = self.instructions[idx]
+        load = self.instructions[load_idx]
+        assigns = self._block(idx)
+        defs = {a.target: a for a in assigns}
+
+        base = set(self.schemas.get(load.target,{}))
+        # columns a map on the way adds or overwrites are not the CSV's
+        derived = (set(self.schemas.get(instr.input,{})) - base).union(*(self.instructions[m].columns for m in maps))
+        if not base:
+            return False
+
+        pushed,kept = [],[]
+        for root in self._conjuncts(instr.predicate_temp,defs):
+            closure = self._closure(root,defs)
+            if self._refs(root,closure,defs) & derived:
+                kept.append((root,closure))
+            else:
+                pushed.append((root,closure))
+        if not pushed:
+            return False
+
+        def chain(parts):
+            targets = set().union(*(closure for _,closure in parts))
+            return self._combine([a for a in assigns if a.target in targets],[root for root,_ in parts])
+
+        pushed_assigns,pushed_root = chain(pushed)
+        if load.predicate:
+            pushed_assigns,pushed_root = self._combine(load.predicate + pushed_assigns,[load.predicate_temp,pushed_root])
+        load.predicate = pushed_assigns
+        load.predicate_temp = pushed_root
+
+        if not kept:
+            rewritten[idx] = None
+            return True
+
+        kept_assigns,instr.predicate_temp = chain(kept)
+        rewritten[idx] = kept_assigns
+        return True
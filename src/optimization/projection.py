@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Set
+from src.icg.ir import *
+
+def _block_refs(assigns: List[IRInstruction]) -> Set[str]:
+    # every name a block reads; temps and literals are dropped later when the
+    # names are matched against the loaded table's schema
+    refs: Set[str] = set()
+    for a in assigns:
+        args = a.arg1 if isinstance(a.arg1,list) else [a.arg1]
+        for v in args + [a.arg2]:
+            if isinstance(v,str):
+                refs.add(v)
+    return refs
+
+class ProjectionPushdown:
+    """Computes which columns each loaded table needs across every downstream
+    filter/map/aggregate/print/for use and records them on its LoadTable, so
+    the CSV reader only parses those columns."""
+    def __init__(self,instructions: List[IRInstruction],schemas: Dict[str,Dict[str,str]]):
+        self.instructions = list(instructions)
+        self.schemas = schemas
+        # table name -> needed column names, None meaning every column
+        self.needed: Dict[str,Optional[Set[str]]] = {}
+
+    def _require(self,table: str,names: Optional[Set[str]]):
+        if table in self.needed and self.needed[table] is None:
+            return
+        if names is None:
+            self.needed[table] = None
+        else:
+            self.needed.setdefault(table,set()).update(names)
+
+    def _blocks(self) -> Dict[int,List[IRInstruction]]:
+        # index of each block instruction -> its Assigns (For loops -> their whole body)
+        blocks = {}
+        open_loops = []
+        for idx,instr in enumerate(self.instructions):
+            if isinstance(instr,(Filter,Map,Aggregate)):
+                j = idx + 1
+                while j < len(self.instructions) and isinstance(self.instructions[j],Assign):
+                    j += 1
+                blocks[idx] = self.instructions[idx + 1:j]
+            elif isinstance(instr,ForBegin):
+                open_loops.append(idx)
+            elif isinstance(instr,ForEnd) and open_loops:
+                start = open_loops.pop()
+                blocks[start] = self.instructions[start + 1:idx]
+        return blocks
+
+    def _loop_refs(self,instr: ForBegin,body: List[IRInstruction]) -> Optional[Set[str]]:
+        refs: Set[str] = set()
+        row_names = (instr.iter_var,"row")
+        for b in body:
+            if isinstance(b,Print):
+                if b.value in row_names:
+                    return None
+                if isinstance(b.value,str):
+                    refs.add(b.value)
+            elif isinstance(b,Assign):
+                if b.op == "." and b.arg1 in row_names:
+                    refs.add(b.arg2)
+                    continue
+                args = b.arg1 if isinstance(b.arg1,list) else [b.arg1]
+                if any(v in row_names for v in args + [b.arg2]):
+                    return None
+                refs.update(_block_refs([b]))
+            else:
+                # nested statements: keep the whole row available
+                return None
+        return refs
+
+    def _output_needs(self,table: str) -> Optional[Set[str]]:
+        needs = self.needed.get(table,set())
+        return None if needs is None else set(needs)
+
+    def push(self) -> List[IRInstruction]:
+        blocks = self._blocks()
+
+        # consumers always come after producers, so walk backwards
+        for idx in range(len(self.instructions) - 1,-1,-1):
+            instr = self.instructions[idx]
+
+            if isinstance(instr,Print) and isinstance(instr.value,str):
+                self._require(instr.value,None)
+            elif isinstance(instr,ForBegin):
+                self._require(instr.table,self._loop_refs(instr,blocks.get(idx,[])))
+            elif isinstance(instr,Filter):
+                needs = self._output_needs(instr.output)
+                if needs is not None:
+                    needs |= _block_refs(blocks[idx])
+                    if isinstance(instr.predicate_temp,str):
+                        needs.add(instr.predicate_temp)
+                self._require(instr.input,needs)
+            elif isinstance(instr,Map):
+                needs = self._output_needs(instr.output)
+                if needs is not None:
+                    needs = (needs - set(instr.columns)) | _block_refs(blocks[idx])
+                self._require(instr.input,needs)
+            elif isinstance(instr,Aggregate):
+                self._require(instr.input,_block_refs(blocks[idx]) | set(instr.group_by))
+            elif isinstance(instr,Order):
+                needs = self._output_needs(instr.output)
+                if needs is not None:
+                    needs.add(instr.column)
+                self._require(instr.input,needs)
+            elif isinstance(instr,Join):
+                needs = self._output_needs(instr.output)
+                if needs is not None:
+                    # suffixed right columns are read under their own name
+                    suffix = f"_{instr.right}"
+                    needs |= {n[:-len(suffix)] for n in needs if n.endswith(suffix)}
+                    needs.add(instr.key)
+                self._require(instr.left,needs)
+                self._require(instr.right,None if needs is None else set(needs))
+            elif isinstance(instr,LoadTable):
+                if instr.predicate_temp is not None:
+                    # columns read by a pushed-down predicate are parsed too
+                    self._require(instr.target,_block_refs(instr.predicate) | {instr.predicate_temp})
+                self._project(instr)
+
+        return self.instructions
+
+    def _project(self,instr: LoadTable):
+        needs = self.needed.get(instr.target,set())
+        schema = self.schemas.get(instr.target)
+        if needs is None or not schema:
+            instr.columns = None
+            return
+
+        columns = [col for col in schema if col in needs]
+        if not columns:
+            # nothing is read (e.g. only count(1)), but the row count still matters
+            columns = [next(iter(schema))]
+        instr.columns = columns if len(columns) < len(schema) else None
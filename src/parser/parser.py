@@ -1,6 +1,36 @@
-from src.lexer import Token
+from src.lexer import SOFT_KEYWORDS, Token
 from src.ast import *
 
+# binding strength of the binary operators, all left associative
+BINARY_PRECEDENCE = {
+    "AND": 1, "OR": 1,
+    "EQ": 2, "NEQ": 2, "GT": 2, "LT": 2, "GTE": 2, "LTE": 2,
+    "PLUS": 3, "MINUS": 3,
+    "STAR": 4, "SLASH": 4,
+}
+
+# tokens that can be a table, column or variable name
+NAME_TYPES = {"IDENTIFIER"} | {kw.upper() for kw in SOFT_KEYWORDS}
+
+class ExprFrame:
+    """Operand and operator stacks of one expression being parsed: the whole
+    expression, a parenthesized group, or one argument of a call"""
+    def __init__(self,kind,negate=None,name=None):
+        self.kind = kind
+        self.negate = negate
+        self.name = name
+        self.args = []
+        self.operands = []
+        self.operators = []
+
+    def reduce(self,prec):
+        # fold every pending operator that binds at least as tightly as prec
+        while self.operators and self.operators[-1][0] >= prec:
+            _,op = self.operators.pop()
+            right = self.operands.pop()
+            left = self.operands.pop()
+            self.operands.append(BinaryExpr(left,op,right))
+
 class Parser:
     def __init__(self,tokens):
         self.tokens = tokens
@@ -30,6 +60,12 @@ class Parser:
             raise Exception(f"Expected {' or '.join(types)} at line {self.current().line}")
         return tok
     
+    def name(self):
+        tok = self.match(*NAME_TYPES)
+        if not tok:
+            raise Exception(f"Expected IDENTIFIER at line {self.current().line}")
+        return tok.value
+
     def consume(self,type):
         tok = self.expect(type)
         return tok.value
@@ -53,6 +89,12 @@ class Parser:
             return self.parse_map()
         elif tok.type == "AGGREGATE":
             return self.parse_aggregate()
+        elif tok.type == "JOIN":
+            return self.parse_join()
+        elif tok.type == "ORDER":
+            return self.parse_order()
+        elif tok.type == "INDEX":
+            return self.parse_index()
         elif tok.type == "PRINT":
             return self.parse_print()
         elif tok.type == "FOR":
@@ -62,14 +104,14 @@ class Parser:
     
     def parse_load(self):
         self.expect("LOAD")
-        name = self.expect("IDENTIFIER").value
+        name = self.name()
         self.expect("FROM")
         filename = self.expect("STRING_LITERAL").value
         return LoadStmt(name,filename)
     
     def parse_filter(self):
         self.expect("FILTER")
-        target = self.expect("IDENTIFIER").value
+        target = self.name()
         self.expect("LBRACE")
         self.match("WHERE")
         pred = self.expression()
@@ -78,14 +120,14 @@ class Parser:
     
     def parse_map(self):
         self.expect("MAP")
-        target = self.expect("IDENTIFIER").value
+        target = self.name()
         self.expect("ON")
-        source = self.expect("IDENTIFIER").value
+        source = self.name()
         self.expect("LBRACE")
 
         assigns = []
         while not self.match("RBRACE"):
-            name = self.expect("IDENTIFIER").value
+            name = self.name()
             self.expect("EQUAL")
             expr = self.expression()
             assigns.append(MapAssign(name,expr))
@@ -95,24 +137,61 @@ class Parser:
     
     def parse_aggregate(self):
         self.expect("AGGREGATE")
-        target = self.expect("IDENTIFIER").value
+        target = self.name()
         self.expect("ON")
-        source = self.expect("IDENTIFIER").value
+        source = self.name()
+
+        group_by = []
+        if self.match("BY"):
+            group_by.append(self.name())
+            while self.match("COMMA"):
+                group_by.append(self.name())
         self.expect("LBRACE")
 
         assigns = []
         while not self.match("RBRACE"):
-            name = self.expect("IDENTIFIER").value
+            name = self.name()
             self.expect("EQUAL")
-            func = self.expect("IDENTIFIER").value
+            func = self.name()
             self.expect("LPAREN")
             expr = self.expression()
             self.expect("RPAREN")
             assigns.append(AggAssign(name,func,expr))
             self.match("COMMA")
 
-        return AggregateStmt(target,source,assigns)
+        return AggregateStmt(target,source,assigns,group_by)
     
+    def parse_join(self):
+        self.expect("JOIN")
+        target = self.name()
+        self.expect("ON")
+        left = self.name()
+        self.expect("COMMA")
+        right = self.name()
+        self.expect("BY")
+        key = self.name()
+        return JoinStmt(target,left,right,key)
+
+    def parse_order(self):
+        self.expect("ORDER")
+        target = self.name()
+        self.expect("ON")
+        source = self.name()
+        self.expect("BY")
+        column = self.name()
+        descending = self.match("DESC") is not None
+        limit = None
+        if self.match("LIMIT"):
+            limit = float(self.expect("NUMBER").value)
+        return OrderStmt(target,source,column,descending,limit)
+
+    def parse_index(self):
+        self.expect("INDEX")
+        table = self.name()
+        self.expect("ON")
+        column = self.name()
+        return IndexStmt(table,column)
+
     def parse_print(self):
         self.expect("PRINT")
         expr_list = [self.expression()]
@@ -122,9 +201,9 @@ class Parser:
     
     def parse_for(self):
         self.expect("FOR")
-        iter_var = self.expect("IDENTIFIER").value
+        iter_var = self.name()
         self.expect("IN")
-        source = self.expect("IDENTIFIER").value
+        source = self.name()
         self.expect("LBRACE")
         body = []
         while not self.match("RBRACE"):
@@ -133,83 +212,84 @@ class Parser:
     
     #expressions
     def expression(self):
-        return self.parse_logic()
-    
-    def parse_logic(self):
-        expr = self.parse_rel()
-        while self.current().type in ("AND", "OR"):
-            op = self.current().value
-            self.advance()
-            right = self.parse_rel()
-            expr = BinaryExpr(expr,op,right)
-        return expr
-    
-    def parse_rel(self):
-        expr = self.parse_add()
-        while self.current().type in ("EQ","NEQ","GT","LT","GTE","LTE"):
-            op = self.current().value
-            self.advance()
-            right = self.parse_add()
-            expr = BinaryExpr(expr,op,right)
-        return expr
-    
-    def parse_add(self):
-        expr = self.parse_mul()
-        while self.current().type in ("PLUS","MINUS"):
-            op = self.current().value
-            self.advance()
-            right = self.parse_mul()
-            expr = BinaryExpr(expr,op,right)
-        return expr
-    
-    def parse_mul(self):
-        expr = self.parse_unary()
-        while self.current().type in ("STAR","SLASH"):
-            op = self.current().value
-            self.advance()
-            right = self.parse_unary()
-            expr = BinaryExpr(expr,op,right)
-        return expr
-    
-    def parse_unary(self):
+        """Precedence climbing with explicit operator/operand stacks, so deeply
+        nested or very long expressions never recurse. Parentheses and call
+        arguments open a frame that is closed by the matching RPAREN."""
+        frames = [ExprFrame("expr")]
+
+        while True:
+            node = self._operand(frames)
+            if node is None:
+                # an LPAREN or a call opened a new frame
+                continue
+
+            while True:
+                frame = frames[-1]
+                frame.operands.append(node)
+
+                tok = self.current()
+                prec = BINARY_PRECEDENCE.get(tok.type)
+                if prec is not None:
+                    frame.reduce(prec)
+                    frame.operators.append((prec,tok.value))
+                    self.advance()
+                    break
+
+                frame.reduce(0)
+                expr = frame.operands.pop()
+                if frame.kind == "expr":
+                    return expr
+
+                if frame.kind == "call":
+                    frame.args.append(expr)
+                    if self.match("COMMA"):
+                        frame.operands,frame.operators = [],[]
+                        break
+                    self.expect("RPAREN")
+                    node = FunctionCall(frame.name,frame.args)
+                else:
+                    self.expect("RPAREN")
+                    node = expr
+
+                frames.pop()
+                if frame.negate:
+                    node = UnaryExpr(frame.negate,node)
+
+    def _operand(self,frames):
+        # parses one [ "-" ] <primary>; returns None after opening a frame
+        negate = None
         if self.current().type == "MINUS":
-            op = self.current().value
+            negate = self.current().value
             self.advance()
-            operand = self.parse_primary()
-            return UnaryExpr(op,operand)
-        return self.parse_primary()
-    
-    def parse_primary(self):
-        tok = self.current()
 
-        if tok.type == "IDENTIFIER":
+        tok = self.current()
+        if tok.type in NAME_TYPES:
             self.advance()
             node = Identifier(tok.value)
 
             if self.current().type == "LPAREN":
                 self.expect("LPAREN")
-                args = []
-                if self.current().type != "RPAREN":
-                    args.append(self.expression())
-                    while self.match("COMMA"):
-                        args.append(self.expression())
-                self.expect("RPAREN")
-                return FunctionCall(node.name,args)
-
-            if self.match("DOT"):
-                field = self.expect("IDENTIFIER").value
-                return DotAccess(node,field)
-            
-            return node
+                if self.current().type == "RPAREN":
+                    self.expect("RPAREN")
+                    node = FunctionCall(node.name,[])
+                else:
+                    frames.append(ExprFrame("call",negate,node.name))
+                    return None
+            elif self.match("DOT"):
+                field = self.name()
+                node = DotAccess(node,field)
         elif tok.type == "NUMBER":
             self.advance()
-            return NumberLiteral(float(tok.value))
+            node = NumberLiteral(float(tok.value))
         elif tok.type == "STRING_LITERAL":
             self.advance()
-            return StringLiteral(tok.value)
+            node = StringLiteral(tok.value)
         elif self.match("LPAREN"):
-            expr = self.expression()
-            self.expect("RPAREN")
-            return expr
-        
-        raise Exception(f"Unexpected token {tok.type} at line {tok.line}")
\ No newline at end of file
+            frames.append(ExprFrame("paren",negate))
+            return None
+        else:
+            raise Exception(f"Unexpected token {tok.type} at line {tok.line}")
+
+        if negate:
+            node = UnaryExpr(negate,node)
+        return node
@@ -1,24 +1,10 @@
-import pandas as pd
+from src.catalog import shared_catalog
 from .symbol_table import SymbolTable
-from .type_rules import check_binary_expr,check_unary_expr,check_aggregrate_function
+from .type_rules import check_binary_expr,check_unary_expr,check_aggregrate_function,numeric_compatible
 from src.ast import *
 
 def schema_from_csv(filename):
-    try:
-        df = pd.read_csv(filename,nrows=10)
-    except Exception as e:
-        raise Exception(f"Failed to load CSV '{filename}: {e}")
-    
-    schema = {}
-    for col in df.columns:
-        dtype = df[col].dtype
-        if pd.api.types.is_integer_dtype(dtype):
-            schema[col] = "int"
-        elif pd.api.types.is_float_dtype(dtype):
-            schema[col] = "float"
-        else:
-            schema[col] = "string"
-    return schema
+    return shared_catalog.schema(filename)
 
 class SemanticAnalyzer:
     def __init__(self):
@@ -30,8 +16,14 @@ class SemanticAnalyzer:
         self.global_table.define("count","function","count(any) -> number")
 
         self.table_schemas = {}
+        # csv file name -> schema, for every file the program loads
+        self.sources = {}
+        # loaded table name -> its csv file name
+        self.table_files = {}
 
     def analyze(self,node,in_aggregate=False):
+        if isinstance(node,(BinaryExpr,UnaryExpr,DotAccess,FunctionCall)):
+            return self.analyze_expression(node,in_aggregate)
         method_name = f'visit_{type(node).__name__}'
         visitor = getattr(self,method_name,self.generic_visit)
         return visitor(node,in_aggregate)
@@ -45,6 +37,8 @@ class SemanticAnalyzer:
     
     def visit_LoadStmt(self,node: LoadStmt,in_aggregate=False):
         table_schema = schema_from_csv(node.filename)
+        self.sources[node.filename] = dict(table_schema)
+        self.table_files[node.name] = node.filename
         self.table_schemas[node.name] = table_schema
         self.current_table.define(node.name,"table",table_schema)
 
@@ -104,10 +98,20 @@ class SemanticAnalyzer:
         for col_name,col_type in src_schema.items():
             self.current_table.define(col_name,"column",col_type)
 
+        # group columns come first in the output, one row per distinct key
         agg_schema = {}
+        for col_name in node.group_by:
+            if col_name not in src_schema:
+                raise Exception(f"Unknown group column '{col_name}' in aggregate")
+            if col_name in agg_schema:
+                raise Exception(f"Duplicate group column '{col_name}' in aggregate")
+            agg_schema[col_name] = src_schema[col_name]
+
         for assign in node.assignments:
             expr_type = self.analyze(assign.expr,in_aggregate=True)
             col_type = check_aggregrate_function(assign.func,expr_type)
+            if assign.name in node.group_by:
+                raise Exception(f"Aggregate '{assign.name}' shadows a group column")
             self.current_table.define(assign.name,"column",col_type)
             agg_schema[assign.name] = col_type
 
@@ -116,6 +120,57 @@ class SemanticAnalyzer:
         self.table_schemas[node.target] = agg_schema
         self.current_table.define(node.target,"table",agg_schema)
 
+    def visit_JoinStmt(self,node: JoinStmt,in_aggregate=False):
+        left_schema = self.table_schemas.get(node.left)
+        if not left_schema:
+            raise Exception(f"Undefined source '{node.left}' in join")
+        right_schema = self.table_schemas.get(node.right)
+        if not right_schema:
+            raise Exception(f"Undefined source '{node.right}' in join")
+
+        for name,schema in ((node.left,left_schema),(node.right,right_schema)):
+            if node.key not in schema:
+                raise Exception(f"Join key '{node.key}' not found in '{name}'")
+        left_type,right_type = left_schema[node.key],right_schema[node.key]
+        if left_type != right_type and not numeric_compatible(left_type,right_type):
+            raise Exception(f"Type error: join key '{node.key}' is {left_type} in '{node.left}' but {right_type} in '{node.right}'")
+
+        # the key appears once; other right columns the left already has get a suffix
+        join_schema = left_schema.copy()
+        for col_name,col_type in right_schema.items():
+            if col_name == node.key:
+                continue
+            out_name = f"{col_name}_{node.right}" if col_name in left_schema else col_name
+            if out_name in join_schema:
+                raise Exception(f"Duplicate column '{out_name}' in join")
+            join_schema[out_name] = col_type
+
+        self.table_schemas[node.target] = join_schema
+        self.current_table.define(node.target,"table",join_schema)
+
+    def visit_OrderStmt(self,node: OrderStmt,in_aggregate=False):
+        src_schema = self.table_schemas.get(node.source)
+        if not src_schema:
+            raise Exception(f"Undefined source '{node.source}' in order")
+        if node.column not in src_schema:
+            raise Exception(f"Order column '{node.column}' not found in '{node.source}'")
+        if node.limit is not None:
+            if node.limit != int(node.limit) or node.limit < 1:
+                raise Exception(f"Order limit must be a positive integer, got {node.limit:g}")
+            node.limit = int(node.limit)
+
+        self.table_schemas[node.target] = src_schema.copy()
+        self.current_table.define(node.target,"table",self.table_schemas[node.target])
+
+    def visit_IndexStmt(self,node: IndexStmt,in_aggregate=False):
+        if node.table not in self.table_schemas:
+            raise Exception(f"Undefined table '{node.table}' in index")
+        if node.table not in self.table_files:
+            raise Exception(f"Index table '{node.table}' is not a loaded table")
+        if node.column not in self.table_schemas[node.table]:
+            raise Exception(f"Index column '{node.column}' not found in '{node.table}'")
+        node.filename = self.table_files[node.table]
+
     def visit_PrintStmt(self,node: PrintStmt,in_aggregate=False):
         for expr in node.expressions:
             self.analyze(expr,in_aggregate)
@@ -137,15 +192,47 @@ class SemanticAnalyzer:
 
         self.current_table = self.current_table.pop_scope()
 
-    def visit_BinaryExpr(self,node: BinaryExpr,in_aggregate=False):
-        left_type = self.analyze(node.left,in_aggregate)
-        right_type = self.analyze(node.right,in_aggregate)
-        return check_binary_expr(left_type,node.op,right_type)
-    
-    def visit_UnaryExpr(self,node: UnaryExpr,in_aggregate=False):
-        operand_type = self.analyze(node.operand,in_aggregate)
-        return check_unary_expr(node.op,operand_type)
-    
+    def analyze_expression(self,root,in_aggregate=False):
+        """Types an expression tree with an explicit stack: children are typed
+        left to right before their parent, as a recursive walk would"""
+        types = []
+        stack = [(root,False)]
+
+        while stack:
+            node,expanded = stack.pop()
+
+            if isinstance(node,BinaryExpr):
+                if not expanded:
+                    stack.extend([(node,True),(node.right,False),(node.left,False)])
+                    continue
+                right_type = types.pop()
+                left_type = types.pop()
+                types.append(check_binary_expr(left_type,node.op,right_type))
+            elif isinstance(node,UnaryExpr):
+                if not expanded:
+                    stack.extend([(node,True),(node.operand,False)])
+                    continue
+                types.append(check_unary_expr(node.op,types.pop()))
+            elif isinstance(node,DotAccess):
+                if not expanded:
+                    stack.extend([(node,True),(node.obj,False)])
+                    continue
+                types.append(self.check_field(node,types.pop()))
+            elif isinstance(node,FunctionCall):
+                if not expanded:
+                    if not in_aggregate and node.name in ("sum","avg","count"):
+                        raise Exception(f"Aggregate function '{node.name}' cannot be used outside aggregate block")
+                    stack.append((node,True))
+                    stack.extend((arg,False) for arg in reversed(node.args))
+                    continue
+                arg_types = types[len(types) - len(node.args):]
+                del types[len(types) - len(node.args):]
+                types.append(check_aggregrate_function(node.name,arg_types[0] if arg_types else None))
+            else:
+                types.append(self.analyze(node,in_aggregate))
+
+        return types.pop()
+
     def visit_Identifier(self,node: Identifier,in_aggregate=False):
         sym = self.current_table.lookup(node.name)
         if not sym:
@@ -160,17 +247,10 @@ class SemanticAnalyzer:
     def visit_StringLiteral(self,node: StringLiteral,in_aggregate=False):
         return "string"
     
-    def visit_DotAccess(self,node: DotAccess,in_aggregate=False):
-        obj_type = self.analyze(node.obj,in_aggregate)
+    def check_field(self,node: DotAccess,obj_type):
         if not isinstance(obj_type,dict):
             raise Exception(f"Cannot access field '{node.field}' of non-row type")
         field_sym = self.current_table.lookup(node.field)
         if not field_sym:
             raise Exception(f"Field '{node.field}' not found in row")
-        return field_sym.type
-
-    def visit_FunctionCall(self,node: FunctionCall,in_aggregate=False):
-        if not in_aggregate and node.name in ("sum","avg","count"):
-            raise Exception(f"Aggregate function '{node.name}' cannot be used outside aggregate block")
-        arg_types = [self.analyze(arg,in_aggregate) for arg in node.args]
-        return check_aggregrate_function(node.name,arg_types[0] if arg_types else None)
\ No newline at end of file
+        return field_sym.type
\ No newline at end of file
@@ -0,0 +1,32 @@
+import pytest
+from src.catalog import ColumnarCache, IndexStore, shared_catalog
+
+@pytest.fixture(autouse=True)
+def catalog(tmp_path,monkeypatch):
+    """The shared catalog with no tables in memory and its on-disk caches
+    in a temporary directory, so no test sees another's tables"""
+    monkeypatch.setenv("DATAFLOW_CACHE_DIR",str(tmp_path / "cache"))
+    monkeypatch.setattr(shared_catalog,"columnar",ColumnarCache())
+    monkeypatch.setattr(shared_catalog,"indexes",IndexStore())
+    # a Session turns this on for the rest of the process
+    monkeypatch.setattr(shared_catalog,"keep_tables",False)
+    shared_catalog.invalidate()
+    yield shared_catalog
+    shared_catalog.invalidate()
+
+@pytest.fixture
+def employees(tmp_path) -> str:
+    path = tmp_path / "employees.csv"
+    path.write_text(
+        "name,salary,department,age\n"
+        "Alice,72000,Engineering,34\n"
+        "Bob,48000,Sales,45\n"
+        "Charlie,51000,HR,29\n"
+        "Diana,83000,Engineering,41\n"
+        "Evan,39000,Sales,\n"
+        "Fiona,67000,Marketing,38\n"
+        "George,,HR,52\n"
+        "Hannah,91000,Engineering,27\n"
+        "Ivan,51000,,33\n"
+    )
+    return str(path)
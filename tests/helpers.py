@@ -0,0 +1,30 @@
+import contextlib
+import io
+from src.codegen import Backend, Executor, Session
+from src.main import run_file
+
+def run_program(source: str,**options) -> str:
+    """Printed output of a whole program compiled with every optimization
+    and run by an Executor with the given options"""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Executor(Backend(source).run(),**options).run()
+    return out.getvalue()
+
+def run_session(source: str,**options) -> str:
+    """Printed output of the program run as one interactive block, which
+    skips the whole-program passes (pushdown, fusion, dead tables)"""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Session(**options).run(source)
+    return out.getvalue()
+
+def run_source_file(path: str,source: str,**options) -> str:
+    """Printed output of `python -m src.main path` for the program, by
+    default without the on-disk program cache"""
+    with open(path,"w") as f:
+        f.write(source)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        run_file(path,**{"cache": False,**options})
+    return out.getvalue()
@@ -0,0 +1,25 @@
+"""Small programs over the employees fixture, covering every statement
+kind, that each execution mode must print exactly as the REPL does"""
+
+PROGRAMS = {
+    "pipeline": ('filter high { where salary > 50000 }\n'
+                 'map bonus on high { bonus = salary * 0.1, senior = age >= 40 }\n'
+                 'aggregate stats on bonus { avg_salary = avg(salary), total = sum(bonus), n = count(name) }\n'
+                 'print stats\n'
+                 'for row in bonus { print row.name, row.bonus }\n'),
+    "two branches": ('filter eng { where department == "Engineering" or age < 30 }\n'
+                     'map m on e { double = salary * 2 }\n'
+                     'aggregate s on m { d = sum(double), a = avg(age) }\n'
+                     'print eng\nprint s\n'),
+    "grouped": ('aggregate by_dept on e by department { n = count(name), total = sum(salary), mean_age = avg(age) }\n'
+                'print by_dept\n'),
+    "order": ('order top on e by salary desc limit 3\n'
+              'order youngest on e by age\n'
+              'print top\nprint youngest\n'),
+    "unused tables": ('filter f { where salary != 51000 }\n'
+                      'map unused on e { x = salary / 1000 }\n'
+                      'print f\n'),
+}
+
+def program(name: str,csv: str) -> str:
+    return f'load e from "{csv}"\n' + PROGRAMS[name]
@@ -0,0 +1,56 @@
+import pytest
+import src.codegen.aggregates as aggregates
+from tests.helpers import run_program, run_session
+
+BLOCKS = [
+    "total = sum(salary), mean = avg(salary), n = count(salary)",
+    "n = count(name), ages = sum(age)",
+    "raised = sum(salary * 1.1 + 500), mean_gap = avg(salary - age * 1000)",
+    "a = avg(age), b = sum(age), c = count(age), d = sum(age + 1)",
+    "ones = sum(1), rows = count(1)",
+]
+
+def program(csv: str,block: str,by: str = "") -> str:
+    return f'load e from "{csv}"\naggregate s on e {by}{{ {block} }}\nprint s\n'
+
+@pytest.fixture(params=["row by row","grouped by pandas"])
+def group_path(request,monkeypatch):
+    if request.param == "grouped by pandas":
+        monkeypatch.setattr(aggregates,"VECTORIZED_GROUP_ROWS",1)
+    return request.param
+
+@pytest.mark.parametrize("block",BLOCKS)
+def test_vectorized_aggregate_matches_the_row_loop(employees,block):
+    source = program(employees,block)
+    expected = run_session(source,vectorize=False)
+    assert run_session(source) == expected
+    assert run_program(source) == expected
+
+@pytest.mark.parametrize("block",BLOCKS)
+def test_grouped_aggregate_matches_the_row_loop(employees,group_path,block):
+    source = program(employees,block,"by department ")
+    expected = run_session(source,vectorize=False)
+    assert run_session(source) == expected
+    assert run_program(source) == expected
+
+def test_shared_argument_is_evaluated_once(monkeypatch,employees):
+    evaluated = []
+    evaluate_columns = aggregates.evaluate_columns
+    def spy(df,assigns,outputs,env = None):
+        evaluated.append(list(outputs))
+        return evaluate_columns(df,assigns,outputs,env)
+    monkeypatch.setattr(aggregates,"evaluate_columns",spy)
+    run_session(program(employees,"a = sum(salary * 2), b = avg(salary * 2), c = count(name)"))
+    # count needs only the row count, so name is never evaluated
+    assert len(evaluated) == 1 and len(evaluated[0]) == 1
+
+def test_count_only_arguments_are_not_evaluated(monkeypatch,employees,group_path):
+    evaluated = []
+    evaluate_columns = aggregates.evaluate_columns
+    def spy(df,assigns,outputs,env = None):
+        evaluated.extend(outputs)
+        return evaluate_columns(df,assigns,outputs,env)
+    monkeypatch.setattr(aggregates,"evaluate_columns",spy)
+    output = run_session(program(employees,"n = count(name), t = sum(salary)","by department "))
+    assert evaluated == ["salary"]
+    assert output == run_session(program(employees,"n = count(name), t = sum(salary)","by department "),vectorize=False)
@@ -0,0 +1,67 @@
+import json
+import sys
+import pandas as pd
+import pytest
+import benchmarks.datagen as datagen
+from benchmarks import executor_bench
+from benchmarks.executor_bench import MIN_COMPARED_SECONDS, compare
+
+def result(seconds: float,digest: str = "d") -> dict:
+    return {"seconds": seconds,"peak_bytes": 0,"digest": digest}
+
+@pytest.mark.parametrize("now,saved,status",[
+    (1.0,None,"no baseline"),
+    (1.5,1.0,"1.50x SLOWER"),
+    (0.5,1.0,"0.50x faster"),
+    (1.1,1.0,"1.10x"),
+    (MIN_COMPARED_SECONDS / 2,MIN_COMPARED_SECONDS / 8,"4.00x (too fast to compare)"),
+])
+def test_compare(now,saved,status):
+    assert compare(result(now),result(saved) if saved is not None else None,0.2) == status
+
+def test_compare_reports_a_changed_result_first():
+    assert compare(result(1.0,"new"),result(5.0,"old"),0.2) == "RESULT CHANGED"
+
+def test_table_is_the_same_in_any_chunking(tmp_path,monkeypatch):
+    whole = tmp_path / "whole.csv"
+    datagen.write_table(str(whole),50,columns=3,cardinality=4)
+    monkeypatch.setattr(datagen,"GENERATE_CHUNK_ROWS",7)
+    chunked = tmp_path / "chunked.csv"
+    datagen.write_table(str(chunked),50,columns=3,cardinality=4)
+
+    df = pd.read_csv(chunked)
+    assert list(df.columns) == ["id","category","c0","c1","c2"]
+    assert list(df["id"]) == list(range(50))
+    assert df["category"].nunique() <= 4
+    assert df["c0"].dtype.kind == "i" and df["c1"].dtype.kind == "f"
+    # chunks continue one random stream, so only the ids and shape must agree
+    assert pd.read_csv(whole).shape == df.shape
+
+def run_bench(monkeypatch,*args):
+    monkeypatch.setattr(sys,"argv",["executor_bench",*args])
+    executor_bench.main()
+
+def test_saved_baseline_compares_clean(tmp_path,monkeypatch,capsys):
+    baseline = tmp_path / "baseline.json"
+    common = ["--rows","200","--statements","filter","group","for","--data-dir",str(tmp_path / "data")]
+    run_bench(monkeypatch,*common,"--save-baseline",str(baseline))
+    saved = json.loads(baseline.read_text())
+    assert saved["config"] == {"columns": 4,"cardinality": 10}
+    assert sorted(saved["results"]["200"]) == ["filter","for","group"]
+
+    capsys.readouterr()
+    run_bench(monkeypatch,*common,"--baseline",str(baseline),"--tolerance","1000")
+    output = capsys.readouterr().out
+    assert "RESULT CHANGED" not in output and "no baseline" not in output
+
+def test_baseline_of_another_table_is_rejected(tmp_path,monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"config": {"columns": 2,"cardinality": 10},"results": {}}))
+    with pytest.raises(Exception,match="Baseline was recorded with"):
+        run_bench(monkeypatch,"--rows","100","--baseline",str(baseline),"--data-dir",str(tmp_path))
+
+@pytest.mark.parametrize("args",[["--columns","1"],["--baseline","b.json","--repeat","1"]])
+def test_bad_arguments_exit(monkeypatch,args):
+    with pytest.raises(SystemExit) as error:
+        run_bench(monkeypatch,*args)
+    assert error.value.code == 2
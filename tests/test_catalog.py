@@ -0,0 +1,65 @@
+import os
+import pandas as pd
+import pytest
+from src.codegen import Session
+from tests.helpers import run_program
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Paths of the CSV files pandas parses, schema samples excluded"""
+    paths = []
+    read_csv = pd.read_csv
+    def spy(path,*args,**kwargs):
+        if "nrows" not in kwargs:
+            paths.append(str(path))
+        return read_csv(path,*args,**kwargs)
+    monkeypatch.setattr(pd,"read_csv",spy)
+    return paths
+
+@pytest.fixture
+def no_sidecar(catalog,monkeypatch):
+    monkeypatch.setattr(catalog,"columnar",None)
+
+def test_one_shot_run_keeps_no_table(catalog,no_sidecar,employees):
+    run_program(f'load e from "{employees}"\nprint e\n')
+    assert catalog.entry(employees).tables == {}
+
+def test_session_parses_a_file_once(catalog,no_sidecar,parses,employees):
+    session = Session()
+    session.run(f'load e from "{employees}"\naggregate s on e {{ n = count(1) }}\n')
+    session.run(f'load again from "{employees}"\nfilter f {{ where salary > 60000 }}\n')
+    assert parses == [employees]
+    assert len(session.executor.tables["f"]) == 4
+
+def test_narrower_projection_is_served_from_the_full_table(catalog,no_sidecar,parses,employees):
+    session = Session()
+    session.run(f'load e from "{employees}"\n')
+    df = catalog.get_table(employees,["age","name"])
+    assert list(df.columns) == ["age","name"] and len(df) == 9
+    assert parses == [employees]
+
+def test_changed_file_is_parsed_again(catalog,no_sidecar,parses,employees):
+    session = Session()
+    session.run(f'load e from "{employees}"\n')
+    with open(employees,"a") as f:
+        f.write("Jack,99000,Sales,50\n")
+    stat = os.stat(employees)
+    os.utime(employees,ns=(stat.st_atime_ns,stat.st_mtime_ns + 10**9))
+
+    session.run(f'load again from "{employees}"\n')
+    assert parses == [employees,employees]
+    assert len(session.executor.tables["again"]) == 10
+    # the table loaded before the change is left as it was
+    assert len(session.executor.tables["e"]) == 9
+
+def test_schema_is_sampled_once_per_file_version(catalog,monkeypatch,employees):
+    samples = []
+    read_csv = pd.read_csv
+    def spy(path,*args,**kwargs):
+        if "nrows" in kwargs:
+            samples.append(path)
+        return read_csv(path,*args,**kwargs)
+    monkeypatch.setattr(pd,"read_csv",spy)
+    assert catalog.schema(employees) == {"name": "string","salary": "float","department": "string","age": "float"}
+    catalog.schema(employees)
+    assert len(samples) == 1
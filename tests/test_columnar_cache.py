@@ -0,0 +1,63 @@
+import os
+import pandas as pd
+import pytest
+import src.codegen.executor as executor
+from tests.helpers import run_program, run_session
+from tests.programs import PROGRAMS, program
+
+FILTERED = 'load e from "{csv}"\nfilter f {{ where salary > 50000 and department != "Sales" }}\nprint f\n'
+WHOLE = 'load e from "{csv}"\nprint e\n'
+
+def assert_same_frame(left: pd.DataFrame,right: pd.DataFrame):
+    # the cache serves memory-mapped arrays, compare values and dtypes only
+    pd.testing.assert_frame_equal(left.copy(deep=True),right,check_index_type=False)
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(executor,"LOAD_CHUNK_ROWS",2)
+
+def test_filtered_load_does_not_keep_the_table(catalog,employees,small_chunks):
+    run_program(FILTERED.format(csv=employees))
+    assert catalog.entry(employees).tables == {}
+
+def test_filtered_load_writes_the_sidecar(catalog,employees,small_chunks):
+    expected = run_session(FILTERED.format(csv=employees))
+    assert run_program(FILTERED.format(csv=employees)) == expected
+
+    catalog.invalidate()
+    assert_same_frame(catalog.get_table(employees),pd.read_csv(employees))
+    assert run_program(FILTERED.format(csv=employees)) == expected
+
+@pytest.mark.parametrize("chunksize",[1,2,4,100])
+def test_sidecar_written_in_chunks_matches_the_csv(catalog,tmp_path,chunksize):
+    # later chunks turn an int column into floats and start a string column
+    path = tmp_path / "types.csv"
+    path.write_text("a,b,c,d\n1,,x,0.5\n2,,y,1.5\n3,5,x,\n,6,z,2.5\n5,7,,3.5\n")
+    for _ in catalog.scan(str(path),None,chunksize):
+        pass
+    catalog.invalidate()
+    assert_same_frame(catalog.get_table(str(path)),pd.read_csv(path))
+
+def test_sidecar_is_dropped_when_the_csv_changes(catalog,employees):
+    before = run_program(WHOLE.format(csv=employees))
+    catalog.invalidate()
+    assert run_program(WHOLE.format(csv=employees)) == before
+
+    with open(employees,"a") as f:
+        f.write("Julia,99000,Legal,31\n")
+    stat = os.stat(employees)
+    os.utime(employees,ns=(stat.st_atime_ns,stat.st_mtime_ns + 1_000_000_000))
+    after = run_program(WHOLE.format(csv=employees))
+    assert "Julia" in after
+    assert after == run_session(WHOLE.format(csv=employees))
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+def test_memory_mapped_tables_match_parsed_ones(catalog,monkeypatch,employees,name):
+    source = program(name,employees)
+    parsed = run_program(source)
+    catalog.invalidate()
+    assert run_program(source) == parsed
+    assert run_program(source,chunksize=2) == parsed
+    monkeypatch.setattr(catalog,"columnar",None)
+    catalog.invalidate()
+    assert run_program(source) == parsed
@@ -0,0 +1,34 @@
+import pytest
+from src.codegen import Backend, Executor
+from src.icg.ir import Map
+from tests.helpers import run_program, run_session
+from tests.programs import PROGRAMS, program
+
+DEAD = ('load e from "{csv}"\nmap unused on e {{ x = salary / 1000 }}\nfilter also_unused {{ where x > 50 }}\n'
+        'map used on e {{ y = age + 1 }}\nprint used\n')
+
+def maps(ir):
+    return [i.output for i in ir if isinstance(i,Map)]
+
+def test_tables_nothing_reads_are_removed(employees):
+    ir = Backend(DEAD.format(csv=employees)).run()
+    assert maps(ir) == ["used"]
+    assert not any(getattr(i,"output",None) == "also_unused" for i in ir)
+
+def test_incremental_blocks_keep_every_table(employees):
+    # a later REPL block may still read them
+    ir = Backend(DEAD.format(csv=employees),incremental=True).run()
+    assert maps(ir) == ["unused","used"]
+
+def test_lazy_run_only_computes_what_is_read(employees):
+    executor = Executor(Backend(DEAD.format(csv=employees),incremental=True).run(),lazy=True)
+    executor.run()
+    assert "used" in executor.tables
+    assert "unused" not in executor.tables and "also_unused" not in executor.tables
+    assert set(executor.pending) == {"unused","also_unused"}
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+def test_lazy_run_matches_the_repl(employees,name):
+    source = program(name,employees)
+    assert run_program(source,lazy=True) == run_session(source)
+    assert run_program(source,lazy=True,chunksize=2) == run_session(source)
@@ -0,0 +1,42 @@
+import pytest
+from src.icg.ir import Assign
+from src.optimization import ConstantFolder
+from tests.helpers import run_program, run_session
+
+PREDICATES = [
+    "salary > 60000",
+    "salary != 51000",
+    "age <= 34",
+    'department == "Engineering"',
+    'department != "Sales"',
+    'salary > 50000 and department != "Sales"',
+    "salary < 50000 or age > 40",
+    "salary * 2 - 1000 > age * 3000",
+    "(salary > 70000 or age < 30) and department == \"Engineering\"",
+    "salary > 1000000",
+]
+
+def program(csv: str,predicate: str) -> str:
+    return f'load e from "{csv}"\nfilter f {{ where {predicate} }}\nprint f\n'
+
+@pytest.mark.parametrize("predicate",PREDICATES)
+def test_column_mask_matches_the_row_loop(employees,predicate):
+    source = program(employees,predicate)
+    expected = run_session(source,vectorize=False)
+    assert run_session(source) == expected
+    assert run_program(source) == expected
+    assert run_program(source,vectorize=False) == expected
+
+def test_filter_runs_as_a_column_mask(employees):
+    output = run_session(program(employees,'salary > 50000 and department != "Sales"'),verbose=True)
+    assert "fallback" not in output
+
+def test_folded_constant_is_not_applied_again():
+    # 2 + 3 folds to 5; re-applying "+" to (5, None) would fail at runtime
+    instr = Assign("t1","+",2,3)
+    ConstantFolder([instr]).fold()
+    assert (instr.op,instr.arg1,instr.arg2) == ("=",5,None)
+    assert run_program("print 2 + 3\n") == "5.0\n"
+
+def test_row_interpreter_evaluates_and_or():
+    assert run_program("print 1 < 2 and 3 > 4\nprint 1 < 2 or 3 > 4\n",vectorize=False) == "False\nTrue\n"
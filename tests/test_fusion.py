@@ -0,0 +1,35 @@
+from src.codegen import Backend, Executor
+from src.icg.ir import Aggregate, Filter, Map, Pipeline
+from tests.helpers import run_program, run_session
+from tests.programs import program
+
+# the filter reads a mapped column, so it stays in the chain rather than in the load
+CHAIN = ('load e from "{csv}"\nmap m on e {{ bonus = salary * 0.1 }}\nfilter f {{ where bonus > 5000 }}\n'
+         'aggregate s on f {{ total = sum(bonus), n = count(name) }}\nprint s\n')
+
+def pipelines(source: str):
+    return [i for i in Backend(source).run() if isinstance(i,Pipeline)]
+
+def test_single_consumer_chain_becomes_one_pipeline(employees):
+    source = CHAIN.format(csv=employees)
+    ir = Backend(source).run()
+    fused = [i for i in ir if isinstance(i,Pipeline)]
+    assert len(fused) == 1 and (fused[0].input,fused[0].output) == ("e","s")
+    assert not any(isinstance(i,(Filter,Map,Aggregate)) for i in ir)
+
+    executor = Executor(ir)
+    executor.run()
+    # the intermediate tables are never materialized
+    assert "f" not in executor.tables and "m" not in executor.tables
+
+def test_table_read_twice_ends_a_chain(employees):
+    source = CHAIN.format(csv=employees) + "print m\n"
+    fused = pipelines(source)
+    # m is printed as well, so it stays a table and only filter -> aggregate fuse
+    assert [(p.input,p.output) for p in fused] == [("m","s")]
+    assert run_program(source) == run_session(source)
+
+def test_fused_chain_prints_what_the_repl_prints(employees):
+    for source in (CHAIN.format(csv=employees),program("pipeline",employees),program("two branches",employees)):
+        assert run_program(source) == run_session(source)
+        assert run_program(source,vectorize=False) == run_session(source)
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+import src.codegen.aggregates as aggregates
+from tests.helpers import run_program, run_session
+
+GROUPED = 'load e from "{csv}"\naggregate s on e by {by} {{ n = count(name), total = sum(salary), mean_age = avg(age) }}\nprint s\n'
+
+@pytest.fixture(params=["row by row","grouped by pandas"])
+def group_path(request,monkeypatch):
+    if request.param == "grouped by pandas":
+        monkeypatch.setattr(aggregates,"VECTORIZED_GROUP_ROWS",1)
+    return request.param
+
+def test_groups_come_out_in_order_of_first_appearance(employees,group_path):
+    s = run_session(GROUPED.format(csv=employees,by="department"))
+    departments = [line.split()[1] for line in s.splitlines()[1:]]
+    # the missing department is a group of its own
+    assert departments == ["Engineering","Sales","HR","Marketing","NaN"]
+
+def test_grouped_totals_match_pandas(employees,group_path):
+    df = pd.read_csv(employees)
+    expected = df.groupby("department",sort=False,dropna=False).agg(
+        n=("name","size"),total=("salary","sum"),mean_age=("age","mean")).reset_index()
+    assert run_program(GROUPED.format(csv=employees,by="department")) == str(expected) + "\n"
+
+@pytest.mark.parametrize("chunksize",[1,2,4])
+def test_chunks_of_an_integer_block_still_sum_to_floats(employees,group_path,chunksize):
+    # salary is a float column only because of George's missing value; the
+    # groups that never meet his chunk must still sum to floats
+    source = GROUPED.format(csv=employees,by="department")
+    assert run_program(source,chunksize=chunksize) == run_session(source)
+    assert run_program(source,chunksize=chunksize,processes=2) == run_session(source)
+
+def test_several_group_columns(employees,group_path):
+    source = 'load e from "{csv}"\nmap m on e {{ senior = age >= 40 }}\naggregate s on m by department, senior {{ n = count(name) }}\nprint s\n'
+    source = source.format(csv=employees)
+    assert run_program(source) == run_session(source,vectorize=False)
+    assert run_program(source,chunksize=2) == run_session(source)
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import pytest
+import src.catalog.indexes as indexes
+from src.codegen import Session
+from tests.helpers import run_program, run_session
+
+PREDICATES = [
+    "salary == 51000",
+    "salary != 51000",
+    "salary < 51000",
+    "salary <= 51000",
+    "salary > 67000",
+    "salary >= 67000",
+    "51000 < salary",
+    "salary == 12345",
+    'department == "Sales"',
+    'department != "Sales"',
+    'department == "Legal"',
+    'department < "HR"',
+    'salary > 50000 and department == "Engineering"',
+    'salary < 50000 or department == "HR"',
+    "salary > 50000 and age < 40",
+    "salary > 80000 or age > 40",
+    "salary * 2 > 100000",
+]
+
+INDEXED = 'load e from "{csv}"\nindex e on salary\nindex e on department\nfilter f {{ where {predicate} }}\nprint f\n'
+SCANNED = 'load e from "{csv}"\nfilter f {{ where {predicate} }}\nprint f\n'
+
+MODES = [{},{"vectorize": False},{"chunksize": 2},{"processes": 2}]
+
+@pytest.fixture(params=["bitmap","sorted"])
+def index_kind(request,monkeypatch):
+    # a column with more distinct values than this gets a sorted index
+    if request.param == "sorted":
+        monkeypatch.setattr(indexes,"BITMAP_MAX_VALUES",0)
+    return request.param
+
+@pytest.mark.parametrize("predicate",PREDICATES)
+def test_index_matches_a_scan(catalog,employees,index_kind,predicate):
+    # the scan runs first, before any index of the table exists
+    expected = run_session(SCANNED.format(csv=employees,predicate=predicate))
+    assert run_session(INDEXED.format(csv=employees,predicate=predicate)) == expected
+    for options in MODES:
+        assert run_program(INDEXED.format(csv=employees,predicate=predicate),**options) == expected
+
+def test_filter_goes_through_the_index(catalog,employees,index_kind):
+    exact = run_program(INDEXED.format(csv=employees,predicate='salary > 50000 and department == "HR"'),verbose=True)
+    assert "filtered through its indexes (exact)" in exact
+    partial = run_program(INDEXED.format(csv=employees,predicate="salary > 50000 and age < 40"),verbose=True)
+    assert "filtered through its indexes (candidate rows)" in partial
+
+def test_index_follows_a_changed_csv(catalog,employees):
+    source = INDEXED.format(csv=employees,predicate="salary > 60000")
+    run_program(source)
+    with open(employees,"a") as f:
+        f.write("Jack,99000,Sales,50\n")
+    catalog.invalidate()
+    assert run_program(source) == run_session(SCANNED.format(csv=employees,predicate="salary > 60000"))
+    assert "Jack" in run_program(source)
+
+def test_session_table_older_than_its_csv_is_scanned(catalog,employees):
+    session = Session(verbose=True)
+    session.run(f'load e from "{employees}"\n')
+    with open(employees) as f:
+        text = f.read()
+    with open(employees,"w") as f:
+        f.write(text.replace("Alice,72000","Alice,1000"))
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        # the new index describes the edited file, e still holds the old rows
+        session.run("index e on salary\nfilter f { where salary > 60000 }\nprint f\n")
+    assert "changed since 'e' was loaded, its indexes are not used" in out.getvalue()
+    assert list(session.executor.tables["f"]["name"]) == ["Alice","Diana","Fiona","Hannah"]
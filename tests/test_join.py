@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+import src.codegen.join as join
+from src.codegen import Backend, Executor
+from src.codegen.streaming import StreamNode
+from src.icg.ir import Join
+from tests.helpers import run_program, run_session
+
+# the right table repeats the left's name and age columns, which come out as name_d and age_d
+JOINED = ('load d from "{departments}"\nload e from "{employees}"\n'
+          'join j on e, d by department\n'
+          'map m on j {{ gap = age - age_d }}\n'
+          'filter f {{ where name_d != "Hugo" }}\n'
+          'print j\nprint f\n')
+
+MODES = [{},{"vectorize": False},{"chunksize": 2},{"lazy": True},{"processes": 2},{"chunksize": 2,"processes": 2}]
+
+@pytest.fixture
+def departments(tmp_path) -> str:
+    path = tmp_path / "departments.csv"
+    path.write_text("department,name,age,budget\nEngineering,Hugo,50,500\nSales,Iris,44,80\n"
+                    "HR,Jonas,39,120\nEngineering,Kara,61,450\nLegal,Lena,47,90\n")
+    return str(path)
+
+def joined_table(source: str,table: str) -> pd.DataFrame:
+    executor = Executor(Backend(source).run())
+    executor.run()
+    return executor.tables[table]
+
+def test_right_columns_the_left_has_get_a_suffix(employees,departments):
+    j = joined_table(JOINED.format(employees=employees,departments=departments),"j")
+    assert list(j.columns) == ["name","salary","department","age","name_d","age_d","budget"]
+
+    left = pd.read_csv(employees).dropna(subset=["department"])
+    right = pd.read_csv(departments).rename(columns={"name": "name_d","age": "age_d"})
+    expected = left.merge(right,on="department",how="inner",sort=False)
+    pd.testing.assert_frame_equal(j,expected,check_dtype=False)
+
+@pytest.mark.parametrize("options",MODES)
+def test_join_modes_match_the_plain_path(employees,departments,options):
+    source = JOINED.format(employees=employees,departments=departments)
+    assert run_program(source,**options) == run_session(source)
+
+def test_sort_merge_join_matches_the_hash_join(monkeypatch,employees,departments):
+    source = JOINED.format(employees=employees,departments=departments)
+    hashed = run_session(source)
+    monkeypatch.setattr(join,"HASH_JOIN_MAX_ROWS",0)
+    assert run_session(source) == hashed
+    assert run_program(source) == hashed
+
+def test_join_on_the_smaller_left_keeps_its_row_order(employees,departments):
+    source = f'load e from "{employees}"\nload d from "{departments}"\njoin j on d, e by department\nprint j\n'
+    j = joined_table(source,"j")
+    assert list(j.columns) == ["department","name","age","budget","name_e","salary","age_e"]
+    assert list(j["name"]) == ["Hugo"] * 3 + ["Iris"] * 2 + ["Jonas"] * 2 + ["Kara"] * 3
+    assert list(j["name_e"][:3]) == ["Alice","Diana","Hannah"]
+    assert run_program(source,chunksize=2) == run_session(source)
+
+def streamed_joins(source: str,**options) -> list:
+    plan = Executor(Backend(source).run(),**options).plan
+    return [stage.instr.output for node in plan if isinstance(node,StreamNode)
+            for stage in node.body if isinstance(stage.instr,Join)]
+
+@pytest.mark.parametrize("options",[{"chunksize": 2},{"processes": 2}])
+def test_only_a_join_with_the_smaller_right_side_is_streamed(employees,departments,options):
+    larger_left = JOINED.format(employees=employees,departments=departments)
+    assert streamed_joins(larger_left,**options) == ["j"]
+    smaller_left = f'load e from "{employees}"\nload d from "{departments}"\njoin j on d, e by department\nprint j\n'
+    assert streamed_joins(smaller_left,**options) == []
+    assert run_program(smaller_left,**options) == run_session(smaller_left)
+
+def test_suffix_colliding_with_a_left_column_is_rejected(tmp_path,employees):
+    path = tmp_path / "clash.csv"
+    path.write_text("department,name,name_d\nSales,Iris,x\n")
+    with pytest.raises(Exception,match="Duplicate column 'name_d'"):
+        Backend(f'load e from "{employees}"\nload d from "{path}"\n'
+                f'map e2 on e {{ name_d = name }}\njoin j on e2, d by department\nprint j\n').run()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+import src.codegen.kernels as kernels
+from src.codegen.kernels import ExpressionKernel
+from src.codegen.vectorized import VectorizeError
+from src.icg.ir import Assign
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"a": rng.integers(0,100,5000),"b": rng.random(5000)})
+
+def chain(length: int):
+    # t1 = a * 2, t2 = t1 + b, t3 = t2 * 2, ... out = t<length> - 1
+    assigns = [Assign("t1","*","a",2)]
+    for i in range(2,length + 1):
+        assigns.append(Assign(f"t{i}","+" if i % 2 == 0 else "*",f"t{i - 1}","b" if i % 2 == 0 else 2))
+    assigns.append(Assign("out","-",f"t{length}",1))
+    return assigns
+
+def test_chain_reuses_its_registers(frame):
+    kernel = ExpressionKernel(chain(20),["out"],dict(frame.dtypes))
+    # each temp dies as the next one is written, so two registers at most
+    assert len(kernel.register_dtypes) <= 2
+
+    expected = frame["a"] * 2
+    for i in range(2,21):
+        expected = expected + frame["b"] if i % 2 == 0 else expected * 2
+    np.testing.assert_allclose(kernel.evaluate(frame)["out"],(expected - 1).to_numpy())
+
+def test_repeated_subexpression_is_computed_once(frame):
+    assigns = [Assign("t1","*","a","b"),Assign("t2","*","a","b"),Assign("out","+","t1","t2")]
+    kernel = ExpressionKernel(assigns,["out"],dict(frame.dtypes))
+    assert len(kernel.program) == 2
+    np.testing.assert_allclose(kernel.evaluate(frame)["out"],(2 * frame["a"] * frame["b"]).to_numpy())
+
+def test_blocks_cover_every_row(monkeypatch,frame):
+    kernel = ExpressionKernel(chain(5),["out","t3"],dict(frame.dtypes))
+    expected = kernel.evaluate(frame)
+    monkeypatch.setattr(kernels,"L2_BYTES",8)
+    monkeypatch.setattr(kernels,"MIN_BLOCK_ROWS",333)
+    assert kernel.block_rows() == 333
+    for name,values in kernel.evaluate(frame).items():
+        np.testing.assert_array_equal(values,expected[name])
+
+def test_non_numeric_columns_are_left_to_the_column_evaluator():
+    frame = pd.DataFrame({"s": ["x","y"]})
+    with pytest.raises(VectorizeError):
+        ExpressionKernel([Assign("out","==","s","\"x\"")],["out"],dict(frame.dtypes))
@@ -0,0 +1,38 @@
+import sys
+import pytest
+from src.ast import BinaryExpr
+from src.lexer import Lexer
+from src.parser import Parser
+from tests.helpers import run_program, run_session
+
+TERMS = 10_000
+
+@pytest.fixture
+def low_recursion_limit():
+    # far below the depth a recursive walk of these expressions would need
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(200)
+    yield
+    sys.setrecursionlimit(limit)
+
+def or_chain(terms: int) -> str:
+    return " or ".join(f"salary == {1000 * i}" for i in range(terms))
+
+def test_long_predicate_compiles_and_runs_without_recursion(employees,low_recursion_limit):
+    source = f'load e from "{employees}"\nfilter f {{ where {or_chain(TERMS)} and age < 40 }}\nprint f\n'
+    output = run_program(source)
+    names = [line.split()[1] for line in output.splitlines()[1:]]
+    assert names == ["Alice","Charlie","Fiona","Hannah","Ivan"]
+    assert run_session(source) == output
+
+def test_deep_parentheses_parse_without_recursion(low_recursion_limit):
+    depth = 5000
+    source = "print " + "(" * depth + "1 + 2" + ")" * depth + "\n"
+    tree = Parser(Lexer(source).tokenize()).parse().statements[0].expressions[0]
+    assert isinstance(tree,BinaryExpr) and tree.op == "+"
+    assert run_program(source) == "3.0\n"
+
+def test_long_sum_keeps_left_associativity():
+    terms = 3000
+    source = "print " + " - ".join(str(i) for i in range(terms)) + "\n"
+    assert run_program(source) == f"{float(-sum(range(1,terms)))}\n"
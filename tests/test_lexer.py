@@ -0,0 +1,44 @@
+import os
+import random
+import pytest
+from benchmarks.lexer_bench import synthetic_program
+from src.lexer import CharLexer, Lexer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def tokens(lexer_cls,text: str):
+    return [repr(t) for t in lexer_cls(text).tokenize()]
+
+def error(lexer_cls,text: str) -> str:
+    with pytest.raises(Exception) as e:
+        lexer_cls(text).tokenize()
+    return str(e.value)
+
+@pytest.mark.parametrize("path",["program.dsl","parsing_fail.dsl","semantic_fail.dsl"])
+def test_regex_lexer_matches_the_char_lexer(path):
+    with open(os.path.join(ROOT,path)) as f:
+        text = f.read()
+    assert tokens(Lexer,text) == tokens(CharLexer,text)
+
+def test_generated_program():
+    text = synthetic_program(20_000)
+    assert tokens(Lexer,text) == tokens(CharLexer,text)
+
+def test_random_inputs_give_the_same_tokens_or_errors():
+    rng = random.Random(0)
+    alphabet = 'ab_9 .\n\t"=<>!+-*/(){},x1²٣'
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0,20)))
+        try:
+            expected = tokens(CharLexer,text)
+        except Exception as e:
+            assert error(Lexer,text) == str(e)
+            continue
+        assert tokens(Lexer,text) == expected
+
+def test_positions_are_computed_on_demand():
+    toks = Lexer('load t from "a.csv"\n  print   t\n').tokenize()
+    assert [(t.type,t.line,t.column) for t in toks[4:6]] == [("PRINT",2,3),("IDENTIFIER",2,11)]
+
+def test_unterminated_string_reports_the_end_of_input():
+    assert error(Lexer,'print "abc\n') == error(CharLexer,'print "abc\n')
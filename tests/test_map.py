@@ -0,0 +1,31 @@
+import pytest
+from tests.helpers import run_program, run_session
+
+BLOCKS = [
+    "bonus = salary * 0.1",
+    "total = salary + age * 100, ratio = salary / age",
+    "neg = -salary, const = 7",
+    "older = age + 1, double_older = older * 2",
+    "senior = age >= 40, rich = salary > 60000 and age < 40",
+    'same = department == "HR", copy = name',
+]
+
+def program(csv: str,block: str) -> str:
+    # the filter first, so the map's output is renumbered from 0
+    return f'load e from "{csv}"\nfilter f {{ where age > 28 }}\nmap m on f {{ {block} }}\nprint m\n'
+
+@pytest.mark.parametrize("block",BLOCKS)
+def test_column_map_matches_the_row_loop(employees,block):
+    source = program(employees,block)
+    expected = run_session(source,vectorize=False)
+    assert run_session(source) == expected
+    assert run_program(source) == expected
+    assert run_program(source,vectorize=False) == expected
+
+def test_map_output_is_renumbered(employees):
+    output = run_program(program(employees,"bonus = salary * 0.1"))
+    labels = [line.split()[0] for line in output.splitlines()[1:]]
+    assert labels == [str(i) for i in range(len(labels))]
+
+def test_map_runs_column_at_a_time(employees):
+    assert "fallback" not in run_session(program(employees,BLOCKS[1]),verbose=True)
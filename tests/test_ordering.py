@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+from src.codegen.external_sort import SortedRuns
+from tests.helpers import run_program, run_session
+
+@pytest.fixture
+def scores(tmp_path) -> str:
+    # many ties and missing values, longer than pandas prints in full
+    path = tmp_path / "scores.csv"
+    lines = ["id,score,team"]
+    for i in range(200):
+        score = "" if i % 9 == 0 else str((i * 37) % 23)
+        lines.append(f"{i},{score},t{i % 4}")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+ORDERS = [
+    "order o on t by {column}",
+    "order o on t by {column} desc",
+    "order o on t by {column} limit 7",
+    "order o on t by {column} desc limit 7",
+]
+
+def program(csv: str,order: str,column: str) -> str:
+    return f'load t from "{csv}"\n{order.format(column=column)}\nprint o\nfor row in o {{ print row.id }}\n'
+
+@pytest.mark.parametrize("order",ORDERS)
+def test_order_matches_a_stable_sort(employees,order):
+    # ties keep their input order and missing values go last, either direction
+    source = f'load t from "{employees}"\n{order.format(column="salary")}\nprint o\n'
+    df = pd.read_csv(employees)
+    present = df[df["salary"].notna()]
+    expected = pd.concat([present.sort_values("salary",ascending="desc" not in order,kind="stable"),df[df["salary"].isna()]])
+    if "limit" in order:
+        expected = expected.head(7)
+    assert run_program(source) == str(expected) + "\n"
+    assert run_session(source) == str(expected) + "\n"
+
+@pytest.mark.parametrize("order",ORDERS)
+@pytest.mark.parametrize("options",[{"chunksize": 16},{"chunksize": 16,"sort_memory": 1}],ids=["in memory","spilled"])
+def test_streamed_order_matches_the_in_memory_order(scores,order,options):
+    source = program(scores,order,"score")
+    assert run_program(source,**options) == run_program(source)
+
+def test_spilled_order_is_printed_like_a_frame(scores):
+    source = f'load t from "{scores}"\norder o on t by score desc\nprint o\n'
+    output = run_program(source,chunksize=16,sort_memory=1)
+    assert output == run_program(source)
+    assert output.rstrip().endswith("[200 rows x 3 columns]")
+
+def test_spilled_runs_are_merged_in_order(tmp_path):
+    runs = SortedRuns("k",temp_dir=str(tmp_path))
+    runs.write(pd.DataFrame({"k": [1.0,3.0,None],"i": [0,1,2]}))
+    runs.write(pd.DataFrame({"k": [1.0,2.0,None],"i": [3,4,5]}))
+    assert runs.frame()["i"].tolist() == [0,3,4,1,2,5]
+    head,tail = runs.ends(2)
+    assert head["i"].tolist() == [0,3] and tail["i"].tolist() == [2,5]
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+from src.codegen import executor
+from src.codegen.partitioned import csv_partitions
+from tests.helpers import run_program, run_session
+from tests import programs
+
+PROGRAMS = {
+    "filter and aggregate": 'load e from "{csv}"\nfilter f {{ where salary > 45000 }}\naggregate s on f {{ a = avg(salary), n = count(age), t = sum(age) }}\nprint s\n',
+    "map and filter": 'load e from "{csv}"\nfilter f {{ where department != "Sales" }}\nmap m on f {{ bonus = salary * 0.1 }}\nfilter g {{ where bonus > 5000 }}\nprint g\nprint m\n',
+    "grouped": 'load e from "{csv}"\naggregate s on e by department {{ n = count(name), total = sum(salary) }}\nprint s\n',
+    "aggregate of the load": 'load e from "{csv}"\naggregate s on e {{ a = avg(age), t = sum(salary), n = count(name) }}\nprint s\nprint e\n',
+}
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+@pytest.mark.parametrize("chunksize",[None,2,100],ids=["whole","chunks of 2","one chunk"])
+def test_processes_match_a_serial_run(employees,name,chunksize):
+    source = PROGRAMS[name].format(csv=employees)
+    expected = run_program(source,chunksize=chunksize)
+    assert run_program(source,chunksize=chunksize,processes=2) == expected
+    assert expected == run_session(source)
+
+@pytest.mark.parametrize("name",sorted(programs.PROGRAMS))
+@pytest.mark.parametrize("options",[{"processes": 2},{"chunksize": 3,"processes": 2}],ids=["whole","chunks of 3"])
+def test_every_statement_kind_matches_the_repl(monkeypatch,employees,name,options):
+    # blocks of 4 rows, so even these 9 rows make two partitions
+    monkeypatch.setattr(executor,"PIPELINE_BLOCK_ROWS",4)
+    source = programs.program(name,employees)
+    assert run_program(source,**options) == run_session(source)
+
+def test_chunked_partitions_do_not_load_the_table(catalog,employees):
+    run_program(PROGRAMS["filter and aggregate"].format(csv=employees),chunksize=2,processes=2)
+    assert catalog.entry(employees).tables == {}
+
+@pytest.fixture
+def parses(monkeypatch):
+    paths = []
+    read_csv = pd.read_csv
+    def spy(path,*args,**kwargs):
+        if "nrows" not in kwargs:
+            paths.append(str(path))
+        return read_csv(path,*args,**kwargs)
+    monkeypatch.setattr(pd,"read_csv",spy)
+    return paths
+
+@pytest.mark.parametrize("name",["grouped","aggregate of the load"])
+def test_workers_parse_their_own_rows(monkeypatch,catalog,parses,employees,name):
+    monkeypatch.setattr(catalog,"columnar",None)
+    monkeypatch.setattr(executor,"PIPELINE_BLOCK_ROWS",2)
+    source = PROGRAMS[name].format(csv=employees)
+    output = run_program(source,processes=2,verbose=True)
+    assert f"[EXEC] ran '{employees}' in 2 partition(s) of 2-row blocks" in output
+    assert employees not in parses
+    expected = run_program(source,verbose=True)
+    strip = lambda text: [line for line in text.splitlines() if not line.startswith("[")]
+    assert strip(output) == strip(expected)
+
+@pytest.mark.parametrize("ending",["\n","\r\n"])
+@pytest.mark.parametrize("block_rows",[1,2,3])
+def test_csv_partitions_split_at_row_boundaries(tmp_path,ending,block_rows):
+    lines = ["name,note","a,plain","","b,\"two\nlines\"","c,\"quoted \"\"x\"\"\"","","d,last"]
+    path = tmp_path / "rows.csv"
+    path.write_bytes(ending.join(lines).encode())
+    partitions = csv_partitions(str(path),None,block_rows,3)
+    frames = [partition.read() for partition in partitions]
+    pd.testing.assert_frame_equal(pd.concat(frames),pd.read_csv(path))
+    assert all(len(frame) % block_rows == 0 for frame in frames[:-1])
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from src.codegen import Backend, Executor
+from src.codegen.plan import Planner
+from src.icg.ir import Assign, ForBegin, ForEnd, Print
+from tests.helpers import run_program, run_session
+
+def lower(source: str):
+    return Planner(Backend(source).run()).lower(Executor([]).handlers)
+
+def test_blocks_own_their_assigns(employees):
+    plan = lower(f'load e from "{employees}"\nmap m on e {{ bonus = salary * 0.1 }}\n'
+                 f'filter f {{ where bonus > 5000 and age < 40 }}\nprint f\nprint m\n')
+    # every Assign sits in the body of the block it belongs to
+    assert not any(isinstance(node.instr,Assign) for node in plan)
+    for node in plan:
+        assert all(isinstance(child,Assign) for child in node.body)
+    assert any(node.body for node in plan)
+
+def test_for_node_owns_its_body(employees):
+    plan = lower(f'load e from "{employees}"\nfor row in e {{ print row.name, row.salary * 2 }}\nprint e\n')
+    loops = [node for node in plan if isinstance(node.instr,ForBegin)]
+    assert len(loops) == 1
+    assert [type(child.instr) for child in loops[0].body].count(Print) == 2
+    assert not any(isinstance(node.instr,ForEnd) for node in plan)
+    assert isinstance(plan[-1].instr,Print)
+
+def test_unbalanced_loops_are_rejected():
+    handlers = Executor([]).handlers
+    with pytest.raises(Exception,match="Unbalanced ForEnd"):
+        Planner([ForEnd()]).lower(handlers)
+    with pytest.raises(Exception,match="Unterminated ForBegin"):
+        Planner([ForBegin("t","row")]).lower(handlers)
+
+def test_loop_prints_every_row_in_order(employees):
+    source = f'load e from "{employees}"\nfilter f {{ where salary > 60000 }}\nfor row in f {{ print row.name, row.salary / 1000 }}\n'
+    df = pd.read_csv(employees)
+    df = df[df["salary"] > 60000]
+    expected = "".join(f"{name}\n{salary / 1000}\n" for name,salary in zip(df["name"],df["salary"]))
+    assert run_program(source) == expected
+    assert run_session(source) == expected
+    assert run_program(source,vectorize=False) == expected
@@ -0,0 +1,58 @@
+import pytest
+from src.codegen import Backend
+from src.icg.ir import Filter, LoadTable, Map, Pipeline
+from tests.helpers import run_program, run_session, run_source_file
+
+PROGRAMS = {
+    "filter": 'load e from "{csv}"\nfilter f {{ where salary > 60000 }}\nprint f\n',
+    "two filters": 'load e from "{csv}"\nfilter f {{ where salary > 50000 }}\nfilter g {{ where department == "Engineering" or age < 30 }}\nprint g\n',
+    "map then filter": 'load e from "{csv}"\nmap m on e {{ bonus = salary * 2 }}\nfilter f {{ where salary > 60000 }}\nprint f\n',
+    "filter then map": 'load e from "{csv}"\nfilter f {{ where salary > 60000 }}\nmap m on f {{ bonus = salary * 2 }}\nprint m\n',
+    "derived column": 'load e from "{csv}"\nmap m on e {{ bonus = salary * 2 }}\nfilter f {{ where bonus > 100000 and age > 30 }}\nprint f\n',
+    "two maps": 'load e from "{csv}"\nmap m on e {{ bonus = salary * 2 }}\nmap m2 on m {{ x = age + 1 }}\nfilter f {{ where salary > 50000 and x > 30 }}\nprint f\n',
+    "map of a filtered map": ('load e from "{csv}"\nmap m on e {{ bonus = salary * 2 }}\nfilter f {{ where salary > 50000 }}\n'
+                              'map m2 on f {{ x = age + 1 }}\nfilter g {{ where age < 40 and x > 30 }}\nprint g\n'),
+    "map of a filtered load": 'load e from "{csv}"\nfilter f {{ where age > 28 }}\nmap m on f {{ bonus = salary * 2 }}\nfilter g {{ where salary > 50000 }}\nprint g\n',
+}
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+@pytest.mark.parametrize("options",[{},{"chunksize": 2},{"processes": 2},{"lazy": True}],
+                         ids=["whole","chunked","processes","lazy"])
+def test_file_mode_prints_what_the_repl_prints(tmp_path,employees,name,options):
+    source = PROGRAMS[name].format(csv=employees)
+    expected = run_session(source)
+    assert run_source_file(str(tmp_path / "program.dsl"),source,**options) == expected
+
+def test_filter_is_pushed_into_the_load(employees):
+    ir = Backend(PROGRAMS["two filters"].format(csv=employees)).run()
+    loads = [i for i in ir if isinstance(i,LoadTable)]
+    assert loads[0].predicate_temp is not None
+    assert not any(isinstance(i,Filter) for i in ir)
+
+def flat_ir(source: str):
+    # fused chains keep their blocks in the Pipeline's stages
+    ir = []
+    for instr in Backend(source).run():
+        ir.extend(instr.stages if isinstance(instr,Pipeline) else [instr])
+    return ir
+
+def test_base_conjuncts_pass_a_map_and_derived_ones_stay(employees):
+    ir = flat_ir(PROGRAMS["derived column"].format(csv=employees))
+    load = [i for i in ir if isinstance(i,LoadTable)][0]
+    assert load.predicate_temp is not None
+    assert {a.arg1 for a in load.predicate} == {"age"}
+    filters = [i for i in ir if isinstance(i,Filter)]
+    assert len(filters) == 1
+    mapped = [i for i in ir if isinstance(i,Map)]
+    assert mapped[0].keep_labels
+
+def test_map_of_a_filtered_table_is_not_passed(employees):
+    ir = flat_ir(PROGRAMS["map of a filtered load"].format(csv=employees))
+    # age > 28 is pushed; salary > 50000 would renumber the map's rows
+    assert [i for i in ir if isinstance(i,Filter)]
+    assert not [i for i in ir if isinstance(i,Map) and i.keep_labels]
+
+def test_pushed_filter_keeps_row_labels(employees):
+    output = run_program(PROGRAMS["filter"].format(csv=employees))
+    labels = [line.split()[0] for line in output.splitlines()[1:]]
+    assert labels == ["0","3","5","7"]
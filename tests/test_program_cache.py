@@ -0,0 +1,51 @@
+import pytest
+from src.codegen import Backend, ProgramCache
+from tests.helpers import run_source_file
+
+SOURCE = 'load e from "{csv}"\nfilter f {{ where salary > 60000 }}\nprint f\n'
+
+def compile_into(cache: ProgramCache,source: str):
+    backend = Backend(source)
+    ir = backend.run()
+    cache.put(source,ir,backend.semantic_analyzer.sources)
+    return ir
+
+def test_same_source_hits(employees):
+    cache = ProgramCache()
+    source = SOURCE.format(csv=employees)
+    ir = compile_into(cache,source)
+    assert [repr(i) for i in cache.get(source)] == [repr(i) for i in ir]
+    assert cache.get(source + "print e\n") is None
+
+def test_schema_change_makes_an_entry_stale(employees):
+    cache = ProgramCache()
+    source = SOURCE.format(csv=employees)
+    compile_into(cache,source)
+    with open(employees,"w") as f:
+        f.write("name,salary,department,age\nAlice,high,Engineering,34\n")
+    assert cache.get(source) is None
+
+def test_unchanged_schema_keeps_the_entry(employees):
+    cache = ProgramCache()
+    source = SOURCE.format(csv=employees)
+    compile_into(cache,source)
+    with open(employees,"a") as f:
+        f.write("Jack,99000,Sales,50\n")
+    assert cache.get(source) is not None
+
+def test_file_mode_reuses_the_compiled_program(tmp_path,employees):
+    path = str(tmp_path / "program.dsl")
+    source = SOURCE.format(csv=employees)
+    first = run_source_file(path,source,cache=True)
+    assert "Alice" in first
+    assert run_source_file(path,source,cache=True) == first
+    assert "Compiled program loaded from cache." in run_source_file(path,source,cache=True,verbose=True)
+
+def test_file_mode_recompiles_after_a_schema_change(tmp_path,employees):
+    path = str(tmp_path / "program.dsl")
+    source = SOURCE.format(csv=employees)
+    run_source_file(path,source,cache=True)
+    with open(employees,"w") as f:
+        f.write("name,pay\nAlice,72000\n")
+    with pytest.raises(Exception,match="salary"):
+        run_source_file(path,source,cache=True)
@@ -0,0 +1,27 @@
+import pytest
+from src.codegen import Backend
+from src.icg.ir import LoadTable
+from tests.helpers import run_program, run_session
+from tests.programs import PROGRAMS, program
+
+def loaded_columns(source: str):
+    return [i.columns for i in Backend(source).run() if isinstance(i,LoadTable)][0]
+
+@pytest.mark.parametrize("body,columns",[
+    ("aggregate s on e { total = sum(salary) }\nprint s\n",["salary"]),
+    ("map m on e { gap = age - 30 }\naggregate s on m { g = avg(gap), n = count(name) }\nprint s\n",["name","age"]),
+    ('filter f { where department == "HR" }\nfor row in f { print row.name }\n',["name","department"]),
+    ("aggregate s on e by department { n = count(1) }\nprint s\n",["department"]),
+    ("map m on e { gap = age - 30 }\nprint m\n",None),
+    ("for row in e { print row }\n",None),
+])
+def test_load_reads_only_the_columns_used(employees,body,columns):
+    source = f'load e from "{employees}"\n' + body
+    assert loaded_columns(source) == columns
+    assert run_program(source) == run_session(source)
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+def test_projected_loads_match_the_repl(employees,name):
+    source = program(name,employees)
+    assert run_program(source) == run_session(source)
+    assert run_program(source,chunksize=2) == run_session(source)
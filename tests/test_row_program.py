@@ -0,0 +1,37 @@
+import pytest
+from src.codegen.row_program import RowProgram
+from src.icg.ir import Assign
+from tests.helpers import run_program
+
+def run(program: RowProgram,assigns,rows,result: str):
+    steps = [program.compile(a) for a in assigns]
+    regs = program.registers()
+    values = []
+    for row in rows:
+        for step in steps:
+            step(row,regs)
+        values.append(regs[program.slots[result]])
+    return values
+
+def test_operands_are_resolved_once():
+    program = RowProgram(["a","b"],env={"rate": 3})
+    assigns = [Assign("t1","*","a","rate"),Assign("t2","+","t1","b"),Assign("t3",">","t2","10")]
+    assert run(program,assigns,[(1,2),(4,0),(2,5)],"t2") == [5,12,11]
+    # one register per Assign target, none for columns, env names or literals
+    assert program.slots == {"t1": 0,"t2": 1,"t3": 2}
+
+def test_row_fields_read_tuple_positions():
+    program = RowProgram(["a","b"],row_names=("r","row"),indexed=True)
+    assigns = [Assign("t1",".","r","b"),Assign("t2","-","t1")]
+    assert run(program,assigns,[(10,1,2),(11,3,4)],"t2") == [-2,-4]
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(Exception,match="Cannot access field 'c'"):
+        RowProgram(["a"]).compile(Assign("t1",".","row","c"))
+
+def test_loop_reads_row_fields(employees):
+    source = (f'load e from "{employees}"\nfilter f {{ where age > 40 }}\n'
+              'for row in f { print row.name, row.age * 2 - 1, row.department == "HR" }\n')
+    expected = "Bob\n89.0\nFalse\nDiana\n81.0\nFalse\nGeorge\n103.0\nTrue\n"
+    assert run_program(source) == expected
+    assert run_program(source,vectorize=False) == expected
@@ -0,0 +1,67 @@
+import threading
+import pytest
+from src.codegen.scheduler import DagScheduler
+from tests.helpers import run_program, run_session
+from tests.programs import PROGRAMS, program
+
+class Node:
+    """Stand-in for a PlanNode with fixed table reads and writes"""
+    def __init__(self,name,reads=(),writes=()):
+        self.name = name
+        self._reads = list(reads)
+        self._writes = list(writes)
+
+    def reads(self):
+        return self._reads
+
+    def writes(self):
+        return self._writes
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+@pytest.mark.parametrize("workers",[1,2,4])
+def test_output_keeps_program_order(employees,name,workers):
+    source = program(name,employees)
+    assert run_program(source,workers=workers) == run_session(source)
+
+def test_prints_between_independent_branches_stay_in_order(tmp_path,employees):
+    other = tmp_path / "other.csv"
+    other.write_text("x\n1\n2\n3\n")
+    source = (f'load e from "{employees}"\nload o from "{other}"\n'
+              'aggregate a on e { n = count(name) }\nprint a\n'
+              'aggregate b on o { total = sum(x) }\nprint b\n'
+              'map f on e { older = age > 40 }\nprint f\nprint a\n')
+    assert run_program(source,workers=4) == run_program(source,workers=1)
+
+def test_independent_nodes_run_concurrently():
+    # both loads wait for each other, which deadlocks unless they overlap
+    barrier = threading.Barrier(2,timeout=5)
+    plan = [Node("a",writes=["a"]),Node("b",writes=["b"])]
+    DagScheduler(plan,workers=2).run(lambda node: barrier.wait())
+
+def test_nodes_wait_for_the_tables_they_read():
+    plan = [Node("load",writes=["e"]),Node("filter",reads=["e"],writes=["f"]),
+            Node("print f",reads=["f"]),Node("map",reads=["e"],writes=["m"]),
+            Node("print m",reads=["m"]),Node("print e",reads=["e"])]
+    finished = []
+    lock = threading.Lock()
+    def run_node(node):
+        for name in node.reads():
+            assert name in finished
+        with lock:
+            finished.extend(node.writes())
+            if not node.writes():
+                finished.append(node.name)
+    DagScheduler(plan,workers=4).run(run_node)
+    assert [x for x in finished if x.startswith("print")] == ["print f","print m","print e"]
+
+def test_failing_node_is_raised():
+    def run_node(node):
+        if node.name == "b":
+            raise ValueError("boom")
+    plan = [Node("a",writes=["a"]),Node("b",reads=["a"],writes=["b"]),Node("print",reads=["b"])]
+    with pytest.raises(ValueError,match="boom"):
+        DagScheduler(plan,workers=2).run(run_node)
+
+def test_names_defined_by_an_earlier_block_have_no_edge():
+    plan = [Node("f",reads=["e"],writes=["f"])]
+    assert DagScheduler(plan).deps == [set()]
@@ -0,0 +1,53 @@
+import contextlib
+import io
+import pytest
+from src.codegen import Session
+from tests.helpers import run_program
+from tests.programs import PROGRAMS, program
+
+def run_block(session: Session,source: str) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        session.run(source)
+    return out.getvalue()
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+def test_one_statement_per_block_prints_as_the_whole_program(employees,name):
+    source = program(name,employees)
+    session = Session()
+    # a for loop spans one line, so every line is a complete statement
+    output = "".join(run_block(session,line + "\n") for line in source.splitlines())
+    assert output == run_program(source)
+
+def test_tables_and_definitions_carry_over(employees):
+    session = Session()
+    run_block(session,f'load e from "{employees}"\nfilter high {{ where salary > 60000 }}\n')
+    assert session.tables() == ["e","high"]
+    output = run_block(session,'aggregate s on high { n = count(name), top = sum(salary) }\nprint s\n')
+    assert output.split()[-2:] == ["4","313000.0"]
+    assert session.tables() == ["e","high","s"]
+
+def test_later_block_reuses_the_computed_table(employees):
+    session = Session()
+    run_block(session,f'load e from "{employees}"\n')
+    loaded = session.executor.tables["e"]
+    run_block(session,'filter f { where age > 40 }\n')
+    assert session.executor.tables["e"] is loaded
+    assert list(session.executor.tables["f"]["name"]) == ["Bob","Diana","George"]
+
+def test_failing_block_leaves_no_definitions_behind(employees):
+    session = Session()
+    run_block(session,f'load e from "{employees}"\n')
+    with pytest.raises(Exception):
+        session.run('map m on e { x = salary * 2 }\nmap bad on m { y = missing + 1 }\n')
+    assert session.tables() == ["e"]
+    # m was never defined, so the same name can be used again
+    run_block(session,'map m on e { x = age * 2 }\n')
+    assert session.tables() == ["e","m"]
+
+def test_unknown_table_in_a_later_block_is_an_error(employees):
+    session = Session()
+    run_block(session,f'load e from "{employees}"\n')
+    with pytest.raises(Exception):
+        session.run("print nothing\n")
+    assert session.tables() == ["e"]
@@ -0,0 +1,38 @@
+import pytest
+from src.ast import OrderStmt
+from src.lexer import Lexer
+from src.parser import Parser
+from tests.helpers import run_program, run_session
+
+def parse(source: str):
+    return Parser(Lexer(source).tokenize()).parse()
+
+@pytest.fixture
+def keyword_columns(tmp_path) -> str:
+    path = tmp_path / "keywords.csv"
+    path.write_text("id,order,index,desc,by\n1,30,a,x,2\n2,10,b,y,3\n3,20,a,z,1\n")
+    return str(path)
+
+def test_soft_keywords_are_names_after_their_statement_keyword():
+    stmt = parse("order desc on limit by order desc limit 2").statements[0]
+    assert isinstance(stmt,OrderStmt)
+    assert (stmt.target,stmt.source,stmt.column,stmt.descending,stmt.limit) == ("desc","limit","order",True,2)
+
+def test_reserved_keywords_are_still_rejected_as_names():
+    with pytest.raises(Exception,match="Expected IDENTIFIER"):
+        parse("map m on t { where = 1 }")
+
+def test_columns_named_like_soft_keywords(keyword_columns):
+    source = (f'load t from "{keyword_columns}"\n'
+              'index t on index\n'
+              'filter f { where order > 15 and index == "a" }\n'
+              'map m on f { limit = order * 2, join = by + 1 }\n'
+              'print m\n'
+              'order o on t by order desc limit 2\n'
+              'print o\n'
+              'aggregate s on t by index { total = sum(order) }\n'
+              'print s\n'
+              'for row in t { print row.order, row.desc }\n')
+    output = run_program(source)
+    assert output == run_session(source)
+    assert "limit" in output and "join" in output
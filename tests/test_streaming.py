@@ -0,0 +1,20 @@
+import pytest
+import src.codegen.executor as executor
+from tests.helpers import run_program, run_session
+from tests.programs import PROGRAMS, program
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+@pytest.mark.parametrize("chunksize",[1,2,4,100])
+def test_chunked_run_matches_the_repl(employees,name,chunksize):
+    source = program(name,employees)
+    assert run_program(source,chunksize=chunksize) == run_session(source)
+
+@pytest.mark.parametrize("name",sorted(PROGRAMS))
+def test_chunked_row_loop_matches_the_repl(employees,name):
+    source = program(name,employees)
+    assert run_program(source,chunksize=3,vectorize=False) == run_session(source)
+
+def test_streamed_load_keeps_no_table(catalog,monkeypatch,employees):
+    monkeypatch.setattr(executor,"LOAD_CHUNK_ROWS",2)
+    run_program(program("pipeline",employees),chunksize=2)
+    assert catalog.entry(employees).tables == {}
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.codegen import Backend
+from src.codegen.ordering import sort_positions, top_k_positions
+from tests.helpers import run_program
+
+def column(kind: str,seed: int) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0,8,200)
+    if kind == "int":
+        return pd.Series(values)
+    if kind == "float":
+        series = pd.Series(values / 2)
+        series[rng.random(200) < 0.2] = np.nan
+        return series
+    series = pd.Series([f"v{v}" for v in values],dtype=object)
+    series[rng.random(200) < 0.2] = None
+    return series
+
+@pytest.mark.parametrize("kind",["int","float","string"])
+@pytest.mark.parametrize("descending",[False,True])
+@pytest.mark.parametrize("k",[1,5,8,150,199,200,500])
+def test_top_k_is_the_head_of_a_stable_sort(kind,descending,k):
+    # few distinct values, so the k-th value is almost always tied
+    for seed in range(5):
+        values = column(kind,seed)
+        expected = sort_positions(values,descending)[:k]
+        assert top_k_positions(values,k,descending).tolist() == expected.tolist()
+
+def test_ties_at_the_cut_go_to_the_earliest_rows():
+    values = pd.Series([2,1,2,3,2,0,2])
+    assert top_k_positions(values,3).tolist() == [5,1,0]
+    assert top_k_positions(values,3,descending=True).tolist() == [3,0,2]
+    assert top_k_positions(values.astype(str),3,descending=True).tolist() == [3,0,2]
+
+def test_missing_values_fill_the_limit_last():
+    values = pd.Series([np.nan,4.0,np.nan,1.0,np.nan])
+    assert top_k_positions(values,3).tolist() == [3,1,0]
+    assert top_k_positions(values,3,descending=True).tolist() == [1,3,0]
+    assert top_k_positions(values,1,descending=True).tolist() == [1]
+
+def test_limit_keeps_row_labels(employees):
+    output = run_program(f'load e from "{employees}"\norder o on e by age desc limit 2\nprint o\n')
+    assert output.split("\n")[1].split()[:2] == ["6","George"]
+    assert output.split("\n")[2].split()[:2] == ["1","Bob"]
+
+@pytest.mark.parametrize("limit",["0","2.5"])
+def test_limit_must_be_a_positive_integer(employees,limit):
+    with pytest.raises(Exception,match="Order limit must be a positive integer"):
+        Backend(f'load e from "{employees}"\norder o on e by age limit {limit}\nprint o\n').run()